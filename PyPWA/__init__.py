@@ -30,20 +30,41 @@ Fitting and Simulation:
     function you want to simulate or fit.
 - FunctionAmplitude: Fallback for old functions for PyPWA 2.0, don't
     use unless you need.
+- WaveSetFunction: Abstract object for amplitudes that are linear in
+    their couplings, which lets the likelihoods precompute the Monte
+    Carlo integrals.
+- CompositeAmplitude: Combines several NestedFunctions, and only
+    recalculates the ones whose parameters have changed.
 - monte_carlo_simulation: Function used for rejection sampling.
+- generate_phase_space: Generates n-body phase space Monte Carlo as a
+    ParticlePool, described with ParticleSpec.
+- simulate_to_yield: Simulates phase space with an amplitude until the
+    requested number of events are accepted, returning a SimulationYield.
 - simulate.process_user_function: Processes the user function and returns
     the functions final values and max value.
 - simulate.make_rejection_list: Takes the final values and max values to
     produce a rejection list that can be used to mask the source data.
 - LogLikelihood: Sets up the log likelihood. Supports both the extended,
     binned, and standard likelihood.
+- StreamingLogLikelihood: The log likelihood for data and monte carlo
+    that don't fit in memory, read from memory mapped files in chunks.
 - ChiSquared: Sets up the ChiSquared likelihood, supports using working
     with expected values or binned
 - EmptyLikelihood: Sets up an empty likelihood. For use when you want
     to use the multiprocessing without a likelihood, or have included
     a likelihood directly into your NestedFunction.
+- compare_precision: Compares a likelihood in single precision against
+    double precision on a sample of the events.
 - minuit: A wrapper around iminuit to make it easier to use with our
     likelihoods.
+- bootstrap: Refits a likelihood on bootstrap replicas of its data,
+    reusing the likelihood's processes for every replica.
+- fit_bins: Fits many bins at once, sharing the processes between the
+    fits, such as the bins from bin_by_range.
+- multistart: Fits a likelihood from many starting points at once, and
+    ranks the minima that were found.
+- WorkerPool: A set of processes that stay running so that they can be
+    shared between several likelihoods and simulations.
 
 Reading and Writing data:
 -------------------------
@@ -56,6 +77,8 @@ Note: Data can be loaded and writen with Pandas or Numpy if preferred,
 - DataType: Enum to select type for get_writer and get_reader
 - get_writer: Returns an object that supports writing one event at a time
 - get_reader: Returns an object that supports reading one event at a time
+- memory_map: Memory maps a file, reading it into a numpy file first if
+    needed, so that it can be used without being loaded.
 - ProjectDatabase: A numerical database based off of HDF5 that allows for
     working with data larger than memory. Only recommended if you have
     to use it.
@@ -92,25 +115,34 @@ from PyPWA.libs.binning import (
 )
 from PyPWA.libs.common import to_contiguous, pandas_to_numpy
 from PyPWA.libs.file import (
-    get_reader, get_writer, read, write, cache, DataType
+    get_reader, get_writer, memory_map, read, write, cache, DataType
 )
 from PyPWA.libs.fit import (
-    minuit, ChiSquared, LogLikelihood, EmptyLikelihood,
-    sweightedLogLikelihood, NestedFunction, FunctionAmplitude
+    minuit, bootstrap, fit_bins, multistart, ChiSquared, LogLikelihood,
+    EmptyLikelihood, sweightedLogLikelihood, NestedFunction,
+    FunctionAmplitude, WaveSetFunction, CompositeAmplitude,
+    StreamingLogLikelihood, compare_precision
 )
 from PyPWA.libs.plotting import make_lego
-from PyPWA.libs.simulate import monte_carlo_simulation
+from PyPWA.libs.process import WorkerPool
+from PyPWA.libs.simulate import (
+    monte_carlo_simulation, generate_phase_space, ParticleSpec,
+    simulate_to_yield, SimulationYield
+)
 from PyPWA.libs.vectors import FourVector, ThreeVector, ParticlePool, Particle
 
 __all__ = [
-    'ChiSquared', 'DataType', 'EmptyLikelihood',
+    'ChiSquared', 'CompositeAmplitude', 'DataType', 'EmptyLikelihood',
     'FourVector', 'FunctionAmplitude', 'LogLikelihood',
-    'NestedFunction', 'Particle', 'ParticlePool',
-    'ThreeVector', 'bin_by_list', 'bin_by_range', 'bin_with_fixed_widths',
-    'cache', 'get_reader', 'get_writer', 'make_lego', 'mcmc',
-    'minuit', 'monte_carlo_simulation', 'pandas_to_numpy',
-    'read', 'simulate', 'sweightedLogLikelihood',
-    'to_contiguous', 'write'
+    'NestedFunction', 'Particle', 'ParticlePool', 'ParticleSpec',
+    'SimulationYield', 'StreamingLogLikelihood', 'ThreeVector',
+    'WaveSetFunction',
+    'WorkerPool', 'bin_by_list', 'bin_by_range', 'bin_with_fixed_widths',
+    'bootstrap', 'cache', 'compare_precision', 'fit_bins',
+    'generate_phase_space', 'get_reader', 'get_writer',
+    'make_lego', 'mcmc', 'memory_map', 'minuit', 'monte_carlo_simulation',
+    'multistart', 'pandas_to_numpy', 'read', 'simulate',
+    'simulate_to_yield', 'sweightedLogLikelihood', 'to_contiguous', 'write'
 ]
 
 try:
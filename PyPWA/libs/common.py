@@ -21,7 +21,7 @@ Miscellaneous file tools.
 -------------------------
 """
 
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -82,7 +82,7 @@ def pandas_to_numpy(df: Union[pd.Series, pd.DataFrame]) -> np.ndarray:
 
 def to_contiguous(
         data: Union[pd.DataFrame, np.ndarray, Dict[str, np.ndarray]],
-        names: List[str]
+        names: List[str], dtype: Optional[type] = None
 ) -> Union[np.ndarray, Tuple[np.ndarray, ...]]:
     """Convert DataFrame or Structured Array to List of Contiguous Arrays
 
@@ -102,6 +102,10 @@ def to_contiguous(
     names : List of Column Names or str
         This is either a list of columns you want from the array, or a
         single column you want from the array
+    dtype : numpy dtype, optional
+        The type to convert the columns to, such as numpy.float32 for
+        amplitudes that work in single precision. By default the columns
+        keep their type.
 
     Returns
     -------
@@ -113,12 +117,12 @@ def to_contiguous(
     """
 
     if isinstance(names, str):
-        return np.ascontiguousarray(data[names])
+        return np.ascontiguousarray(data[names], dtype)
 
     contiguous_data = []
     for name in names:
         try:
-            contiguous_data.append(np.ascontiguousarray(data[name]))
+            contiguous_data.append(np.ascontiguousarray(data[name], dtype))
         except IndexError:
             if isinstance(data, np.ndarray) and not data.dtype.names:
                 raise ValueError(
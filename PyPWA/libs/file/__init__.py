@@ -51,6 +51,7 @@ from .processor import templates as _templates
 from PyPWA.libs.vectors import ParticlePool as _pp
 import numpy as _npy
 import pandas as _pd
+from pathlib import Path as _Path
 from typing import Union as _U
 
 __credits__ = ["Mark Jones"]
@@ -59,7 +60,7 @@ __version__ = _info.VERSION
 
 
 __all__ = [
-    "get_reader", "get_writer", "read", "write"
+    "get_reader", "get_writer", "memory_map", "read", "write"
 ]
 
 
@@ -147,6 +148,79 @@ def get_writer(filename: str, dtype: DataType) -> _templates.WriterBase:
     return data.get_writer(filename, dtype)
 
 
+def memory_map(
+        source: _U[str, _Path, _templates.ReaderBase], spool: _U[str, _Path]
+) -> _npy.memmap:
+    """Memory maps a file, so that it can be used without being loaded
+
+    Numpy files are mapped directly. Any other file or reader is read one
+    event at a time into the spool, which is then mapped instead, so the
+    memory used never depends on the size of the file.
+
+    Parameters
+    ----------
+    source : str, Path, or ReaderBase
+        The file to map, or a reader for it. Readers are reset and read
+        from their first event, and are left open.
+    spool : str, Path
+        The '.npy' file the events are written to when the source isn't
+        a numpy file. It's overwritten if it already exists.
+
+    Returns
+    -------
+    npy.memmap
+        The read only mapping of the events
+
+    Raises
+    ------
+    ValueError
+        If the file contains a ParticlePool, which can't be mapped, or
+        if the file has no events to map.
+
+    See Also
+    --------
+    get_reader : Reads the file one event at a time
+
+    Examples
+    --------
+    >>> data = memory_map("large.csv", "large.npy")
+    >>> data["x"].max()
+    """
+    if isinstance(source, _templates.ReaderBase):
+        return _spool(source, _Path(spool))
+    elif _Path(source).suffix == ".npy":
+        return _npy.load(str(source), mmap_mode="r")
+
+    with get_reader(source) as reader:
+        return _spool(reader, _Path(spool))
+
+
+def _spool(reader: _templates.ReaderBase, spool: _Path) -> _npy.memmap:
+    if reader.is_particle_pool:
+        raise ValueError("ParticlePools can not be memory mapped!")
+
+    # The spool is sized by the event count, so every event must be read
+    reader.reset()
+    events = iter(reader)
+    try:
+        first = _npy.asarray(next(events))
+    except StopIteration:
+        raise ValueError("There are no events to memory map!")
+
+    array = _npy.lib.format.open_memmap(
+        str(spool), "w+", first.dtype,
+        (reader.get_event_count(),) + first.shape
+    )
+
+    array[0] = first
+    for index, event in enumerate(events, 1):
+        array[index] = event
+
+    array.flush()
+    del array
+    return _npy.load(str(spool), mmap_mode="r")
+
+
 def read(
         filename: str, use_pandas=False, cache=True, clear_cache=False
 ) -> _U[_pd.DataFrame, _pp, _npy.ndarray]:
@@ -29,13 +29,19 @@ __version__ = _info.VERSION
 
 from .likelihoods import (
     ChiSquared, LogLikelihood, EmptyLikelihood,
-    NestedFunction, FunctionAmplitude, sweightedLogLikelihood
+    NestedFunction, FunctionAmplitude, sweightedLogLikelihood,
+    WaveSetFunction, CompositeAmplitude, StreamingLogLikelihood,
+    compare_precision
 )
 
 from .minuit import minuit
+from .bootstrap import bootstrap
+from .farm import fit_bins
+from .multistart import multistart
+from . import priors
 
 try:
-    from .mcmc import mcmc
+    from .mcmc import mcmc, MemmapBackend, ConvergenceMonitor
 except ImportError:
     # EMCEE not installed, so pass over it
     pass
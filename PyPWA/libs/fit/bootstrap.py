@@ -0,0 +1,96 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Bootstrap refits that reuse the likelihood's loaded processes. Each
+replica only reweights the events already held by the processes, so the
+only cost per replica is the fit itself.
+"""
+
+from typing import Any, Dict, Optional as Opt, Union
+
+import numpy as npy
+import pandas as pd
+
+from PyPWA import info as _info
+from .minuit import minuit
+
+__credits__ = ["Mark Jones"]
+__author__ = _info.AUTHOR
+__version__ = _info.VERSION
+
+
+def bootstrap(
+        settings: Dict[str, Any], likelihood: Any, replicas: int,
+        method: str = "poisson", seed: Opt[Union[int, npy.ndarray]] = None,
+        gradient: Opt[str] = None
+) -> pd.DataFrame:
+    """Refits the likelihood on bootstrap replicas of the data
+
+    Each replica resamples the data events inside the likelihood's
+    processes, by weighting the quality factor or sWeight of every event,
+    and then runs Migrad from the same settings. The data and processes
+    are reused by every replica, and the original weights are restored
+    when the refits finish.
+
+    Parameters
+    ----------
+    settings : Dict[str, Any]
+        The settings passed to minuit for every replica.
+    likelihood : LogLikelihood, sweightedLogLikelihood, or
+        StreamingLogLikelihood
+        The likelihood to refit, it is not closed afterwards.
+    replicas : int
+        The number of bootstrap refits
+    method : str, optional
+        Either "poisson", which weights each event by a Poisson
+        distribution with a mean of 1, or "multinomial", which draws
+        exactly as many events as there are with replacement. Defaults to
+        "poisson".
+    seed : int, optional
+        Seed for the replicas, the same seed and number of processes
+        reproduce the same replicas.
+    gradient : str, optional
+        The gradient passed to minuit, see minuit for the options.
+
+    Returns
+    -------
+    DataFrame
+        One row per replica, with the fitted value of every parameter, the
+        final value of the likelihood as fval, and whether Migrad
+        converged as valid.
+
+    See Also
+    --------
+    minuit : The fitter used for each replica
+    """
+    results = []
+    try:
+        for replica in npy.random.SeedSequence(seed).spawn(replicas):
+            likelihood.resample(replica, method)
+            optimizer = minuit(settings, likelihood, gradient)
+            optimizer.migrad()
+
+            result = dict(zip(optimizer.parameters, optimizer.values))
+            result["fval"] = optimizer.fval
+            result["valid"] = optimizer.valid
+            results.append(result)
+    finally:
+        likelihood.reset_weights()
+
+    return pd.DataFrame(results)
@@ -0,0 +1,250 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Fits many independent bins at once. The processes are divided into
+slots, each slot fitting one bin at a time with its own WorkerPool, so
+the processes are started once no matter how many bins are fit.
+"""
+
+import copy
+import threading
+from typing import Any, Dict, List, Optional as Opt, Tuple, Union
+
+import numpy as npy
+import pandas as pd
+
+from PyPWA import info as _info
+from PyPWA.libs import process
+from . import likelihoods
+from .minuit import minuit
+
+__credits__ = ["Mark Jones"]
+__author__ = _info.AUTHOR
+__version__ = _info.VERSION
+
+
+_bin = Union[pd.DataFrame, npy.ndarray, Dict[str, Any]]
+
+# Set on every likelihood by fit_bins, from the slot fitting the bin
+_SLOT_ARGUMENTS = {"num_of_processes", "pool"}
+
+
+class _Schedule:
+    """Hands out the bins in order, along with where each fit starts
+
+    Each fit starts from the results of the nearest bin that has already
+    converged, since neighbouring bins usually have similar solutions.
+    """
+
+    def __init__(
+            self, count: int, settings: Dict[str, Any], warm_start: bool
+    ):
+        self.__lock = threading.Lock()
+        self.__next = 0
+        self.__count = count
+        self.__settings = settings
+        self.__warm_start = warm_start
+        self.results: List[Opt[Dict[str, Any]]] = [None] * count
+        self.error: Opt[Exception] = None
+
+    def take(self) -> Opt[Tuple[int, Dict[str, Any]]]:
+        with self.__lock:
+            if self.__next >= self.__count or self.error is not None:
+                return None
+
+            index = self.__next
+            self.__next += 1
+            return index, self.__start(index)
+
+    def __start(self, index: int) -> Dict[str, Any]:
+        settings = dict(self.__settings)
+        converged = [
+            position for position, result in enumerate(self.results)
+            if result is not None and result["valid"]
+        ]
+
+        if self.__warm_start and converged:
+            nearest = min(converged, key=lambda position: abs(position-index))
+            for name, value in self.results[nearest]["values"].items():
+                if name in settings:
+                    settings[name] = value
+        return settings
+
+    def finish(self, index: int, result: Dict[str, Any]):
+        with self.__lock:
+            self.results[index] = result
+
+    def fail(self, error: Exception):
+        with self.__lock:
+            if self.error is None:
+                self.error = error
+
+
+def _fit_slot(
+        schedule: _Schedule, pool: process.WorkerPool, bins: List[_bin],
+        amplitude: likelihoods.NestedFunction, likelihood_type: type,
+        gradient: Opt[str], likelihood_kwargs: Dict[str, Any]
+):
+    try:
+        job = schedule.take()
+        while job is not None:
+            index, settings = job
+            arguments = bins[index]
+            if not isinstance(arguments, dict):
+                arguments = {"data": arguments}
+
+            with likelihood_type(
+                    copy.deepcopy(amplitude), **arguments,
+                    **likelihood_kwargs, num_of_processes=len(pool),
+                    pool=pool
+            ) as likelihood:
+                optimizer = minuit(settings, likelihood, gradient)
+                optimizer.migrad()
+
+            schedule.finish(index, {
+                "values": dict(zip(optimizer.parameters, optimizer.values)),
+                "errors": dict(zip(optimizer.parameters, optimizer.errors)),
+                "fval": optimizer.fval, "valid": optimizer.valid
+            })
+            job = schedule.take()
+    except Exception as error:
+        schedule.fail(error)
+
+
+def _check_arguments(bins: List[_bin], likelihood_kwargs: Dict[str, Any]):
+    given = set(likelihood_kwargs)
+    for arguments in bins:
+        if isinstance(arguments, dict):
+            given.update(arguments)
+
+    reserved = sorted(given & _SLOT_ARGUMENTS)
+    if reserved:
+        raise ValueError(
+            f"{', '.join(reserved)} can't be passed to the likelihood, "
+            f"since fit_bins gives each bin its processes. Set the total "
+            f"with the num_of_processes of fit_bins instead!"
+        )
+
+
+def _slot_sizes(bin_count: int, num_of_processes: int) -> List[int]:
+    # Every process is used, and no slot is made without a bin to fit
+    slots = max(min(bin_count, num_of_processes), 1)
+    each, extra = divmod(max(num_of_processes, slots), slots)
+    return [each + 1] * extra + [each] * (slots - extra)
+
+
+def fit_bins(
+        bins: List[_bin], amplitude: likelihoods.NestedFunction,
+        settings: Dict[str, Any],
+        likelihood_type: type = likelihoods.LogLikelihood,
+        num_of_processes: int = process.MAX_PROC, warm_start: bool = True,
+        gradient: Opt[str] = None, **likelihood_kwargs: Any
+) -> pd.DataFrame:
+    """Fits every bin in parallel, with the processes shared between them
+
+    The processes are divided evenly between as many fits as can run at
+    once. When there are more bins than processes, every process fits a
+    different bin, and when there are fewer, each fit is spread over
+    several processes. The processes are started once and reused for
+    every bin.
+
+    Parameters
+    ----------
+    bins : List[DataFrame, ndarray, or Dict[str, Any]]
+        The bins to fit, like the bins from bin_by_range,
+        bin_with_fixed_widths, or bin_by_list. A bin can also be a dict
+        of arguments for the likelihood, such as data, monte_carlo, and
+        generated_length, for when each bin has its own monte carlo.
+        It can't include num_of_processes or pool.
+    amplitude : NestedFunction
+        The amplitude, copied for every bin. It should use
+        multiprocessing, which is the default.
+    settings : Dict[str, Any]
+        The settings passed to minuit for every bin.
+    likelihood_type : type, optional
+        The likelihood to fit with, defaults to LogLikelihood.
+    num_of_processes : int, optional
+        The total number of processes used for all of the fits, defaults
+        to the number of cores.
+    warm_start : bool, optional
+        Starts each fit from the results of the nearest bin that has
+        already converged, instead of from settings. Defaults to True.
+    gradient : str, optional
+        The gradient passed to minuit, see minuit for the options.
+    likelihood_kwargs : Any
+        Any other arguments, passed to the likelihood for every bin.
+        num_of_processes and pool can't be included, since they're set
+        from the slot that fits the bin.
+
+    Returns
+    -------
+    DataFrame
+        One row per bin, in the same order as bins, with the fitted value
+        of every parameter, its error in a column ending with _error, the
+        final value of the likelihood as fval, and whether Migrad
+        converged as valid.
+
+    Raises
+    ------
+    ValueError
+        If a bin or likelihood_kwargs includes num_of_processes or pool.
+
+    Examples
+    --------
+    >>> bins = bin_by_range(data, "mass", 100)
+    >>> results = fit_bins(bins, amplitude, {"a": 1, "b": 0})
+    """
+    if not len(bins):
+        return pd.DataFrame()
+
+    _check_arguments(bins, likelihood_kwargs)
+    schedule = _Schedule(len(bins), settings, warm_start)
+    pools = []
+
+    try:
+        for size in _slot_sizes(len(bins), num_of_processes):
+            pools.append(process.WorkerPool(size))
+
+        slots = [
+            threading.Thread(
+                target=_fit_slot, args=(
+                    schedule, pool, bins, amplitude, likelihood_type,
+                    gradient, likelihood_kwargs
+                )
+            ) for pool in pools
+        ]
+        for slot in slots:
+            slot.start()
+        for slot in slots:
+            slot.join()
+    finally:
+        for pool in pools:
+            pool.close()
+
+    if schedule.error is not None:
+        raise schedule.error
+
+    rows = []
+    for result in schedule.results:
+        row = dict(result["values"])
+        row.update({f"{k}_error": v for k, v in result["errors"].items()})
+        row["fval"] = result["fval"]
+        row["valid"] = result["valid"]
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -20,11 +20,17 @@
 Main object for Parsing Data
 """
 
+import collections
 import copy
 import multiprocessing
+import tempfile
 from abc import abstractmethod, ABC
 import enum
-from typing import Any, Callable, Dict, List, Union, Optional as Opt
+from pathlib import Path
+from typing import (
+    Any, Callable, Dict, Hashable, List, NamedTuple, Tuple, Union,
+    Optional as Opt
+)
 
 import numexpr as ne
 import numpy as npy
@@ -39,13 +45,17 @@ except ImportError:
     TORCH_AVAIL = False
 
 from PyPWA import info as _info
-from PyPWA.libs import process
+from PyPWA.libs import file, process, vectors
+from PyPWA.libs.file.processor.templates import ReaderBase
 
 __credits__ = ["Mark Jones"]
 __author__ = _info.AUTHOR
 __version__ = _info.VERSION
 
 
+_streamable = Union[npy.ndarray, ReaderBase, str, Path]
+
+
 class NestedFunction(ABC):
     """Interface for Amplitudes
 
@@ -61,7 +71,10 @@ class NestedFunction(ABC):
     themselves.
 
     Set USE_TORCH to calculate the likelihood using PyTorch. Assumes that
-    all data returned from the NestedFunction will be in a Tensor.
+    all data returned from the NestedFunction will be in a Tensor. If the
+    amplitude doesn't define a gradient, the likelihood's gradient will
+    be calculated by PyTorch's autograd, in which case the parameters
+    passed to calculate will be Tensors instead of floats.
 
     Set USE_THREADS to calculate the likelihood using threads. This is best
     if the likelihood is dependent on waiting for responses from hardware
@@ -73,9 +86,29 @@ class NestedFunction(ABC):
     set to True internally. This will raise a RuntimeError if the GPU is not
     available.
 
+    Set USE_SHARED_MEMORY to place the data into shared memory before the
+    processes are started. Each process will then only receive a view of
+    its slice of the data instead of its own copy, which keeps memory
+    usage and startup time flat as the number of processes grows. This
+    has no effect when USE_THREADS is set.
+
+    Set PRECISION to numpy.float32 to have the likelihoods store the
+    event data in single precision. This halves the memory used by the
+    data, and the memory bandwidth needed to read it, while the sums
+    are still accumulated in double precision. Use compare_precision to
+    check the likelihood on a sample before fitting in single precision.
+
     Set DEBUG to True to disable all multiprocessing and threads, this will
     prevent errors from being buried in tracebacks.
 
+    Define a gradient method to have the likelihoods calculate an exact
+    gradient inside each process, which can then be handed to Minuit by
+    using `minuit(..., gradient="analytic")`. It receives the same
+    parameters as calculate, and returns a 2D array with the derivative
+    of every event with respect to each parameter, with one row for
+    each parameter in the same order the parameters were provided. It
+    is None on amplitudes that don't define one.
+
     Warnings
     --------
     If you enable USE_MP and USE_THREADS, then a RuntimeError will be raised,
@@ -90,8 +123,12 @@ class NestedFunction(ABC):
     USE_MP = True
     USE_TORCH = False
     USE_THREADS = False
+    USE_SHARED_MEMORY = False
+    PRECISION = npy.float64
     THREAD = 0
 
+    gradient: Opt[Callable[[Any], Union[npy.ndarray, torch.Tensor]]] = None
+
     def __init__(self):
 
         if self.USE_MP and self.USE_THREADS:
@@ -171,12 +208,487 @@ class FunctionAmplitude(NestedFunction):
         return self.__processing_function(self.__data, parameters)
 
 
+class WaveSetFunction(NestedFunction):
+    """Interface for Amplitudes that are linear in their couplings
+
+    For the standard partial wave form I = |sum(c_i * A_i)|^2, where the
+    waves A_i depend only on the data and the couplings c_i only on the
+    parameters, the waves are calculated a single time during setup and
+    each call only needs to combine them with the couplings.
+
+    More importantly, when used with an extended LogLikelihood or the
+    sweightedLogLikelihood, the Monte Carlo sum collapses into a small
+    matrix of integrals, sum(A_i * conj(A_j)), that is calculated once
+    inside each process. After that the Monte Carlo term costs
+    O(waves^2) per call, regardless of how large the Monte Carlo is.
+
+    See Also
+    --------
+    NestedFunction : For defining any other function
+    """
+
+    def setup(self, data):
+        self.__waves = npy.ascontiguousarray(
+            self.waves(data), dtype=npy.complex128
+        )
+
+    @abstractmethod
+    def waves(self, data) -> npy.ndarray:
+        """Calculates the waves for every event
+
+        Parameters
+        ----------
+        data : DataFrame or npy.ndarray
+            The data that will be used for calculation
+
+        Returns
+        -------
+        npy.ndarray
+            A complex 2D array with a row for every event and a column
+            for every wave.
+        """
+        ...
+
+    @abstractmethod
+    def couplings(self, parameters) -> npy.ndarray:
+        """Calculates the complex coupling for each wave
+
+        Parameters
+        ----------
+        parameters :  Dict[str, float]
+            The parameters sent to the process by the optimizer
+
+        Returns
+        -------
+        npy.ndarray
+            A complex array with a coupling for every wave, in the same
+            order as the columns returned from waves.
+        """
+        ...
+
+    def calculate(self, parameters) -> npy.ndarray:
+        amplitude = self.__waves @ self.__couplings(parameters)
+        return amplitude.real**2 + amplitude.imag**2
+
+    def integrals(
+            self, weights: Union[npy.ndarray, float] = 1
+    ) -> npy.ndarray:
+        """Calculates the integral matrix of the waves
+
+        Parameters
+        ----------
+        weights : npy.ndarray or float, optional
+            The weight of each event in the integrals.
+
+        Returns
+        -------
+        npy.ndarray
+            The complex square matrix of sum(weights * A_i * conj(A_j)).
+        """
+        weights = npy.asarray(weights, dtype=npy.float64).reshape(-1, 1)
+        weighted = self.__waves * weights
+        return weighted.T @ self.__waves.conj()
+
+    def normalization(
+            self, integrals: npy.ndarray, parameters
+    ) -> float:
+        """Sums the intensity over the events used for the integrals
+
+        Parameters
+        ----------
+        integrals : npy.ndarray
+            The matrix returned from integrals
+        parameters :  Dict[str, float]
+            The parameters sent to the process by the optimizer
+
+        Returns
+        -------
+        float
+            The same result as summing calculate over the events.
+        """
+        couplings = self.__couplings(parameters)
+        return (couplings @ integrals @ couplings.conj()).real
+
+    def __couplings(self, parameters) -> npy.ndarray:
+        return npy.asarray(self.couplings(parameters), dtype=npy.complex128)
+
+
+class CompositeAmplitude(NestedFunction):
+    """Amplitude built from several components that are cached separately
+
+    Each component is a NestedFunction paired with the names of the
+    parameters it depends on. Inside every process the last result of
+    each component is kept, and a component is only recalculated when one
+    of its own parameters has changed. This is the common case with
+    Migrad, which varies a single parameter at a time, so only the
+    components depending on that parameter are redone before the results
+    are combined.
+
+    The flags, such as USE_MP and USE_TORCH, are taken from the first
+    component.
+
+    Parameters
+    ----------
+    components : List[Tuple[NestedFunction, List[str]]]
+        The components of the amplitude, each with the parameters that it
+        depends on. If the parameters are an array instead of a dict,
+        use the indexes of the parameters instead of their names.
+    combine : Callable[[List[npy.ndarray]], npy.ndarray], optional
+        Combines the results of the components, in the order they were
+        provided, into the final result. Defaults to the product of the
+        components.
+
+    Warnings
+    --------
+    A component must only depend on the parameters it declares, otherwise
+    its stale results will be reused.
+    """
+
+    def __init__(
+            self,
+            components: List[Tuple[NestedFunction, List[Any]]],
+            combine: Opt[Callable[[List[Any]], Any]] = None
+    ):
+        if not len(components):
+            raise ValueError("CompositeAmplitude needs at least one component")
+
+        first = components[0][0]
+        self.DEBUG = first.DEBUG
+        self.USE_MP = first.USE_MP
+        self.USE_TORCH = first.USE_TORCH
+        self.USE_THREADS = first.USE_THREADS
+        self.USE_SHARED_MEMORY = first.USE_SHARED_MEMORY
+        super(CompositeAmplitude, self).__init__()
+
+        self.__components = [component for component, _ in components]
+        self.__dependencies = [list(keys) for _, keys in components]
+        self.__combine = _product if combine is None else combine
+        self.__keys: List[Opt[Tuple[float, ...]]] = []
+        self.__results: List[Any] = []
+
+    def setup(self, data):
+        for component in self.__components:
+            component.THREAD = self.THREAD
+            component.setup(data)
+
+        self.__keys = [None] * len(self.__components)
+        self.__results = [None] * len(self.__components)
+
+    def calculate(self, parameters) -> Union[npy.ndarray, torch.Tensor]:
+        for index, component in enumerate(self.__components):
+            key = _parameter_key(parameters, self.__dependencies[index])
+            if key is None or key != self.__keys[index]:
+                self.__results[index] = component.calculate(parameters)
+                self.__keys[index] = key
+
+        return self.__combine(self.__results)
+
+
+def _product(results: List[Any]) -> Any:
+    product = results[0]
+    for result in results[1:]:
+        product = product * result
+    return product
+
+
+def _parameter_key(
+        parameters: Any, dependencies: List[Any]
+) -> Opt[Tuple[float, ...]]:
+    # Tensors that require a gradient can't be cached, since the result
+    # needs to be part of the graph for the current parameters.
+    values = [parameters[name] for name in dependencies]
+    if TORCH_AVAIL and any(
+            isinstance(value, torch.Tensor) and value.requires_grad
+            for value in values
+    ):
+        return None
+    return tuple(float(value) for value in values)
+
+
+def _use_integrals(amplitude: NestedFunction) -> bool:
+    return isinstance(amplitude, WaveSetFunction) and not amplitude.USE_TORCH
+
+
 class LikelihoodType(enum.Enum):
     LIKELIHOOD = enum.auto()
     CHI_SQUARED = enum.auto()
     OTHER = enum.auto()
 
 
+class _ParameterBatch:
+    """Several sets of parameters sent to the kernels in one message"""
+
+    def __init__(self, parameters: List[Any]):
+        self.parameters = parameters
+
+
+class _GradientRequest:
+    """Asks the kernels for the likelihood along with its gradient"""
+
+    def __init__(self, parameters: Any):
+        self.parameters = parameters
+
+
+class _GradientBatch:
+    """Several gradient requests sent to the kernels in one message"""
+
+    def __init__(self, parameters: List[Any]):
+        self.parameters = parameters
+
+
+class _EventCounts:
+    """Asks each kernel how many data events it holds"""
+
+    def __init__(self, worker_count: int):
+        self.worker_count = worker_count
+
+
+class _Resample:
+    """Reweights the data events inside each kernel
+
+    Each kernel draws its weights from its own child of the seed, so the
+    weights never need to be sent to the processes. Without seeds, the
+    original weights are restored.
+    """
+
+    def __init__(
+            self, seeds: Opt[List[npy.random.SeedSequence]] = None,
+            counts: Opt[npy.ndarray] = None
+    ):
+        self.seeds = seeds
+        self.counts = counts
+
+    def weights(self, process_id: int, length: int) -> Opt[npy.ndarray]:
+        if self.seeds is None:
+            return None
+
+        generator = npy.random.default_rng(self.seeds[process_id])
+        if self.counts is None:
+            weights = generator.poisson(1., length)
+        elif length:
+            weights = generator.multinomial(
+                self.counts[process_id], npy.full(length, 1 / length)
+            )
+        else:
+            weights = npy.zeros(0)
+        return weights.astype(npy.float64)
+
+
+def _to_numpy(value: Union[npy.ndarray, torch.Tensor]) -> npy.ndarray:
+    if TORCH_AVAIL and isinstance(value, torch.Tensor):
+        return value.cpu().detach().numpy()
+    return npy.asarray(value)
+
+
+def _sum(expression: str, local_dict: Dict[str, Any]) -> float:
+    # numexpr accumulates in the type of its inputs, so single precision
+    # terms are summed pairwise by numpy in double precision instead.
+    if any(_is_single(value) for value in local_dict.values()):
+        return npy.sum(ne.evaluate(expression, local_dict), dtype=npy.float64)
+    return ne.evaluate(f"sum({expression})", local_dict)
+
+
+def _total(array: npy.ndarray, axis: Opt[int] = None) -> npy.ndarray:
+    if _is_single(array):
+        return npy.sum(npy.asarray(array), axis=axis, dtype=npy.float64)
+    return npy.sum(array, axis=axis)
+
+
+def _dot(derivatives: npy.ndarray, weights: npy.ndarray) -> npy.ndarray:
+    return npy.dot(
+        npy.asarray(derivatives, dtype=npy.float64),
+        npy.asarray(weights, dtype=npy.float64)
+    )
+
+
+def _is_single(value: Any) -> bool:
+    return getattr(value, "dtype", None) == npy.float32
+
+
+def _has_gradient(amplitude: NestedFunction) -> bool:
+    return callable(amplitude.gradient)
+
+
+def _use_autograd(amplitude: NestedFunction) -> bool:
+    return amplitude.USE_TORCH and TORCH_AVAIL and not _has_gradient(amplitude)
+
+
+def _as_tensors(kernel: Any, names: List[str]) -> Dict[str, Any]:
+    # The process lib sets the per event values as numpy arrays, which
+    # can't be combined with tensors that are part of autograd's graph.
+    return {
+        name: torch.as_tensor(getattr(kernel, name)) for name in names
+        if getattr(kernel, name) is not None
+    }
+
+
+def _autograd(
+        likelihood: Callable[[Any], torch.Tensor], parameters: Any
+) -> Tuple[float, npy.ndarray]:
+    # The parameters are turned into leaf tensors so that a single backward
+    # pass through the likelihood produces the gradient for all of them.
+    if isinstance(parameters, dict):
+        leaves = [
+            torch.tensor(float(value), dtype=torch.float64, requires_grad=True)
+            for value in parameters.values()
+        ]
+        tensors = dict(zip(parameters.keys(), leaves))
+    else:
+        tensors = torch.tensor(
+            npy.asarray(parameters, dtype=npy.float64), requires_grad=True
+        )
+        leaves = [tensors]
+
+    with torch.enable_grad():
+        value = likelihood(tensors)
+        value.backward()
+
+    gradient = [
+        torch.zeros_like(leaf) if leaf.grad is None else leaf.grad
+        for leaf in leaves
+    ]
+    return (
+        float(_to_numpy(value)),
+        npy.concatenate([_to_numpy(grad).ravel() for grad in gradient])
+    )
+
+
+_WHOLE = slice(None)
+
+
+class _Blocks:
+    """Sets up a copy of the amplitude for each block of the data
+
+    Evaluating one block at a time keeps the temporary arrays made by the
+    amplitude and the reductions small enough to stay in cache. Without a
+    block size, the amplitude is set up with all the data as one block.
+    """
+
+    def __init__(
+            self, amplitude: NestedFunction, data: Any,
+            block_size: Opt[int] = None
+    ):
+        if not block_size:
+            amplitude.setup(data)
+            self.__blocks = [(amplitude, _WHOLE)]
+            return
+
+        count = max(1, -(-_length(data) // block_size))
+        if isinstance(data, vectors.ParticlePool):
+            pieces = data.split(count)
+        else:
+            pieces = npy.array_split(data, count)
+
+        self.__blocks = []
+        start = 0
+        for piece in pieces:
+            block = copy.deepcopy(amplitude)
+            block.setup(piece)
+            stop = start + _length(piece)
+            self.__blocks.append((block, slice(start, stop)))
+            start = stop
+
+    def __iter__(self):
+        return iter(self.__blocks)
+
+    @property
+    def first(self) -> NestedFunction:
+        return self.__blocks[0][0]
+
+
+def _length(data: Any) -> int:
+    if isinstance(data, vectors.ParticlePool):
+        return data.event_count
+    return len(data)
+
+
+def _chunk_of(value: Any, bounds: slice) -> Any:
+    if bounds == _WHOLE:
+        return value
+    elif isinstance(value, pd.Series):
+        return value.to_numpy()[bounds]
+    elif isinstance(value, npy.ndarray):
+        return npy.asarray(value[bounds])
+    return value
+
+
+def _block_size(
+        amplitude: NestedFunction, chunk_size: Opt[int]
+) -> Opt[int]:
+    # Torch keeps the whole slice, so that autograd has a single graph
+    return None if amplitude.USE_TORCH else chunk_size
+
+
+class _LikelihoodKernel(process.Kernel, ABC):
+    """Kernel that evaluates either a single set or a batch of parameters
+
+    A batch is evaluated inside the process one set at a time, and the
+    results are sent back together as a single array. When a gradient is
+    requested, the value and the gradient are sent back as one array so
+    that they can be summed across processes like any other result.
+
+    Likelihoods that can be resampled name the per event weight that the
+    resampling multiplies in _RESAMPLED, and the per event values that can
+    be updated are in _UPDATABLE, along with the data they belong to.
+    """
+
+    _RESAMPLED: Opt[str] = None
+    _UPDATABLE: Dict[str, str] = {}
+
+    def process(self, data: Any = False) -> Union[float, npy.ndarray]:
+        if isinstance(data, _ParameterBatch):
+            return npy.array(
+                [self._evaluate(params) for params in data.parameters],
+                dtype=npy.float64
+            )
+        elif isinstance(data, _GradientRequest):
+            value, gradient = self._evaluate_gradient(data.parameters)
+            return npy.concatenate([[value], gradient])
+        elif isinstance(data, _GradientBatch):
+            results = [
+                self._evaluate_gradient(params) for params in data.parameters
+            ]
+            return npy.array([
+                npy.concatenate([[value], gradient])
+                for value, gradient in results
+            ], dtype=npy.float64)
+        elif isinstance(data, _EventCounts):
+            counts = npy.zeros(data.worker_count)
+            counts[self.PROCESS_ID] = _length(self.data)
+            return counts
+        elif isinstance(data, _Resample):
+            return self.__resample(data)
+        return self._evaluate(data)
+
+    def updated(self, names: List[str]):
+        # Resampling starts again from the new weight
+        if self._RESAMPLED in names and hasattr(self, "_original_weight"):
+            del self._original_weight
+
+    def __resample(self, request: _Resample) -> float:
+        # The original weight is kept so that replicas never compound
+        if not hasattr(self, "_original_weight"):
+            self._original_weight = getattr(self, self._RESAMPLED)
+
+        weights = request.weights(self.PROCESS_ID, _length(self.data))
+        if weights is None:
+            setattr(self, self._RESAMPLED, self._original_weight)
+            return npy.float64(_length(self.data))
+
+        setattr(self, self._RESAMPLED, self._original_weight * weights)
+        return npy.sum(weights)
+
+    @abstractmethod
+    def _evaluate(self, parameters: Any) -> float:
+        ...
+
+    @abstractmethod
+    def _evaluate_gradient(
+            self, parameters: Any
+    ) -> Tuple[float, npy.ndarray]:
+        ...
+
+
 class _LikelihoodInterface(process.Interface):
 
     def run(self, communicator: List[Any], *args: Any) -> Any:
@@ -201,11 +713,73 @@ class _LikelihoodInterface(process.Interface):
         return result
 
 
+class CacheInfo(NamedTuple):
+    """Statistics for a likelihood's cache, like functools.lru_cache"""
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def _cache_key(parameters: Any) -> Opt[Hashable]:
+    # Keys on the exact values, anything that can't be reduced to floats
+    # is never cached.
+    try:
+        if isinstance(parameters, dict):
+            return tuple(
+                (name, float(value)) for name, value in parameters.items()
+            )
+        return tuple(npy.asarray(parameters, dtype=npy.float64).ravel())
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_precision(value: Any, precision: npy.dtype) -> Any:
+    # Only double precision floats are converted, and memory mapped data
+    # is left alone since converting it would load it into memory.
+    if precision == npy.float64 or isinstance(value, npy.memmap):
+        return value
+
+    if isinstance(value, pd.DataFrame):
+        columns = value.select_dtypes(npy.float64).columns
+        return value.astype({column: precision for column in columns})
+    elif isinstance(value, (pd.Series, npy.ndarray)):
+        if value.dtype.names:
+            return value.astype([
+                (name, precision if value.dtype[name] == npy.float64
+                 else value.dtype[name])
+                for name in value.dtype.names
+            ])
+        elif value.dtype == npy.float64:
+            return value.astype(precision)
+    return value
+
+
 class _GeneralLikelihood:
 
-    def __init__(self, amplitude: NestedFunction, num_of_process: int):
+    def __init__(
+            self, amplitude: NestedFunction, num_of_process: int,
+            pool: Opt[process.WorkerPool] = None, cache_size: int = 0,
+            precision: Opt[type] = None
+    ):
         self._amplitude = amplitude
         self._num_of_processes = num_of_process
+        self._pool = pool
+
+        self._precision = npy.dtype(
+            amplitude.PRECISION if precision is None else precision
+        )
+        if self._precision not in (npy.float32, npy.float64):
+            raise ValueError(
+                f"Precision must be float32 or float64, not {precision}!"
+            )
+
+        # Least recently used results, oldest first
+        self.__cache: collections.OrderedDict = collections.OrderedDict()
+        self.__cache_size = max(cache_size, 0)
+        self.__hits = 0
+        self.__misses = 0
+        self.__event_counts: Opt[npy.ndarray] = None
 
         # Setup Single Process Mode
         no_parallel = not amplitude.USE_MP and not amplitude.USE_THREADS
@@ -217,13 +791,319 @@ class _GeneralLikelihood:
         # We could check that USE_TORCH and TORCH_AVAIL are both true, but
         # the amplitude would fail to import if it wasn't.
 
+    def __call__(self, parameters: Any) -> float:
+        key = self.__lookup(parameters)
+        if key in self.__cache:
+            return self.__cache[key]
+
+        value = self._interface.run(parameters)
+        self.__store(key, value)
+        return value
+
+    def evaluate_many(
+            self, parameters: Union[npy.ndarray, pd.DataFrame, List[Any]]
+    ) -> npy.ndarray:
+        """Evaluates the likelihood for many sets of parameters at once
+
+        All the sets of parameters are sent to each process in a single
+        message, so the cost of communicating with the processes is only
+        paid once for the entire batch instead of once for each set.
+
+        Parameters
+        ----------
+        parameters : 2D npy.ndarray, DataFrame, or List
+            Each row of the array, row of the DataFrame, or element of the
+            list is a single set of parameters. DataFrame rows are passed
+            to the amplitude as dictionaries, array rows are passed as
+            arrays.
+
+        Returns
+        -------
+        npy.ndarray
+            The likelihood for each set of parameters, in the same order
+            they were provided.
+        """
+        if isinstance(parameters, pd.DataFrame):
+            parameters = parameters.to_dict("records")
+
+        parameters = list(parameters)
+        if not len(parameters):
+            return npy.empty(0)
+
+        results = npy.empty(len(parameters), dtype=npy.float64)
+        keys = [self.__lookup(params) for params in parameters]
+        missing = [
+            index for index, key in enumerate(keys)
+            if key not in self.__cache
+        ]
+
+        for index, key in enumerate(keys):
+            if key in self.__cache:
+                results[index] = self.__cache[key]
+
+        if len(missing):
+            batch = _ParameterBatch([parameters[i] for i in missing])
+            results[missing] = self._interface.run(batch)
+            for index in missing:
+                self.__store(keys[index], results[index])
+
+        return results
+
+    def resample(
+            self, seed: Opt[Union[int, npy.random.SeedSequence]] = None,
+            method: str = "poisson"
+    ) -> float:
+        """Reweights the data events for a bootstrap replica
+
+        The weights are drawn inside each process and multiply the
+        likelihood's per event weight, the quality factor or sWeight, so
+        no data is sent to the processes. Each call replaces the weights
+        from the previous call.
+
+        Parameters
+        ----------
+        seed : int or numpy.random.SeedSequence, optional
+            Seed for the replica, the same seed reproduces the same
+            weights with the same number of processes.
+        method : str, optional
+            "poisson" gives each event a weight drawn from a Poisson
+            distribution with a mean of 1. "multinomial" draws exactly as
+            many events as there are, with replacement.
+
+        Returns
+        -------
+        float
+            The total weight of the resampled data events
+
+        Raises
+        ------
+        ValueError
+            If the method is unknown, or the likelihood has no per event
+            weight to resample.
+        """
+        if self.__resampled is None:
+            raise ValueError(f"{type(self).__name__} can not be resampled!")
+
+        sequence = seed
+        if not isinstance(sequence, npy.random.SeedSequence):
+            sequence = npy.random.SeedSequence(seed)
+        seeds = sequence.spawn(self._worker_count)
+
+        if method == "poisson":
+            counts = None
+        elif method == "multinomial":
+            if self.__event_counts is None:
+                self.__event_counts = self._interface.run(
+                    _EventCounts(self._worker_count)
+                )
+            total = int(npy.sum(self.__event_counts))
+            counts = npy.random.default_rng(sequence).multinomial(
+                total, self.__event_counts / max(total, 1)
+            )
+        else:
+            raise ValueError(f"Unknown resampling method {method!r}")
+
+        self.__cache.clear()
+        return self._interface.run(_Resample(seeds, counts))
+
+    def reset_weights(self):
+        """Restores the original weights after resample"""
+        if self.__resampled is None:
+            raise ValueError(f"{type(self).__name__} can not be resampled!")
+
+        self.__cache.clear()
+        self._interface.run(_Resample())
+
+    def update(self, **values: Union[npy.ndarray, pd.Series, float]):
+        """Replaces per event values in the running processes
+
+        Only the new values are sent, each process receiving its own
+        slice of them, through shared memory when the amplitude uses
+        shared memory. The processes, data, and amplitudes are left as
+        they are, so the weights can be changed between fits without
+        creating a new likelihood. Replacing a weight that has been
+        resampled also discards the resampling.
+
+        Parameters
+        ----------
+        values : ndarray, Series, or float
+            The new values by name, such as quality_factor, binned,
+            sweight, or mcweight. Arrays must be the same length as the
+            data they belong to.
+
+        Raises
+        ------
+        ValueError
+            If the likelihood doesn't use one of the values, or an array
+            is the wrong length.
+
+        Examples
+        --------
+        >>> with LogLikelihood(amplitude, data, quality_factor=qf) as like:
+        ...     minuit(settings, like).migrad()
+        ...     like.update(quality_factor=new_qf)
+        ...     minuit(settings, like).migrad()
+        """
+        for name, value in list(values.items()):
+            if name not in self.__updatable:
+                raise ValueError(
+                    f"{type(self).__name__} can not update {name!r}!"
+                )
+
+            if isinstance(value, (list, tuple)):
+                value = values[name] = npy.asarray(value)
+
+            length = self.__lengths.get(self.__updatable[name])
+            if npy.ndim(value) and length not in (None, _length(value)):
+                raise ValueError(
+                    f"{name} has {_length(value)} events instead of {length}!"
+                )
+
+        values = {
+            name: _to_precision(value, self._precision)
+            for name, value in values.items()
+        }
+
+        self.__cache.clear()
+        if self._single_process:
+            [setattr(self._interface, n, v) for n, v in values.items()]
+            self._interface.updated(list(values.keys()))
+        else:
+            self._interface.update(
+                values, self._amplitude.USE_SHARED_MEMORY and
+                not self._amplitude.USE_THREADS
+            )
+
+    def cache_info(self) -> CacheInfo:
+        """Returns the hits and misses of the likelihood's cache
+
+        The cache is only used when the likelihood was created with a
+        cache_size greater than 0.
+        """
+        return CacheInfo(
+            self.__hits, self.__misses, self.__cache_size, len(self.__cache)
+        )
+
+    def cache_clear(self):
+        """Empties the likelihood's cache and resets its statistics"""
+        self.__cache.clear()
+        self.__hits = self.__misses = 0
+
+    def __lookup(self, parameters: Any) -> Opt[Hashable]:
+        if not self.__cache_size:
+            return None
+
+        key = _cache_key(parameters)
+        if key is None:
+            return None
+
+        if key in self.__cache:
+            self.__cache.move_to_end(key)
+            self.__hits += 1
+        else:
+            self.__misses += 1
+        return key
+
+    def __store(self, key: Opt[Hashable], value: float):
+        if key is None:
+            return
+
+        self.__cache[key] = value
+        if len(self.__cache) > self.__cache_size:
+            self.__cache.popitem(last=False)
+
+    @property
+    def has_gradient(self) -> bool:
+        """True if the amplitude defines its own gradient, or if the
+        gradient can be calculated with PyTorch's autograd"""
+        amplitude = self._amplitude
+        return _has_gradient(amplitude) or _use_autograd(amplitude)
+
+    def value_and_gradient(self, parameters: Any) -> Tuple[float, npy.ndarray]:
+        """Calculates the likelihood along with its gradient
+
+        The gradient is reduced inside each process from the per event
+        derivatives returned by the amplitude's gradient method, or by
+        PyTorch's autograd when USE_TORCH is set and the amplitude has no
+        gradient method. Either way this costs a single round trip to
+        the processes.
+
+        Parameters
+        ----------
+        parameters : Dict[str, float] or npy.ndarray
+            The parameters to pass to the amplitude
+
+        Returns
+        -------
+        Tuple[float, npy.ndarray]
+            The likelihood, and its derivative with respect to each
+            parameter in the same order as the amplitude's gradient.
+        """
+        result = self._interface.run(_GradientRequest(parameters))
+        if self.__cache_size:
+            self.__store(_cache_key(parameters), result[0])
+        return result[0], result[1:]
+
+    def gradient(self, parameters: Any) -> npy.ndarray:
+        """Calculates only the gradient of the likelihood
+
+        See Also
+        --------
+        value_and_gradient : For the likelihood along with its gradient
+        """
+        return self.value_and_gradient(parameters)[1]
+
+    def gradient_many(self, parameters: List[Any]) -> npy.ndarray:
+        """Calculates the gradient for many sets of parameters at once
+
+        Like evaluate_many, every set is sent to each process in a
+        single message, so the whole batch costs one round trip to the
+        processes.
+
+        Parameters
+        ----------
+        parameters : List[Dict[str, float] or npy.ndarray]
+            Each element of the list is a single set of parameters
+
+        Returns
+        -------
+        npy.ndarray
+            A row with the gradient for each set of parameters, in the
+            same order they were provided.
+
+        See Also
+        --------
+        value_and_gradient : For a single set of parameters
+        """
+        parameters = list(parameters)
+        if not len(parameters):
+            return npy.empty((0, 0))
+
+        results = self._interface.run(_GradientBatch(parameters))
+        if self.__cache_size:
+            for params, value in zip(parameters, results[:, 0]):
+                self.__store(_cache_key(params), value)
+        return results[:, 1:]
+
     def _setup_interface(
             self, likelihood_data: Dict[str, Any], kernel: process.Kernel
     ):
+        likelihood_data = {
+            name: _to_precision(value, self._precision)
+            for name, value in likelihood_data.items()
+        }
+        self.__resampled = kernel._RESAMPLED
+        self.__updatable = kernel._UPDATABLE
+        self.__lengths = {
+            name: _length(likelihood_data[name])
+            for name in ("data", "monte_carlo") if name in likelihood_data
+        }
+
         if self._single_process:
             [setattr(kernel, n, v) for n, v in likelihood_data.items()]
             kernel.setup()
             self._interface = kernel
+            self._worker_count = 1
 
         elif self._amplitude.USE_THREADS:
             interface = _LikelihoodInterface()
@@ -231,12 +1111,23 @@ class _GeneralLikelihood:
                 likelihood_data, kernel, interface, self._num_of_processes,
                 use_threads=True
             )
+            self._worker_count = self._num_of_processes
+
+        elif self._pool is not None:
+            interface = _LikelihoodInterface()
+            self._interface = self._pool.attach(
+                likelihood_data, kernel, interface,
+                use_shared_memory=self._amplitude.USE_SHARED_MEMORY
+            )
+            self._worker_count = len(self._pool)
 
         else:
             interface = _LikelihoodInterface()
             self._interface = process.make_processes(
-                likelihood_data, kernel, interface, self._num_of_processes
+                likelihood_data, kernel, interface, self._num_of_processes,
+                use_shared_memory=self._amplitude.USE_SHARED_MEMORY
             )
+            self._worker_count = self._num_of_processes
 
 
 class ChiSquared(_GeneralLikelihood):
@@ -269,6 +1160,24 @@ class ChiSquared(_GeneralLikelihood):
         to the number of threads available on the machine. If USE_MP is
         set to false or this is set to zero, no extra processes will
         be spawned
+    pool : process.WorkerPool, optional
+        A running WorkerPool to load the likelihood into instead of
+        spawning new processes. When provided, num_of_processes is
+        ignored, and closing the likelihood leaves the pool running.
+    cache_size : int, optional
+        How many of the most recently used results to keep, so that
+        repeated sets of parameters are answered without the processes.
+        Defaults to 0, which disables the cache.
+    chunk_size : int, optional
+        When provided, each process sets up a copy of the amplitude for
+        every chunk_size events of its data, and the likelihood is summed
+        one chunk at a time. A chunk of a few thousand events keeps the
+        temporary arrays inside the CPU cache and lowers peak memory.
+        Disabled by default, and ignored when USE_TORCH is set.
+    precision : numpy.float32 or numpy.float64, optional
+        The precision the event data is stored in for the processes,
+        defaults to the amplitude's PRECISION. Sums are always accumulated
+        in double precision.
 
     Raises
     ------
@@ -299,16 +1208,22 @@ class ChiSquared(_GeneralLikelihood):
             expected_values: Opt[Union[npy.ndarray, pd.Series]] = None,
             is_minimizer: Opt[bool] = True,
             num_of_processes=multiprocessing.cpu_count(),
+            pool: Opt[process.WorkerPool] = None,
+            cache_size: int = 0,
+            chunk_size: Opt[int] = None,
+            precision: Opt[type] = None
     ):
 
-        super(ChiSquared, self).__init__(amplitude, num_of_processes)
+        super(ChiSquared, self).__init__(
+            amplitude, num_of_processes, pool, cache_size, precision
+        )
         multiplier = 1 if is_minimizer else -1
 
         likelihood_data = self.__prep_data(
             data, binned, event_errors, expected_values
         )
 
-        kernel = _ChiSquaredKernel(multiplier, amplitude)
+        kernel = _ChiSquaredKernel(multiplier, amplitude, chunk_size)
         self._setup_interface(likelihood_data, kernel)
 
     @staticmethod
@@ -339,9 +1254,6 @@ class ChiSquared(_GeneralLikelihood):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def __call__(self, *args):
-        return self._interface.run(*args)
-
     def close(self):
         """Closes the likelihood
         This needs to be called after you're done with the likelihood,
@@ -350,12 +1262,20 @@ class ChiSquared(_GeneralLikelihood):
         self._interface.close()
 
 
-class _ChiSquaredKernel(process.Kernel):
+class _ChiSquaredKernel(_LikelihoodKernel):
+
+    _UPDATABLE = {
+        "binned": "data", "event_errors": "data", "expected_values": "data"
+    }
 
-    def __init__(self, multiplier: int, amplitude: NestedFunction):
+    def __init__(
+            self, multiplier: int, amplitude: NestedFunction,
+            chunk_size: Opt[int] = None
+    ):
         super(_ChiSquaredKernel, self).__init__()
         self.__multiplier = multiplier
         self.__amplitude = amplitude
+        self.__chunk_size = chunk_size
 
         # These are set by the process lib
         self.data: npy.ndarray = None
@@ -363,50 +1283,107 @@ class _ChiSquaredKernel(process.Kernel):
         self.event_errors: npy.ndarray = None
         self.expected_values: npy.ndarray = None
 
-        # This is set at run time, after data has been loaded
+        # These are set at run time, after data has been loaded
         self.__likelihood: Callable[[npy.ndarray], npy.float] = None
+        self.__blocks: Opt[_Blocks] = None
+        self.__tensors: Dict[str, torch.Tensor] = {}
 
     def setup(self):
         self.__amplitude.THREAD = self.PROCESS_ID
-        self.__amplitude.setup(self.data)
+        self.__blocks = _Blocks(
+            self.__amplitude, self.data,
+            _block_size(self.__amplitude, self.__chunk_size)
+        )
+        self.__select_likelihood()
+
+    def updated(self, names: List[str]):
+        super(_ChiSquaredKernel, self).updated(names)
+        self.__select_likelihood()
+
+    def __select_likelihood(self):
+        if self.__amplitude.USE_TORCH and TORCH_AVAIL:
+            self.__tensors = _as_tensors(self, list(self._UPDATABLE))
 
         if self.binned is not None:
             self.__likelihood = self.__binned
+            self.__tensor_likelihood = self.__binned_tensor
             if self.__amplitude.USE_TORCH:
                 self.__likelihood = self.__binned_with_torch
         else:
             self.__likelihood = self.__expected_errors
+            self.__tensor_likelihood = self.__expected_errors_tensor
             if self.__amplitude.USE_TORCH:
                 self.__likelihood = self.__expected_errors_with_torch
 
-    def process(self, data: Any = False) -> float:
-        intensity = self.__amplitude.calculate(data)
-        return self.__multiplier * self.__likelihood(intensity)
+    def _evaluate(self, parameters: Any) -> float:
+        likelihood = 0.
+        for amplitude, bounds in self.__blocks:
+            intensity = amplitude.calculate(parameters)
+            likelihood += self.__likelihood(intensity, bounds)
+        return self.__multiplier * likelihood
 
-    def __binned(self, results):
-        return ne.evaluate(
-            "sum(((results - binned)**2)/binned)", local_dict={
-                "results": results, "binned": self.binned
+    def _evaluate_gradient(
+            self, parameters: Any
+    ) -> Tuple[float, npy.ndarray]:
+        if _use_autograd(self.__amplitude):
+            return _autograd(self.__autograd_likelihood, parameters)
+
+        if self.binned is not None:
+            expected, errors = self.binned, self.binned
+        else:
+            expected, errors = self.expected_values, self.event_errors
+
+        value, gradient = 0., 0.
+        for amplitude, bounds in self.__blocks:
+            results = _to_numpy(amplitude.calculate(parameters))
+            derivatives = _to_numpy(amplitude.gradient(parameters))
+            local_dict = {
+                "results": results, "expected": _chunk_of(expected, bounds),
+                "errors": _chunk_of(errors, bounds)
+            }
+
+            residual = ne.evaluate("(results - expected)/errors", local_dict)
+            value += _sum("residual * (results - expected)", {
+                "residual": residual, **local_dict
+            })
+            gradient += 2 * _dot(derivatives, residual)
+
+        return self.__multiplier * value, self.__multiplier * gradient
+
+    def __autograd_likelihood(self, parameters: Any) -> torch.Tensor:
+        intensity = self.__amplitude.calculate(parameters)
+        return self.__multiplier * self.__tensor_likelihood(intensity)
+
+    def __binned(self, results, bounds=_WHOLE):
+        return _sum(
+            "((results - binned)**2)/binned", local_dict={
+                "results": results, "binned": _chunk_of(self.binned, bounds)
             }
         )
 
-    def __binned_with_torch(self, results):
-        return torch.sum(
-            (results - self.binned)**2/self.binned
-        ).cpu().detach().numpy()
+    def __binned_with_torch(self, results, bounds=_WHOLE):
+        return _to_numpy(self.__binned_tensor(results))
+
+    def __binned_tensor(self, results):
+        binned = self.__tensors["binned"]
+        return torch.sum((results - binned)**2/binned)
 
-    def __expected_errors(self, results):
-        return ne.evaluate(
-            "sum(((results - expected)**2)/errors)", local_dict={
-                "results": results, "expected": self.expected_values,
-                "errors": self.event_errors
+    def __expected_errors(self, results, bounds=_WHOLE):
+        return _sum(
+            "((results - expected)**2)/errors", local_dict={
+                "results": results,
+                "expected": _chunk_of(self.expected_values, bounds),
+                "errors": _chunk_of(self.event_errors, bounds)
             }
         )
 
-    def __expected_errors_with_torch(self, results):
-        return torch.sum(
-            (results - self.expected_values)**2/self.event_errors
-        ).cpu().detach().numpy()
+    def __expected_errors_with_torch(self, results, bounds=_WHOLE):
+        return _to_numpy(self.__expected_errors_tensor(results))
+
+    def __expected_errors_tensor(self, results):
+        expected = self.__tensors["expected_values"]
+        errors = self.__tensors["event_errors"]
+        return torch.sum((results - expected)**2/errors)
 
 
 class LogLikelihood(_GeneralLikelihood):
@@ -442,6 +1419,24 @@ class LogLikelihood(_GeneralLikelihood):
         to the number of threads available on the machine. If USE_MP is
         set to false or this is set to zero, no extra processes will
         be spawned
+    pool : process.WorkerPool, optional
+        A running WorkerPool to load the likelihood into instead of
+        spawning new processes. When provided, num_of_processes is
+        ignored, and closing the likelihood leaves the pool running.
+    cache_size : int, optional
+        How many of the most recently used results to keep, so that
+        repeated sets of parameters are answered without the processes.
+        Defaults to 0, which disables the cache.
+    chunk_size : int, optional
+        When provided, each process sets up a copy of the amplitude for
+        every chunk_size events of its data, and the likelihood is summed
+        one chunk at a time. A chunk of a few thousand events keeps the
+        temporary arrays inside the CPU cache and lowers peak memory.
+        Disabled by default, and ignored when USE_TORCH is set.
+    precision : numpy.float32 or numpy.float64, optional
+        The precision the event data is stored in for the processes,
+        defaults to the amplitude's PRECISION. Sums are always accumulated
+        in double precision.
 
     Notes
     -----
@@ -471,14 +1466,22 @@ class LogLikelihood(_GeneralLikelihood):
             generated_length: Opt[int] = 1,
             is_minimizer: Opt[bool] = True,
             num_of_processes=multiprocessing.cpu_count(),
+            pool: Opt[process.WorkerPool] = None,
+            cache_size: int = 0,
+            chunk_size: Opt[int] = None,
+            precision: Opt[type] = None
     ):
-        super(LogLikelihood, self).__init__(amplitude, num_of_processes)
+        super(LogLikelihood, self).__init__(
+            amplitude, num_of_processes, pool, cache_size, precision
+        )
         multiplier = -1 if is_minimizer else 1
 
         if monte_carlo is not None and generated_length == 1:
             generated_length = len(monte_carlo)
 
-        kernel = _LogLikelihoodKernel(multiplier, amplitude, generated_length)
+        kernel = _LogLikelihoodKernel(
+            multiplier, amplitude, generated_length, chunk_size
+        )
         likelihood_data = self.__prep_data(
             data, monte_carlo, binned, quality_factor
         )
@@ -501,9 +1504,6 @@ class LogLikelihood(_GeneralLikelihood):
             likelihood_data["quality_factor"] = quality_factor
         return likelihood_data
 
-    def __call__(self, *args):
-        return self._interface.run(*args)
-
     def __enter__(self):
         return self
 
@@ -518,17 +1518,21 @@ class LogLikelihood(_GeneralLikelihood):
         self._interface.close()
 
 
-class _LogLikelihoodKernel(process.Kernel):
+class _LogLikelihoodKernel(_LikelihoodKernel):
+
+    _RESAMPLED = "quality_factor"
+    _UPDATABLE = {"binned": "data", "quality_factor": "data"}
 
     def __init__(
             self, multiplier: int, amplitude: NestedFunction,
-            generated_length=Opt[int]
+            generated_length=Opt[int], chunk_size: Opt[int] = None
     ):
         super(_LogLikelihoodKernel, self).__init__()
         self.__multiplier = multiplier
         self.__data_amplitude = amplitude
         self.__monte_carlo_amplitude = copy.deepcopy(amplitude)
         self.__generated = 1/generated_length
+        self.__chunk_size = chunk_size
 
         # These are set by the process lib
         self.data: npy.ndarray = None
@@ -536,64 +1540,146 @@ class _LogLikelihoodKernel(process.Kernel):
         self.binned: Union[npy.ndarray, float] = 1
         self.quality_factor: Union[npy.ndarray, float] = 1
 
-        # This is set at run time, after data has been loaded
+        # These are set at run time, after data has been loaded
         self.__likelihood: Callable[[npy.ndarray], npy.float] = None
+        self.__integrals: Opt[npy.ndarray] = None
+        self.__data_blocks: Opt[_Blocks] = None
+        self.__monte_carlo_blocks: Opt[_Blocks] = None
+        self.__tensors: Dict[str, torch.Tensor] = {}
 
     def setup(self):
+        block_size = _block_size(self.__data_amplitude, self.__chunk_size)
         self.__data_amplitude.THREAD = self.PROCESS_ID
-        self.__data_amplitude.setup(self.data)
+        self.__data_blocks = _Blocks(
+            self.__data_amplitude, self.data, block_size
+        )
 
         if self.monte_carlo is not None and self.__generated is not None:
             self.__monte_carlo_amplitude.THREAD = self.PROCESS_ID
-            self.__monte_carlo_amplitude.setup(self.monte_carlo)
+            self.__monte_carlo_blocks = _Blocks(
+                self.__monte_carlo_amplitude, self.monte_carlo, block_size
+            )
             self.__likelihood = self.__extended_likelihood
+            self.__tensor_likelihood = self.__extended_likelihood_tensor
+            if _use_integrals(self.__monte_carlo_amplitude):
+                self.__integrals = sum(
+                    amplitude.integrals()
+                    for amplitude, _ in self.__monte_carlo_blocks
+                )
+                self.__likelihood = self.__extended_likelihood_with_integrals
             if self.__data_amplitude.USE_TORCH:
                 self.__likelihood = self.__extended_likelihood_with_torch
         else:
             self.__likelihood = self.__log_likelihood
+            self.__tensor_likelihood = self.__log_likelihood_tensor
             if self.__data_amplitude.USE_TORCH:
                 self.__likelihood = self.__log_likelihood_with_torch
+        self.__convert_weights()
+
+    def updated(self, names: List[str]):
+        super(_LogLikelihoodKernel, self).updated(names)
+        self.__convert_weights()
+
+    def __convert_weights(self):
+        if self.__data_amplitude.USE_TORCH and TORCH_AVAIL:
+            self.__tensors = _as_tensors(self, list(self._UPDATABLE))
+
+    def _evaluate(self, parameters: Any) -> float:
+        return self.__multiplier * self.__likelihood(parameters)
+
+    def _evaluate_gradient(
+            self, parameters: Any
+    ) -> Tuple[float, npy.ndarray]:
+        if _use_autograd(self.__data_amplitude):
+            return _autograd(self.__autograd_likelihood, parameters)
+
+        # Binned isn't used with the extended likelihood
+        extended = self.__monte_carlo_blocks is not None
+        weight = "qf" if extended else "qf*binned"
+
+        value, gradient = 0., 0.
+        for amplitude, bounds in self.__data_blocks:
+            data = _to_numpy(amplitude.calculate(parameters))
+            derivatives = _to_numpy(amplitude.gradient(parameters))
+            local_dict = {
+                "qf": _chunk_of(self.quality_factor, bounds),
+                "binned": _chunk_of(self.binned, bounds), "data": data
+            }
+            value += _sum(f"{weight}*log(data)", local_dict)
+            weights = ne.evaluate(f"{weight}/data", local_dict)
+            gradient += _dot(derivatives, weights)
+
+        if extended:
+            for amplitude, _ in self.__monte_carlo_blocks:
+                monte_carlo = _to_numpy(amplitude.calculate(parameters))
+                mc_derivatives = _to_numpy(amplitude.gradient(parameters))
+                value -= self.__generated * _total(monte_carlo)
+                gradient -= self.__generated * _total(mc_derivatives, axis=1)
 
-    def process(self, data: Any = False) -> float:
-        return self.__multiplier * self.__likelihood(data)
+        return self.__multiplier * value, self.__multiplier * gradient
+
+    def __autograd_likelihood(self, parameters: Any) -> torch.Tensor:
+        return self.__multiplier * self.__tensor_likelihood(parameters)
 
     def __extended_likelihood(self, params):
-        data = self.__data_amplitude.calculate(params)
-        monte_carlo = self.__monte_carlo_amplitude.calculate(params)
+        likelihood = self.__data_likelihood(params)
 
-        likelihood = ne.evaluate(
-            "sum(qf * log(data))", local_dict={
-                "qf": self.quality_factor, "data": data
-            }
-        )
-        monte_carlo_sum = npy.sum(monte_carlo)
+        monte_carlo_sum = 0.
+        for amplitude, _ in self.__monte_carlo_blocks:
+            monte_carlo_sum += _total(amplitude.calculate(params))
 
         return likelihood - self.__generated * monte_carlo_sum
 
+    def __extended_likelihood_with_integrals(self, params):
+        monte_carlo_sum = self.__monte_carlo_blocks.first.normalization(
+            self.__integrals, params
+        )
+        likelihood = self.__data_likelihood(params)
+        return likelihood - self.__generated * monte_carlo_sum
+
+    def __data_likelihood(self, params):
+        likelihood = 0.
+        for amplitude, bounds in self.__data_blocks:
+            likelihood += _sum(
+                "qf * log(data)", local_dict={
+                    "qf": _chunk_of(self.quality_factor, bounds),
+                    "data": amplitude.calculate(params)
+                }
+            )
+        return likelihood
+
     def __extended_likelihood_with_torch(self, params):
+        return _to_numpy(self.__extended_likelihood_tensor(params))
+
+    def __extended_likelihood_tensor(self, params):
         data = self.__data_amplitude.calculate(params)
         monte_carlo = self.__monte_carlo_amplitude.calculate(params)
 
-        likelihood = torch.sum(self.quality_factor * torch.log(data))
+        quality_factor = self.__tensors["quality_factor"]
+        likelihood = torch.sum(quality_factor * torch.log(data))
         monte_carlo_sum = torch.sum(monte_carlo)
 
-        return (
-                likelihood - self.__generated * monte_carlo_sum
-        ).cpu().detach().numpy()
+        return likelihood - self.__generated * monte_carlo_sum
 
     def __log_likelihood(self, params):
-        data = self.__data_amplitude.calculate(params)
-        return ne.evaluate(
-            "sum(qf*binned*log(data))", local_dict={
-                "qf": self.quality_factor, "binned": self.binned, "data": data
-            }
-        )
+        likelihood = 0.
+        for amplitude, bounds in self.__data_blocks:
+            likelihood += _sum(
+                "qf*binned*log(data)", local_dict={
+                    "qf": _chunk_of(self.quality_factor, bounds),
+                    "binned": _chunk_of(self.binned, bounds),
+                    "data": amplitude.calculate(params)
+                }
+            )
+        return likelihood
 
     def __log_likelihood_with_torch(self, params):
+        return _to_numpy(self.__log_likelihood_tensor(params))
+
+    def __log_likelihood_tensor(self, params):
         data = self.__data_amplitude.calculate(params)
-        return torch.sum(
-            self.quality_factor * self.binned * torch.log(data)
-        ).cpu().detach().numpy()
+        weights = self.__tensors["quality_factor"] * self.__tensors["binned"]
+        return torch.sum(weights * torch.log(data))
 
 
 class EmptyLikelihood(_GeneralLikelihood):
@@ -614,6 +1700,24 @@ class EmptyLikelihood(_GeneralLikelihood):
         to the number of threads available on the machine. If USE_MP is
         set to false or this is set to zero, no extra processes will
         be spawned
+    pool : process.WorkerPool, optional
+        A running WorkerPool to load the likelihood into instead of
+        spawning new processes. When provided, num_of_processes is
+        ignored, and closing the likelihood leaves the pool running.
+    cache_size : int, optional
+        How many of the most recently used results to keep, so that
+        repeated sets of parameters are answered without the processes.
+        Defaults to 0, which disables the cache.
+    chunk_size : int, optional
+        When provided, each process sets up a copy of the amplitude for
+        every chunk_size events of its data, and the likelihood is summed
+        one chunk at a time. A chunk of a few thousand events keeps the
+        temporary arrays inside the CPU cache and lowers peak memory.
+        Disabled by default, and ignored when USE_TORCH is set.
+    precision : numpy.float32 or numpy.float64, optional
+        The precision the event data is stored in for the processes,
+        defaults to the amplitude's PRECISION. Sums are always accumulated
+        in double precision.
     """
 
     TYPE = LikelihoodType.OTHER
@@ -621,15 +1725,18 @@ class EmptyLikelihood(_GeneralLikelihood):
     def __init__(
             self, amplitude: NestedFunction,
             data: Union[npy.ndarray, pd.DataFrame],
-            num_of_processes=multiprocessing.cpu_count()
+            num_of_processes=multiprocessing.cpu_count(),
+            pool: Opt[process.WorkerPool] = None,
+            cache_size: int = 0,
+            chunk_size: Opt[int] = None,
+            precision: Opt[type] = None
     ):
-        super(EmptyLikelihood, self).__init__(amplitude, num_of_processes)
-        kernel = _EmptyKernel(amplitude)
+        super(EmptyLikelihood, self).__init__(
+            amplitude, num_of_processes, pool, cache_size, precision
+        )
+        kernel = _EmptyKernel(amplitude, chunk_size)
         self._setup_interface({"data": data}, kernel)
 
-    def __call__(self, *args):
-        return self._interface.run(*args)
-
     def __enter__(self):
         return self
 
@@ -644,33 +1751,60 @@ class EmptyLikelihood(_GeneralLikelihood):
         self._interface.close()
 
 
-class _EmptyKernel(process.Kernel):
+class _EmptyKernel(_LikelihoodKernel):
 
-    def __init__(self, amplitude: NestedFunction):
+    def __init__(
+            self, amplitude: NestedFunction, chunk_size: Opt[int] = None
+    ):
         super(_EmptyKernel, self).__init__()
         self.__amplitude = amplitude
+        self.__chunk_size = chunk_size
 
         # These are set by the process lib
         self.data: npy.ndarray = None
 
+        # This is set at run time, after data has been loaded
+        self.__blocks: Opt[_Blocks] = None
+
     def setup(self):
         self.__amplitude.THREAD = self.PROCESS_ID
-        self.__amplitude.setup(self.data)
+        self.__blocks = _Blocks(
+            self.__amplitude, self.data,
+            _block_size(self.__amplitude, self.__chunk_size)
+        )
 
-        self.process = self._process_numpy
+        self._evaluate = self._process_numpy
         if self.__amplitude.USE_TORCH:
-            self.process = self._process_with_torch
+            self._evaluate = self._process_with_torch
 
-    def process(self, data: Any = False) -> float:
+    def _evaluate(self, parameters: Any) -> float:
         raise RuntimeError("Call the setup first!")
 
+    def _evaluate_gradient(
+            self, parameters: Any
+    ) -> Tuple[float, npy.ndarray]:
+        if _use_autograd(self.__amplitude):
+            return _autograd(self.__tensor_sum, parameters)
+
+        value, gradient = 0., 0.
+        for amplitude, _ in self.__blocks:
+            results = _to_numpy(amplitude.calculate(parameters))
+            derivatives = _to_numpy(amplitude.gradient(parameters))
+            value += _total(results)
+            gradient += _total(derivatives, axis=1)
+        return value, gradient
+
+    def __tensor_sum(self, parameters: Any) -> torch.Tensor:
+        return torch.sum(self.__amplitude.calculate(parameters))
+
     def _process_numpy(self, data: Any) -> float:
-        return npy.sum(self.__amplitude.calculate(data))  # type: ignore
+        total = 0.
+        for amplitude, _ in self.__blocks:
+            total += _total(amplitude.calculate(data))  # type: ignore
+        return total
 
     def _process_with_torch(self, data: Any) -> float:
-        return torch.sum(
-            self.__amplitude.calculate(data)
-        ).cpu().detach().numpy()
+        return _to_numpy(self.__tensor_sum(data))
 
 
 class sweightedLogLikelihood(_GeneralLikelihood):
@@ -703,6 +1837,18 @@ class sweightedLogLikelihood(_GeneralLikelihood):
         to the number of threads available on the machine. If USE_MP is
         set to false or this is set to zero, no extra processes will
         be spawned
+    pool : process.WorkerPool, optional
+        A running WorkerPool to load the likelihood into instead of
+        spawning new processes. When provided, num_of_processes is
+        ignored, and closing the likelihood leaves the pool running.
+    cache_size : int, optional
+        How many of the most recently used results to keep, so that
+        repeated sets of parameters are answered without the processes.
+        Defaults to 0, which disables the cache.
+    precision : numpy.float32 or numpy.float64, optional
+        The precision the event data is stored in for the processes,
+        defaults to the amplitude's PRECISION. Sums are always accumulated
+        in double precision.
     Notes
     -----
     Extended Log-Likelihood. If not provided, the sW will be set to 1,
@@ -723,9 +1869,12 @@ class sweightedLogLikelihood(_GeneralLikelihood):
             generated_length: Opt[int] = 1,
             multiplier: Opt[float] = -1,
             num_of_processes=multiprocessing.cpu_count(),
+            pool: Opt[process.WorkerPool] = None,
+            cache_size: int = 0,
+            precision: Opt[type] = None
     ):
         super(sweightedLogLikelihood, self).__init__(
-            amplitude, num_of_processes
+            amplitude, num_of_processes, pool, cache_size, precision
         )
 
         if monte_carlo is not None and generated_length == 1:
@@ -756,9 +1905,6 @@ class sweightedLogLikelihood(_GeneralLikelihood):
             likelihood_data["mcweight"] = mcweight
         return likelihood_data
 
-    def __call__(self, *args):
-        return self._interface.run(*args)
-
     def __enter__(self):
         return self
 
@@ -773,7 +1919,10 @@ class sweightedLogLikelihood(_GeneralLikelihood):
         self._interface.close()
 
 
-class _sweightedLogLikelihoodKernel(process.Kernel):
+class _sweightedLogLikelihoodKernel(_LikelihoodKernel):
+
+    _RESAMPLED = "sweight"
+    _UPDATABLE = {"sweight": "data", "mcweight": "monte_carlo"}
 
     def __init__(
             self, multiplier: float, amplitude: NestedFunction,
@@ -791,8 +1940,10 @@ class _sweightedLogLikelihoodKernel(process.Kernel):
         self.sweight: Union[npy.ndarray, float] = 1
         self.mcweight: Union[npy.ndarray, float] = 1
 
-        # This is set at run time, after data has been loaded
+        # These are set at run time, after data has been loaded
         self.__likelihood: Callable[[npy.ndarray], npy.float] = None
+        self.__integrals: Opt[npy.ndarray] = None
+        self.__tensors: Dict[str, torch.Tensor] = {}
 
     def setup(self):
         self.__data_amplitude.THREAD = self.PROCESS_ID
@@ -802,37 +1953,443 @@ class _sweightedLogLikelihoodKernel(process.Kernel):
             self.__monte_carlo_amplitude.TREAD = self.PROCESS_ID
             self.__monte_carlo_amplitude.setup(self.monte_carlo)
             self.__likelihood = self.__extended_likelihood
+            if _use_integrals(self.__monte_carlo_amplitude):
+                self.__integrals = self.__monte_carlo_amplitude.integrals(
+                    self.mcweight
+                )
+                self.__likelihood = self.__extended_likelihood_with_integrals
             if self.__data_amplitude.USE_TORCH:
                 self.__likelihood = self.__extended_likelihood_with_torch
         except:
             print("Couldn't setup sweightedLogLikelihood")
+        self.__convert_weights()
 
-    def process(self, data: Any = False) -> float:
-        return self.__multiplier * self.__likelihood(data)
+    def updated(self, names: List[str]):
+        super(_sweightedLogLikelihoodKernel, self).updated(names)
+        if "mcweight" in names and self.__integrals is not None:
+            self.__integrals = self.__monte_carlo_amplitude.integrals(
+                self.mcweight
+            )
+        self.__convert_weights()
+
+    def __convert_weights(self):
+        if self.__data_amplitude.USE_TORCH and TORCH_AVAIL:
+            self.__tensors = _as_tensors(self, list(self._UPDATABLE))
+
+    def _evaluate(self, parameters: Any) -> float:
+        return self.__multiplier * self.__likelihood(parameters)
+
+    def _evaluate_gradient(
+            self, parameters: Any
+    ) -> Tuple[float, npy.ndarray]:
+        if _use_autograd(self.__data_amplitude):
+            return _autograd(self.__autograd_likelihood, parameters)
+
+        data = _to_numpy(self.__data_amplitude.calculate(parameters))
+        derivatives = _to_numpy(self.__data_amplitude.gradient(parameters))
+
+        mc_amplitude = self.__monte_carlo_amplitude
+        mcdata = _to_numpy(mc_amplitude.calculate(parameters))
+        mc_derivatives = _to_numpy(mc_amplitude.gradient(parameters))
+
+        local_dict = {
+            "sw": self.sweight, "data": data,
+            "mcw": self.mcweight, "mcdata": mcdata
+        }
+        value = _sum("sw * log(data)", local_dict)
+        mc_value = _sum("mcw * mcdata", local_dict)
+        value -= self.__generated * mc_value
+
+        weights = ne.evaluate("sw / data", local_dict)
+        mc_weights = npy.broadcast_to(self.mcweight, mcdata.shape)
+        gradient = _dot(derivatives, weights)
+        gradient -= self.__generated * _dot(mc_derivatives, mc_weights)
+
+        return self.__multiplier * value, self.__multiplier * gradient
+
+    def __autograd_likelihood(self, parameters: Any) -> torch.Tensor:
+        likelihood = self.__extended_likelihood_tensor(parameters)
+        return self.__multiplier * likelihood
 
     def __extended_likelihood(self, params):
         data = self.__data_amplitude.calculate(params)
         mcdata = self.__monte_carlo_amplitude.calculate(params)
 
-        likelihood_data = ne.evaluate(
-            "sum(sw * log(data))", local_dict={
+        likelihood_data = _sum(
+            "sw * log(data)", local_dict={
                 "sw": self.sweight,
                 "data": data
             }
         )
-        likelihood_mc = ne.evaluate(
-            "sum(mcw * mcdata)", local_dict={
+        likelihood_mc = _sum(
+            "mcw * mcdata", local_dict={
                 "mcw": self.mcweight,
                 "mcdata": mcdata
             }
         )
         return likelihood_data - self.__generated * likelihood_mc
 
+    def __extended_likelihood_with_integrals(self, params):
+        data = self.__data_amplitude.calculate(params)
+        likelihood_mc = self.__monte_carlo_amplitude.normalization(
+            self.__integrals, params
+        )
+
+        likelihood_data = _sum(
+            "sw * log(data)", local_dict={
+                "sw": self.sweight,
+                "data": data
+            }
+        )
+        return likelihood_data - self.__generated * likelihood_mc
+
     def __extended_likelihood_with_torch(self, params):
+        return _to_numpy(self.__extended_likelihood_tensor(params))
+
+    def __extended_likelihood_tensor(self, params):
         data = self.__data_amplitude.calculate(params)
         mcdata = self.__monte_carlo_amplitude.calculate(params)
-        likelihood_data = torch.sum(self.sweight * torch.log(data))
-        likelihood_mc = torch.sum(self.mcweight * mcdata)
-        return (
-            likelihood_data - self.__generated * likelihood_mc
-        ).cpu().detach().numpy()
+        likelihood_data = torch.sum(
+            self.__tensors["sweight"] * torch.log(data)
+        )
+        likelihood_mc = torch.sum(self.__tensors["mcweight"] * mcdata)
+        return likelihood_data - self.__generated * likelihood_mc
+
+
+class StreamingLogLikelihood(_GeneralLikelihood):
+    """Computes the log likelihood over data that doesn't fit in memory.
+
+    Works like the LogLikelihood, except the data and monte carlo are
+    memory mapped instead of loaded. Each process maps only its own range
+    of rows from the file, and hands the amplitude one chunk of those
+    rows at a time, so the memory used by each process is bounded by
+    chunk_size no matter how large the files are.
+
+    The amplitude's setup is called for each chunk on every call, unless
+    a process only has a single chunk, in which case it's only called
+    once. The amplitude will receive plain numpy arrays for each chunk.
+
+    Parameters
+    ----------
+    amplitude : AbstractAmplitude
+        Either an user defined amplitude, or an amplitude from PyPWA
+    data : npy.memmap, npy.ndarray, ReaderBase, str, or Path
+        The data. Filenames ending in '.npy' are mapped directly, any
+        other file or reader is first read one event at a time into a
+        temporary '.npy' file which is then mapped.
+    monte_carlo : npy.memmap, npy.ndarray, ReaderBase, str, or Path
+        Data that will be passed to the monte_carlo, in the same form as
+        data. Providing this enables the extended log likelihood.
+    binned : npy.ndarray, optional
+        Array with bin values. This won't be used if monte_carlo is
+        provided. Can also be memory mapped.
+    quality_factor : npy.ndarray, optional
+        Array with quality factor values. Can also be memory mapped.
+    generated_length : int, optional
+        The generated length of values for use with the monte_carlo,
+        this value will default to the length of monte_carlo
+    chunk_size : int, optional
+        The maximum number of events passed to the amplitude at a time.
+        Defaults to 100,000.
+    is_minimizer : bool, optional
+        Specify if the final value of the likelihood should be multiplied
+        by -1. Defaults to True.
+    num_of_processes : int, optional
+        How many processes to be used to calculate the amplitude. Defaults
+        to the number of threads available on the machine. If USE_MP is
+        set to false or this is set to zero, no extra processes will
+        be spawned
+    pool : process.WorkerPool, optional
+        A running WorkerPool to load the likelihood into instead of
+        spawning new processes. When provided, num_of_processes is
+        ignored, and closing the likelihood leaves the pool running.
+    cache_size : int, optional
+        How many of the most recently used results to keep, so that
+        repeated sets of parameters are answered without the processes.
+        Defaults to 0, which disables the cache.
+
+    Raises
+    ------
+    ValueError
+        If the file or reader contains a ParticlePool, which can't be
+        mapped.
+
+    See Also
+    --------
+    LogLikelihood : For data that fits in memory
+    """
+
+    TYPE = LikelihoodType.LIKELIHOOD
+
+    def __init__(
+            self, amplitude: NestedFunction,
+            data: _streamable,
+            monte_carlo: Opt[_streamable] = None,
+            binned: Opt[npy.ndarray] = None,
+            quality_factor: Opt[npy.ndarray] = None,
+            generated_length: Opt[int] = 1,
+            chunk_size: int = 100_000,
+            is_minimizer: Opt[bool] = True,
+            num_of_processes=multiprocessing.cpu_count(),
+            pool: Opt[process.WorkerPool] = None,
+            cache_size: int = 0
+    ):
+        super(StreamingLogLikelihood, self).__init__(
+            amplitude, num_of_processes, pool, cache_size
+        )
+        multiplier = -1 if is_minimizer else 1
+        self.__directory = tempfile.TemporaryDirectory(prefix="pypwa-")
+
+        likelihood_data = {"data": self.__map(data, "data")}
+        if monte_carlo is not None:
+            monte_carlo = self.__map(monte_carlo, "monte_carlo")
+            likelihood_data["monte_carlo"] = monte_carlo
+            if generated_length == 1:
+                generated_length = len(monte_carlo)
+        if binned is not None:
+            likelihood_data["binned"] = binned
+        if quality_factor is not None:
+            likelihood_data["quality_factor"] = quality_factor
+
+        kernel = _StreamingLogLikelihoodKernel(
+            multiplier, amplitude, generated_length, chunk_size
+        )
+
+        try:
+            self._setup_interface(likelihood_data, kernel)
+        except Exception:
+            self.__directory.cleanup()
+            raise
+
+    def __map(self, value: _streamable, name: str) -> npy.ndarray:
+        if isinstance(value, (str, Path, ReaderBase)):
+            spool = Path(self.__directory.name) / f"{name}.npy"
+            return file.memory_map(value, spool)
+        return value
+
+    @property
+    def has_gradient(self) -> bool:
+        """True if the amplitude defines its own gradient"""
+        return _has_gradient(self._amplitude)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Closes the likelihood
+        This needs to be called after you're done with the likelihood,
+        UNLESS, you created the likelihood using the `with` statement
+        """
+        self._interface.close()
+        self.__directory.cleanup()
+
+
+class _Chunks:
+    """Hands the amplitude its data one fixed size chunk at a time"""
+
+    def __init__(
+            self, amplitude: NestedFunction, data: Any, chunk_size: int
+    ):
+        self.__amplitude = amplitude
+        self.__data = data
+        self.__bounds = [
+            slice(start, min(start + chunk_size, len(data)))
+            for start in range(0, len(data), chunk_size)
+        ]
+        self.__loaded: Opt[int] = None
+
+    def __iter__(self):
+        for index, bounds in enumerate(self.__bounds):
+            if self.__loaded != index:
+                chunk = self.__data[bounds]
+                if isinstance(chunk, npy.memmap):
+                    chunk = npy.array(chunk)
+                self.__amplitude.setup(chunk)
+                self.__loaded = index
+            yield bounds
+
+
+class _StreamingLogLikelihoodKernel(_LikelihoodKernel):
+
+    _RESAMPLED = "quality_factor"
+    _UPDATABLE = {"binned": "data", "quality_factor": "data"}
+
+    def __init__(
+            self, multiplier: int, amplitude: NestedFunction,
+            generated_length: int, chunk_size: int
+    ):
+        super(_StreamingLogLikelihoodKernel, self).__init__()
+        self.__multiplier = multiplier
+        self.__data_amplitude = amplitude
+        self.__monte_carlo_amplitude = copy.deepcopy(amplitude)
+        self.__generated = 1/generated_length
+        self.__chunk_size = chunk_size
+
+        # These are set by the process lib
+        self.data: npy.ndarray = None
+        self.monte_carlo: npy.ndarray = None
+        self.binned: Union[npy.ndarray, float] = 1
+        self.quality_factor: Union[npy.ndarray, float] = 1
+
+        # These are set at run time, after data has been loaded
+        self.__data_chunks: Opt[_Chunks] = None
+        self.__monte_carlo_chunks: Opt[_Chunks] = None
+
+    def setup(self):
+        self.__data_amplitude.THREAD = self.PROCESS_ID
+        self.__data_chunks = _Chunks(
+            self.__data_amplitude, self.data, self.__chunk_size
+        )
+
+        if self.monte_carlo is not None:
+            self.__monte_carlo_amplitude.THREAD = self.PROCESS_ID
+            self.__monte_carlo_chunks = _Chunks(
+                self.__monte_carlo_amplitude, self.monte_carlo,
+                self.__chunk_size
+            )
+
+    def _evaluate(self, parameters: Any) -> float:
+        likelihood = 0.
+        for bounds in self.__data_chunks:
+            data = _to_numpy(self.__data_amplitude.calculate(parameters))
+            likelihood += _sum(
+                "weight * log(data)", local_dict={
+                    "weight": self.__weights(bounds), "data": data
+                }
+            )
+
+        if self.__monte_carlo_chunks is not None:
+            mc_amplitude = self.__monte_carlo_amplitude
+            for _ in self.__monte_carlo_chunks:
+                monte_carlo = _to_numpy(mc_amplitude.calculate(parameters))
+                likelihood -= self.__generated * _total(monte_carlo)
+
+        return self.__multiplier * likelihood
+
+    def _evaluate_gradient(
+            self, parameters: Any
+    ) -> Tuple[float, npy.ndarray]:
+        value, gradient = 0., 0.
+        for bounds in self.__data_chunks:
+            data = _to_numpy(self.__data_amplitude.calculate(parameters))
+            derivatives = _to_numpy(self.__data_amplitude.gradient(parameters))
+            local_dict = {"weight": self.__weights(bounds), "data": data}
+
+            value += _sum("weight * log(data)", local_dict)
+            gradient += _dot(
+                derivatives, ne.evaluate("weight / data", local_dict)
+            )
+
+        if self.__monte_carlo_chunks is not None:
+            mc_amplitude = self.__monte_carlo_amplitude
+            for _ in self.__monte_carlo_chunks:
+                monte_carlo = _to_numpy(mc_amplitude.calculate(parameters))
+                mc_derivatives = _to_numpy(mc_amplitude.gradient(parameters))
+                value -= self.__generated * _total(monte_carlo)
+                gradient -= self.__generated * _total(mc_derivatives, axis=1)
+
+        return self.__multiplier * value, self.__multiplier * gradient
+
+    def __weights(self, bounds: slice) -> Union[npy.ndarray, float]:
+        # Matches the LogLikelihood, binned is ignored when extended
+        weights = _chunk_of(self.quality_factor, bounds)
+        if self.__monte_carlo_chunks is None:
+            weights = weights * _chunk_of(self.binned, bounds)
+        return weights
+
+
+class PrecisionComparison(NamedTuple):
+    """The likelihood at double precision and at a reduced precision"""
+    reference: npy.ndarray
+    result: npy.ndarray
+    max_absolute_error: float
+    max_relative_error: float
+
+
+def compare_precision(
+        likelihood_type: type, amplitude: NestedFunction,
+        parameters: List[Any], precision: type = npy.float32,
+        sample_size: int = 10_000, seed: Opt[int] = None, **kwargs
+) -> PrecisionComparison:
+    """Compares a likelihood at reduced precision against double precision
+
+    The likelihood is built twice on the same random sample of events,
+    once in double precision and once in the requested precision, and
+    evaluated for every set of parameters. For a fit, the absolute error
+    should be small compared to the errordef, 0.5 for a log likelihood.
+
+    Parameters
+    ----------
+    likelihood_type : type
+        The likelihood to compare, such as LogLikelihood or ChiSquared
+    amplitude : NestedFunction
+        The amplitude to pass to the likelihood
+    parameters : List[Any]
+        The sets of parameters to evaluate the likelihood at
+    precision : numpy.float32, optional
+        The precision to compare against double precision
+    sample_size : int, optional
+        The most events to sample from each of the data arguments.
+        Arguments that have the same length, such as the data and its
+        quality factor, are sampled with the same events.
+    seed : int, optional
+        Seed for choosing the sample of events
+    kwargs
+        The rest of the arguments for the likelihood, such as data,
+        monte_carlo, or num_of_processes.
+
+    Returns
+    -------
+    PrecisionComparison
+        The likelihood at both precisions for every set of parameters,
+        along with the largest absolute and relative differences.
+    """
+    kwargs = _sample_events(kwargs, sample_size, seed)
+
+    results = []
+    for dtype in (npy.float64, precision):
+        likelihood = likelihood_type(amplitude, precision=dtype, **kwargs)
+        with likelihood:
+            results.append(likelihood.evaluate_many(parameters))
+
+    reference, result = results
+    error = npy.abs(result - reference)
+    scale = npy.maximum(npy.abs(reference), npy.finfo(npy.float64).tiny)
+    return PrecisionComparison(
+        reference, result, float(npy.max(error)), float(npy.max(error/scale))
+    )
+
+
+def _sample_events(
+        arguments: Dict[str, Any], sample_size: int, seed: Opt[int]
+) -> Dict[str, Any]:
+    generator = npy.random.default_rng(seed)
+    indexes: Dict[int, npy.ndarray] = {}
+    sampled = dict(arguments)
+
+    for name, value in arguments.items():
+        if not isinstance(value, (npy.ndarray, pd.Series, pd.DataFrame)):
+            continue
+        elif len(value) <= sample_size:
+            continue
+
+        if len(value) not in indexes:
+            indexes[len(value)] = npy.sort(
+                generator.choice(len(value), sample_size, replace=False)
+            )
+
+        if isinstance(value, npy.ndarray):
+            sampled[name] = value[indexes[len(value)]]
+        else:
+            sampled[name] = value.iloc[indexes[len(value)]]
+
+    # Keep the monte carlo's share of the generated events the same
+    monte_carlo = arguments.get("monte_carlo")
+    if "generated_length" in arguments and monte_carlo is not None:
+        fraction = len(sampled["monte_carlo"]) / len(monte_carlo)
+        sampled["generated_length"] = arguments["generated_length"] * fraction
+
+    return sampled
@@ -1,115 +1,439 @@
-from typing import Any as _Any, Callable as _Call, List as _List
-
-import numpy as np
-
-from PyPWA import info as _info
-from PyPWA.libs.fit import likelihoods as _likelihoods
-
-try:
-    import emcee as _emcee
-except ImportError:
-    raise ImportError("Emcee must be installed!")
-
-# modelled after minuit.py
-
-__credits__ = ["Peter Pauli"]
-__author__ = _info.AUTHOR
-__version__ = _info.VERSION
-
-
-class _Translator:
-
-    def __init__(
-            self, parameters: _List[str],
-            parameterlimits: _List[str],
-            function_call: _Call[[_Any], float],
-            prior: _Call[[_Any, _List[str]], float]
-    ):
-        self.__parameters = parameters
-        self.__parameter_limits = parameterlimits
-        self.__function = function_call
-        self.__prior = prior
-
-    def __call__(self, args: _List[float]) -> float:
-        parameters_with_values = {}
-        for parameter, arg in zip(self.__parameters, args):
-            parameters_with_values[parameter] = arg
-        prior = self.__prior(args, self.__parameter_limits)
-        if not np.isfinite(prior):
-            return -np.inf
-        nll = self.__function(parameters_with_values) + prior
-        if np.any(np.isnan(nll)):
-            return -np.inf
-        return nll
-
-
-def mcmc(
-        parlist: _List[str],
-        likelihood: _likelihoods.ChiSquared,
-        nwalker=20,
-        prior=1,
-        nsteps=100,
-        startpars=None,
-        parlimits=None,
-        emceemoves=_emcee.moves.GaussianMove(0.05, mode='vector', factor=None)
-):
-    """Inference using the emcee package (<https://emcee.readthedocs.io/>)
-    Parameters
-    ----------
-    parlist : List[str]
-        List of parameter names
-    likelihood : Likelihood object from likelihoods or single function
-    startpars : nparray with dim nwalker x len(parlist)
-        Set the start parameters for all chains
-    parlimits : list of tuples (lower limit and upper limit) with
-        length = number of parameters
-    nwalker : int (optional)
-        Choose the number of walkers for the Markov chains (default = 20)
-    prior : int (optional)
-        Set the prior that is used during the walk
-        uniform prior : 1 (default, currently only option)
-    nsteps : int (optional)
-        Choose the number of steps to generate with each walker
-        (default = 100)
-    emceemoves : Move from emcee.moves (optional)
-        Choose a suitable move to create chain.
-        Default: GaussianMove(0.05, mode='vector', factor=None)
-        (see emcee docs)
-    Returns
-    -------
-    emcee.EnsembleSampler.run_mcmc
-        Contains the whole chain. See emcee documentation for more info.
-    See Also
-    --------
-    emcee's documentation : Should explain the various options that can
-        be passed to emcee, and how to use the resulting object after
-        the chain has been produced.
-    """
-
-    if prior == 1:
-        translator = _Translator(
-            parlist, parlimits, likelihood, log_uniform_prior
-        )
-    else:
-        print("So far only uniform prior is implemented.")
-        return 0
-
-    ndimension = len(parlist)
-
-    if startpars.any() is None:
-        startpars = np.zeros((nwalker, ndimension))
-
-    optimizer = _emcee.EnsembleSampler(
-        nwalker, ndimension, translator, moves=emceemoves
-    )
-    output = optimizer.run_mcmc(
-        startpars, nsteps, progress=True, skip_initial_state_check=True
-    )
-    return optimizer
-
-
-def log_uniform_prior(pars, parlimits):
-    for index, par in enumerate(pars):
-        if par < parlimits[index][0] or par > parlimits[index][1]:
-            return -np.inf
-    return 0.
+import functools as _functools
+import math as _math
+import os as _os
+import pickle as _pickle
+from pathlib import Path as _Path
+from typing import (
+    Any as _Any, Callable as _Call, List as _List, Tuple as _Tuple,
+    Union as _Union
+)
+
+import numpy as np
+
+from PyPWA import info as _info
+from PyPWA.libs.fit import likelihoods as _likelihoods
+from PyPWA.libs.fit import priors as _priors
+
+try:
+    import emcee as _emcee
+except ImportError:
+    raise ImportError("Emcee must be installed!")
+
+# modelled after minuit.py
+
+__credits__ = ["Peter Pauli"]
+__author__ = _info.AUTHOR
+__version__ = _info.VERSION
+
+
+class _Translator:
+
+    def __init__(
+            self, parameters: _List[str],
+            function_call: _Call[[_Any], float],
+            prior: _Call[[_Any], float]
+    ):
+        self.__parameters = parameters
+        self.__function = function_call
+        self.__prior = prior
+
+    def __call__(self, args: _List[float]) -> float:
+        parameters_with_values = {}
+        for parameter, arg in zip(self.__parameters, args):
+            parameters_with_values[parameter] = arg
+        prior = self.__prior(args)
+        if not np.isfinite(prior):
+            return -np.inf
+        nll = self.__function(parameters_with_values) + prior
+        if np.any(np.isnan(nll)):
+            return -np.inf
+        return nll
+
+
+class _VectorizedTranslator:
+    """Evaluates every walker's position with one call to the likelihood
+
+    Walkers outside of the prior are never sent to the likelihood, the
+    rest are sent together through evaluate_many so that a step only
+    needs a single exchange with the likelihood's processes.
+    """
+
+    def __init__(
+            self, parameters: _List[str],
+            function_call: _Call[[_Any], float],
+            prior: _Call[[_Any], np.ndarray]
+    ):
+        self.__parameters = parameters
+        self.__function = function_call
+        self.__prior = prior
+
+    def __call__(self, args: np.ndarray) -> np.ndarray:
+        prior = np.asarray(self.__prior(args))
+        prior = np.broadcast_to(prior, (len(args),)).astype(float)
+        inside = np.isfinite(prior)
+
+        log_probability = np.full(len(args), -np.inf)
+        if np.any(inside):
+            parameters = [
+                dict(zip(self.__parameters, walker))
+                for walker in args[inside]
+            ]
+            log_probability[inside] = self.__evaluate(parameters)
+            log_probability[inside] += prior[inside]
+
+        log_probability[np.isnan(log_probability)] = -np.inf
+        return log_probability
+
+    def __evaluate(self, parameters: _List[_Any]) -> np.ndarray:
+        if hasattr(self.__function, "evaluate_many"):
+            return self.__function.evaluate_many(parameters)
+        return np.array([self.__function(p) for p in parameters])
+
+
+class MemmapBackend(_emcee.backends.Backend):
+    """Stores the chain on disk, so that it can be resumed
+
+    The chain and log probabilities are kept in memory mapped files that
+    grow chunk_size steps at a time, so memory use doesn't grow with the
+    length of the chain. Every checkpoint_every steps, the walkers'
+    progress and random state are saved, and reopening the same directory
+    resumes from the last checkpoint.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Where the chain and checkpoints are stored
+    chunk_size : int (optional)
+        The number of steps the files grow by at a time (default = 1000)
+    checkpoint_every : int (optional)
+        The number of steps between checkpoints (default = 100)
+    dtype : numpy.dtype (optional)
+        The type the chain is stored as (default = float64)
+    """
+
+    def __init__(
+            self, directory: _Union[str, _Path], chunk_size: int = 1000,
+            checkpoint_every: int = 100, dtype=None
+    ):
+        super(MemmapBackend, self).__init__(dtype)
+        self.__directory = _Path(directory)
+        self.__chunk_size = max(int(chunk_size), 1)
+        self.__checkpoint_every = max(int(checkpoint_every), 1)
+        self.__capacity = 0
+
+        if self.__checkpoint_file.exists():
+            self.__load()
+
+    @property
+    def __checkpoint_file(self) -> _Path:
+        return self.__directory / "checkpoint.pkl"
+
+    def reset(self, nwalkers, ndim):
+        super(MemmapBackend, self).reset(nwalkers, ndim)
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        for name in ["chain.dat", "log_prob.dat", "checkpoint.pkl"]:
+            (self.__directory / name).unlink(missing_ok=True)
+        self.__capacity = 0
+
+    def grow(self, ngrow, blobs):
+        if blobs is not None:
+            raise ValueError("MemmapBackend does not support blobs!")
+
+        needed = self.iteration + ngrow
+        if needed > self.__capacity:
+            chunks = _math.ceil(needed / self.__chunk_size)
+            self.__open(chunks * self.__chunk_size)
+
+    def save_step(self, state, accepted):
+        super(MemmapBackend, self).save_step(state, accepted)
+        if self.iteration % self.__checkpoint_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Saves the progress of the chain so it can be resumed from here
+
+        The chain is flushed to disk before the checkpoint is replaced, so
+        a checkpoint never points to steps that weren't written.
+        """
+        if not self.initialized or not self.__capacity:
+            return
+
+        self.chain.flush()
+        self.log_prob.flush()
+
+        checkpoint = {
+            "nwalkers": self.nwalkers, "ndim": self.ndim,
+            "dtype": np.dtype(self.dtype).str, "capacity": self.__capacity,
+            "iteration": self.iteration, "accepted": self.accepted,
+            "random_state": self.random_state
+        }
+
+        temporary = self.__checkpoint_file.with_suffix(".tmp")
+        with temporary.open("wb") as stream:
+            _pickle.dump(checkpoint, stream)
+            stream.flush()
+            _os.fsync(stream.fileno())
+        _os.replace(temporary, self.__checkpoint_file)
+
+    def __load(self):
+        with self.__checkpoint_file.open("rb") as stream:
+            checkpoint = _pickle.load(stream)
+
+        # Steps after the last checkpoint are dropped, and overwritten
+        self.nwalkers = checkpoint["nwalkers"]
+        self.ndim = checkpoint["ndim"]
+        self.dtype = np.dtype(checkpoint["dtype"])
+        self.iteration = checkpoint["iteration"]
+        self.accepted = checkpoint["accepted"]
+        self.random_state = checkpoint["random_state"]
+        self.blobs = None
+        self.__open(checkpoint["capacity"])
+        self.initialized = True
+
+    def __open(self, capacity: int):
+        shapes = {
+            "chain": (capacity, self.nwalkers, self.ndim),
+            "log_prob": (capacity, self.nwalkers)
+        }
+
+        for name, shape in shapes.items():
+            path = self.__directory / f"{name}.dat"
+            size = int(np.prod(shape)) * np.dtype(self.dtype).itemsize
+            with path.open("r+b" if path.exists() else "w+b") as stream:
+                stream.truncate(size)
+            setattr(self, name, np.memmap(path, self.dtype, "r+", shape=shape))
+
+        self.__capacity = capacity
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.checkpoint()
+
+
+class ConvergenceMonitor:
+    """Stops a chain once it has converged
+
+    Every check_every steps the integrated autocorrelation time, tau, is
+    estimated for each parameter. The chain is considered converged once
+    it is longer than multiple times the largest tau, and no tau changed
+    by more than tolerance, relatively, since the previous check.
+
+    Tau is estimated from the chain thinned to at most max_samples steps,
+    so each check costs the same no matter how long the chain has grown,
+    and a whole run costs O(N) instead of O(N^2). Once the chain is over
+    max_samples times longer than tau, the thinning is longer than tau
+    and tau is overestimated as the thinning, which only delays stopping.
+    max_samples should be well above multiple, so that chains are long
+    enough to stop long before that.
+
+    Parameters
+    ----------
+    check_every : int (optional)
+        The number of steps between estimates of tau (default = 100)
+    multiple : float (optional)
+        How many autocorrelation times long the chain must be
+        (default = 50)
+    tolerance : float (optional)
+        The largest relative change of tau between checks that is
+        considered stable (default = 0.01)
+    max_samples : int (optional)
+        The most steps of the chain tau is estimated from
+        (default = 1000)
+
+    Attributes
+    ----------
+    history : List[Tuple[int, ndarray]]
+        The iteration and tau of every check
+    converged : bool
+        Whether the chain stopped because it converged
+    steps_saved : int
+        The steps that weren't needed after the chain converged
+    evaluations_saved : int
+        The likelihood evaluations that weren't needed, one per walker for
+        every step saved
+    """
+
+    def __init__(
+            self, check_every: int = 100, multiple: float = 50,
+            tolerance: float = 0.01, max_samples: int = 1000
+    ):
+        self.check_every = max(int(check_every), 1)
+        self.multiple = multiple
+        self.tolerance = tolerance
+        self.max_samples = max(int(max_samples), 1)
+        self.history: _List[_Tuple[int, np.ndarray]] = []
+        self.converged = False
+        self.steps_saved = 0
+        self.evaluations_saved = 0
+
+    def run(
+            self, sampler: _emcee.EnsembleSampler, initial_state: _Any,
+            nsteps: int, **kwargs
+    ):
+        """Runs the sampler for at most nsteps, stopping once converged
+
+        Parameters
+        ----------
+        sampler : emcee.EnsembleSampler
+            The sampler to run
+        initial_state : State or ndarray
+            Where the walkers start
+        nsteps : int
+            The most steps to run
+        kwargs : Any
+            Passed on to the sampler's sample method
+        """
+        self.history = []
+        self.converged = False
+
+        steps = 0
+        for _ in sampler.sample(initial_state, iterations=nsteps, **kwargs):
+            steps += 1
+            if steps % self.check_every == 0 and self.__check(sampler):
+                self.converged = True
+                break
+
+        self.steps_saved = nsteps - steps
+        self.evaluations_saved = self.steps_saved * sampler.nwalkers
+
+    def __check(self, sampler: _emcee.EnsembleSampler) -> bool:
+        iteration = sampler.iteration
+        thin = max(_math.ceil(iteration / self.max_samples), 1)
+        chain = sampler.get_chain(thin=thin)
+        tau = thin * _emcee.autocorr.integrated_time(chain, tol=0)
+        previous = self.history[-1][1] if self.history else None
+        self.history.append((iteration, tau))
+
+        if previous is None or not np.all(np.isfinite(tau)):
+            return False
+
+        long_enough = np.all(self.multiple * tau < iteration)
+        stable = np.all(np.abs(previous - tau) < self.tolerance * tau)
+        return bool(long_enough and stable)
+
+
+def mcmc(
+        parlist: _List[str],
+        likelihood: _likelihoods.ChiSquared,
+        nwalker=20,
+        prior=1,
+        nsteps=100,
+        startpars=None,
+        parlimits=None,
+        emceemoves=_emcee.moves.GaussianMove(0.05, mode='vector', factor=None),
+        vectorize=False,
+        backend=None,
+        monitor=None
+):
+    """Inference using the emcee package (<https://emcee.readthedocs.io/>)
+    Parameters
+    ----------
+    parlist : List[str]
+        List of parameter names
+    likelihood : Likelihood object from likelihoods or single function
+    startpars : nparray with dim nwalker x len(parlist)
+        Set the start parameters for all chains
+    parlimits : list of tuples (lower limit and upper limit) with
+        length = number of parameters
+    nwalker : int (optional)
+        Choose the number of walkers for the Markov chains (default = 20)
+    prior : int or Prior (optional)
+        Set the prior that is used during the walk
+        uniform prior inside parlimits : 1 (default)
+        Any prior from PyPWA.libs.fit.priors, such as Gaussian, or a
+        Product of them.
+    nsteps : int (optional)
+        Choose the number of steps to generate with each walker
+        (default = 100)
+    emceemoves : Move from emcee.moves (optional)
+        Choose a suitable move to create chain.
+        Default: GaussianMove(0.05, mode='vector', factor=None)
+        (see emcee docs)
+    vectorize : bool (optional)
+        Evaluate all walkers with a single batched call to the likelihood
+        each step, instead of one call per walker. (default = False)
+    backend : emcee backend, str, or Path (optional)
+        Where the chain is stored, by default in memory. A path stores the
+        chain on disk with a MemmapBackend. If the backend already holds
+        steps from an earlier run, the chain is resumed from its last
+        step, and only runs until it has nsteps in total.
+    monitor : ConvergenceMonitor (optional)
+        Stops the chain before nsteps once it has converged, and records
+        how many steps and evaluations were saved. (default = None)
+    Returns
+    -------
+    emcee.EnsembleSampler.run_mcmc
+        Contains the whole chain. See emcee documentation for more info.
+    See Also
+    --------
+    emcee's documentation : Should explain the various options that can
+        be passed to emcee, and how to use the resulting object after
+        the chain has been produced.
+    """
+
+    if isinstance(prior, _priors.Prior):
+        log_prior = prior
+    elif prior == 1:
+        log_prior = _functools.partial(
+            log_uniform_prior, parlimits=parlimits
+        )
+    else:
+        print("The prior must be 1 or a Prior from priors.")
+        return 0
+
+    translator_type = _VectorizedTranslator if vectorize else _Translator
+    translator = translator_type(parlist, likelihood, log_prior)
+
+    ndimension = len(parlist)
+
+    if startpars is None:
+        startpars = np.zeros((nwalker, ndimension))
+
+    if backend is not None and \
+            not isinstance(backend, _emcee.backends.Backend):
+        backend = MemmapBackend(backend)
+
+    optimizer = _emcee.EnsembleSampler(
+        nwalker, ndimension, translator, moves=emceemoves,
+        vectorize=vectorize, backend=backend
+    )
+
+    # Resuming continues from the last step stored in the backend
+    completed = optimizer.iteration
+    if completed:
+        startpars = optimizer.get_last_sample()
+
+    if nsteps > completed and monitor is not None:
+        monitor.run(
+            optimizer, startpars, nsteps - completed, progress=True,
+            skip_initial_state_check=True
+        )
+    elif nsteps > completed:
+        optimizer.run_mcmc(
+            startpars, nsteps - completed, progress=True,
+            skip_initial_state_check=True
+        )
+
+    if isinstance(backend, MemmapBackend):
+        backend.checkpoint()
+    return optimizer
+
+
+def log_uniform_prior(pars, parlimits):
+    """Uniform prior inside of the limits
+
+    pars can either be a single set of parameters, or a set for each
+    walker with shape nwalker x number of parameters, in which case an
+    array with the prior of each walker is returned.
+    """
+    pars = np.asarray(pars, dtype=float)
+    limits = np.asarray(parlimits, dtype=float)
+
+    outside = np.any(
+        (pars < limits[:, 0]) | (pars > limits[:, 1]), axis=-1
+    )
+    if pars.ndim == 1:
+        return -np.inf if outside else 0.
+    return np.where(outside, -np.inf, 0.)
@@ -20,7 +20,7 @@
 
 """
 
-from typing import Any, Callable as Call, Dict, List, Union
+from typing import Any, Callable as Call, Dict, List, Optional as Opt, Union
 
 import iminuit as _iminuit
 import numpy as np
@@ -51,6 +51,11 @@ class _Translator:
     def __call__(self, *args):
         return self.__call(*args)
 
+    def make_parameters(self, values: np.ndarray) -> Any:
+        if self.__parameters is None:
+            return values
+        return dict(zip(self.__parameters, values))
+
     def __passthrough(self, array) -> float:
         return self.__function(array)
 
@@ -62,9 +67,79 @@ class _Translator:
         return self.__function(parameters_with_values)
 
 
+class _ParallelGradient:
+    """Central difference gradient evaluated in a single batch
+
+    Every perturbed set of parameters needed for the gradient is sent to
+    the likelihood's processes at once through evaluate_many, instead of
+    Migrad making two sequential calls for every parameter.
+    """
+
+    # Minimizes the combined truncation and rounding error
+    STEP = np.finfo(np.float64).eps ** (1/3)
+
+    def __init__(self, translator: _Translator, likelihood: Any):
+        self.__translator = translator
+        self.__likelihood = likelihood
+        self.optimizer: Opt[_iminuit.Minuit] = None
+
+    def __call__(self, *args) -> np.ndarray:
+        if len(args) == 1:
+            values = np.asarray(args[0], dtype=np.float64)
+        else:
+            values = np.asarray(args, dtype=np.float64)
+
+        # Fixed parameters aren't varied, and steps are clipped to limits
+        # so that the likelihood is never evaluated outside of them.
+        varied = [
+            index for index in range(len(values))
+            if not self.optimizer.fixed[index]
+        ]
+
+        steps = self.STEP * np.maximum(np.abs(values), 1)
+        points = np.repeat([values], 2 * len(varied), axis=0)
+        for row, index in enumerate(varied):
+            lower, upper = self.optimizer.limits[index]
+            points[2*row, index] = min(values[index] + steps[index], upper)
+            points[2*row+1, index] = max(values[index] - steps[index], lower)
+
+        results = self.__evaluate(points)
+
+        gradient = np.zeros(len(values))
+        for row, index in enumerate(varied):
+            width = points[2*row, index] - points[2*row+1, index]
+            gradient[index] = (results[2*row] - results[2*row+1]) / width
+        return gradient
+
+    def __evaluate(self, points: np.ndarray) -> np.ndarray:
+        parameters = [self.__translator.make_parameters(p) for p in points]
+        if hasattr(self.__likelihood, "evaluate_many"):
+            return self.__likelihood.evaluate_many(parameters)
+        return np.array([self.__likelihood(p) for p in parameters])
+
+
+class _AnalyticGradient:
+    """Exact gradient reduced by the likelihood inside each process"""
+
+    def __init__(self, translator: _Translator, likelihood: Any):
+        self.__translator = translator
+        self.__likelihood = likelihood
+        self.optimizer: Opt[_iminuit.Minuit] = None
+
+    def __call__(self, *args) -> np.ndarray:
+        if len(args) == 1:
+            values = np.asarray(args[0], dtype=np.float64)
+        else:
+            values = np.asarray(args, dtype=np.float64)
+
+        parameters = self.__translator.make_parameters(values)
+        return self.__likelihood.gradient(parameters)
+
+
 def minuit(
         settings: Union[Dict[str, Any], np.ndarray],
-        likelihood: likelihoods.ChiSquared
+        likelihood: likelihoods.ChiSquared,
+        gradient: Opt[str] = None
 ):
     """Optimization using iminuit
 
@@ -74,6 +149,13 @@ def minuit(
         The settings to be passed to iminuit. Look into the documentation
         for iminuit for specifics
     likelihood : Likelihood object from likelihoods or single function
+    gradient : str, optional
+        How the gradient given to Minuit is calculated. By default Minuit
+        calculates its own gradient, one call at a time. "parallel" uses
+        a central difference where every perturbed set of parameters is
+        evaluated by the likelihood in a single batch. "analytic" uses
+        the exact gradient from the amplitude's gradient method, or from
+        PyTorch's autograd for USE_TORCH amplitudes without one.
 
     Returns
     -------
@@ -96,10 +178,26 @@ def minuit(
 
     translator = _Translator(name, likelihood)
 
+    if gradient is None:
+        grad = None
+    elif gradient == "parallel":
+        grad = _ParallelGradient(translator, likelihood)
+    elif gradient == "analytic":
+        if not getattr(likelihood, "has_gradient", False):
+            raise ValueError("Likelihood does not provide a gradient!")
+        grad = _AnalyticGradient(translator, likelihood)
+    else:
+        raise ValueError(f"Unknown gradient {gradient!r}")
+
     if name is None:
-        optimizer = _iminuit.Minuit(translator, settings)
+        optimizer = _iminuit.Minuit(translator, settings, grad=grad)
     else:
-        optimizer = _iminuit.Minuit(translator, name=name, **settings)
+        optimizer = _iminuit.Minuit(
+            translator, name=name, grad=grad, **settings
+        )
+
+    if grad is not None:
+        grad.optimizer = optimizer
 
     # Set error for Likelihood, Migrad defaults to ChiSquared
     if hasattr(likelihood, "TYPE"):
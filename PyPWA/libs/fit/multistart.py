@@ -0,0 +1,330 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Fits a likelihood from many starting points at once. Every start shares
+the same likelihood, and so the same processes and data. The starts are
+run together, and whenever every running start is waiting on the
+likelihood, their calls are sent to the processes as a single batch.
+"""
+
+import threading
+from typing import (
+    Any, Callable, Dict, List, Optional as Opt, Sequence, Tuple, Union
+)
+
+import numpy as npy
+import pandas as pd
+
+from PyPWA import info as _info
+from .minuit import minuit
+
+__credits__ = ["Mark Jones"]
+__author__ = _info.AUTHOR
+__version__ = _info.VERSION
+
+
+class _Request:
+    """Parameters waiting to be evaluated, and their results"""
+
+    def __init__(self, parameters: List[Any], is_gradient: bool = False):
+        self.parameters = parameters
+        self.is_gradient = is_gradient
+        self.results: Opt[List[Any]] = None
+        self.error: Opt[Exception] = None
+
+
+class _Multiplexer:
+    """Collects the calls from every running start into one batch
+
+    Each start blocks until every other running start is also waiting on
+    the likelihood, and then the last one to arrive evaluates all of them
+    in a single call to evaluate_many, along with a single call to
+    gradient_many for the starts waiting on a gradient.
+    """
+
+    def __init__(self, likelihood: Any, running: int):
+        self.__likelihood = likelihood
+        self.__condition = threading.Condition()
+        self.__pending: List[_Request] = []
+        self.__running = running
+
+    def evaluate(self, request: _Request) -> List[Any]:
+        with self.__condition:
+            self.__pending.append(request)
+            if len(self.__pending) >= self.__running:
+                self.__flush()
+
+            while request.results is None and request.error is None:
+                self.__condition.wait()
+
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def retire(self):
+        # A finished start no longer holds up the starts that are waiting
+        with self.__condition:
+            self.__running -= 1
+            if self.__pending and len(self.__pending) >= self.__running:
+                self.__flush()
+
+    def __flush(self):
+        requests, self.__pending = self.__pending, []
+        try:
+            self.__answer(
+                [r for r in requests if not r.is_gradient],
+                self.__evaluate_many
+            )
+            self.__answer(
+                [r for r in requests if r.is_gradient], self.__gradient_many
+            )
+        except Exception as error:
+            for request in requests:
+                request.error = error
+        self.__condition.notify_all()
+
+    @staticmethod
+    def __answer(
+            requests: List[_Request],
+            evaluate: Callable[[List[Any]], Sequence[Any]]
+    ):
+        # Every request is answered from a single batch
+        batch = [p for request in requests for p in request.parameters]
+        if batch:
+            results = iter(evaluate(batch))
+            for request in requests:
+                request.results = [next(results) for _ in request.parameters]
+
+    def __evaluate_many(self, batch: List[Any]) -> npy.ndarray:
+        if hasattr(self.__likelihood, "evaluate_many"):
+            return self.__likelihood.evaluate_many(batch)
+        return npy.array([self.__likelihood(p) for p in batch])
+
+    def __gradient_many(self, batch: List[Any]) -> List[npy.ndarray]:
+        if hasattr(self.__likelihood, "gradient_many"):
+            return list(self.__likelihood.gradient_many(batch))
+        return [self.__likelihood.gradient(p) for p in batch]
+
+
+class _SharedLikelihood:
+    """What a single start sees in place of the likelihood"""
+
+    def __init__(self, likelihood: Any, multiplexer: _Multiplexer):
+        self.__multiplexer = multiplexer
+        self.has_gradient = getattr(likelihood, "has_gradient", False)
+        if hasattr(likelihood, "TYPE"):
+            self.TYPE = likelihood.TYPE
+
+    def __call__(self, parameters: Any) -> float:
+        return self.__multiplexer.evaluate(_Request([parameters]))[0]
+
+    def evaluate_many(self, parameters: List[Any]) -> npy.ndarray:
+        return npy.array(self.__multiplexer.evaluate(_Request(parameters)))
+
+    def gradient(self, parameters: Any) -> npy.ndarray:
+        return self.__multiplexer.evaluate(_Request([parameters], True))[0]
+
+
+class _Starts:
+    """Hands out the starts to the threads, and collects their results"""
+
+    def __init__(self, starts: List[Dict[str, Any]]):
+        self.__lock = threading.Lock()
+        self.__next = 0
+        self.__starts = starts
+        self.results: List[Opt[Dict[str, Any]]] = [None] * len(starts)
+        self.error: Opt[Exception] = None
+
+    def take(self) -> Opt[Tuple[int, Dict[str, Any]]]:
+        with self.__lock:
+            if self.__next >= len(self.__starts) or self.error is not None:
+                return None
+
+            index = self.__next
+            self.__next += 1
+            return index, self.__starts[index]
+
+    def fail(self, error: Exception):
+        with self.__lock:
+            if self.error is None:
+                self.error = error
+
+
+def _fit_starts(
+        starts: _Starts, likelihood: _SharedLikelihood,
+        multiplexer: _Multiplexer, gradient: Opt[str]
+):
+    try:
+        job = starts.take()
+        while job is not None:
+            index, settings = job
+            optimizer = minuit(settings, likelihood, gradient)
+            optimizer.migrad()
+
+            result = dict(zip(optimizer.parameters, optimizer.values))
+            result["fval"] = optimizer.fval
+            result["valid"] = optimizer.valid
+            starts.results[index] = result
+            job = starts.take()
+    except Exception as error:
+        starts.fail(error)
+    finally:
+        multiplexer.retire()
+
+
+def _make_starts(
+        settings: Dict[str, Any], starts: Union[int, List[Dict[str, Any]]],
+        ranges: Opt[Dict[str, Tuple[float, float]]], seed: Opt[int]
+) -> List[Dict[str, Any]]:
+    if not isinstance(starts, int):
+        return [{**settings, **start} for start in starts]
+
+    if not ranges:
+        raise ValueError("ranges are needed to make random starts!")
+
+    generator = npy.random.default_rng(seed)
+    made = []
+    for _ in range(starts):
+        start = dict(settings)
+        for name, (lower, upper) in ranges.items():
+            start[name] = generator.uniform(lower, upper)
+        made.append(start)
+    return made
+
+
+def _deduplicate(
+        results: pd.DataFrame, names: List[str], tolerance: float
+) -> pd.DataFrame:
+    kept, counts = [], []
+    for index, row in results.iterrows():
+        for position, other in enumerate(kept):
+            same = (
+                row["valid"] == results.at[other, "valid"] and
+                abs(row["fval"] - results.at[other, "fval"]) <= tolerance and
+                npy.allclose(
+                    row[names].to_numpy(float),
+                    results.loc[other, names].to_numpy(float),
+                    rtol=tolerance, atol=tolerance
+                )
+            )
+            if same:
+                counts[position] += 1
+                break
+        else:
+            kept.append(index)
+            counts.append(1)
+
+    unique = results.loc[kept].copy()
+    unique["starts"] = counts
+    return unique.reset_index(drop=True)
+
+
+def multistart(
+        settings: Dict[str, Any], likelihood: Any,
+        starts: Union[int, List[Dict[str, Any]]],
+        ranges: Opt[Dict[str, Tuple[float, float]]] = None,
+        concurrent: int = 8, seed: Opt[int] = None,
+        gradient: Opt[str] = None, deduplicate: bool = True,
+        tolerance: float = 1e-3
+) -> pd.DataFrame:
+    """Fits the likelihood from many starting points, ranking the minima
+
+    Every start uses the same likelihood, so the data is only loaded into
+    the processes once. Up to concurrent starts are fit at the same time,
+    and their calls to the likelihood are evaluated together as a single
+    batch, so each trip to the processes serves every running start. The
+    gradients of starts fit with gradient="analytic" are batched the same
+    way through the likelihood's gradient_many.
+
+    Parameters
+    ----------
+    settings : Dict[str, Any]
+        The settings passed to minuit, which each start updates.
+    likelihood : Likelihood object from likelihoods or single function
+        The likelihood to fit, it is not closed afterwards.
+    starts : int or List[Dict[str, Any]]
+        Either the number of random starts to make from ranges, or the
+        starting values of each start.
+    ranges : Dict[str, Tuple[float, float]], optional
+        The lower and upper bounds of the random starting values for each
+        parameter. Parameters that aren't included start from settings.
+    concurrent : int, optional
+        The number of starts that are fit at the same time, defaults to 8.
+    seed : int, optional
+        Seed for the random starts
+    gradient : str, optional
+        The gradient passed to minuit, see minuit for the options.
+    deduplicate : bool, optional
+        Combines the starts that converged to the same minimum, defaults
+        to True.
+    tolerance : float, optional
+        How close the parameters and likelihood of two starts need to be
+        for them to be the same minimum, both absolutely and relative to
+        the value. Defaults to 1e-3.
+
+    Returns
+    -------
+    DataFrame
+        The minima ranked from best to worst, valid minima first. Each
+        row has the fitted value of every parameter, the final value of
+        the likelihood as fval, and whether Migrad converged as valid.
+        When deduplicating, starts is the number of starts that found
+        that minimum.
+
+    Raises
+    ------
+    ValueError
+        If starts is a number and no ranges are provided.
+
+    See Also
+    --------
+    minuit : The fitter used for each start
+    """
+    schedule = _Starts(_make_starts(settings, starts, ranges, seed))
+    workers = max(min(concurrent, len(schedule.results)), 1)
+    multiplexer = _Multiplexer(likelihood, workers)
+    shared = _SharedLikelihood(likelihood, multiplexer)
+
+    threads = [
+        threading.Thread(
+            target=_fit_starts, args=(schedule, shared, multiplexer, gradient)
+        ) for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if schedule.error is not None:
+        raise schedule.error
+
+    ranked = pd.DataFrame([result for result in schedule.results if result])
+    if ranked.empty:
+        return ranked
+
+    ranked["invalid"] = ~ranked["valid"].astype(bool)
+    ranked = ranked.sort_values(["invalid", "fval"], kind="stable")
+    ranked = ranked.drop(columns="invalid").reset_index(drop=True)
+
+    if deduplicate:
+        names = [
+            name for name in ranked.columns if name not in ("fval", "valid")
+        ]
+        ranked = _deduplicate(ranked, names, tolerance)
+    return ranked
@@ -0,0 +1,242 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Priors for mcmc. Every prior is the normalized log probability density,
+and is evaluated for all walkers at once, with each row of the positions
+being a single walker. Priors for different parameters are combined by
+multiplying them together, and select their parameters with columns.
+
+Examples
+--------
+>>> prior = Gaussian(0, 1, columns=0) * HalfCauchy(2, columns=1)
+>>> mcmc(["mean", "width"], likelihood, prior=prior, vectorize=True)
+"""
+
+from abc import ABC, abstractmethod
+from typing import List, Optional as Opt, Union
+
+import numpy as npy
+
+from PyPWA import info as _info
+
+__credits__ = ["Mark Jones"]
+__author__ = _info.AUTHOR
+__version__ = _info.VERSION
+
+
+_values = Union[float, npy.ndarray, List[float]]
+_columns = Opt[Union[int, slice, List[int]]]
+
+_HALF_LOG_TWO_PI = .5 * npy.log(2 * npy.pi)
+
+
+class Prior(ABC):
+    """Base for the priors, which are evaluated on every walker at once
+
+    Parameters
+    ----------
+    columns : int, slice, or List[int], optional
+        The parameters the prior applies to. By default it applies to
+        every parameter.
+    """
+
+    def __init__(self, columns: _columns = None):
+        if isinstance(columns, int):
+            columns = [columns]
+        self.__columns = columns
+
+    def __call__(
+            self, positions: Union[npy.ndarray, List[float]]
+    ) -> Union[float, npy.ndarray]:
+        """The log prior of each walker
+
+        Parameters
+        ----------
+        positions : ndarray
+            Either the parameters of one walker, or nwalker x parameters
+            for every walker.
+
+        Returns
+        -------
+        float or ndarray
+            The log prior of the walker, or an array with the log prior of
+            each walker.
+        """
+        positions = npy.asarray(positions, dtype=float)
+        walkers = npy.atleast_2d(positions)
+        if self.__columns is not None:
+            walkers = walkers[:, self.__columns]
+
+        log_prior = self._log_prior(walkers)
+        if positions.ndim == 1:
+            return float(log_prior[0])
+        return log_prior
+
+    @abstractmethod
+    def _log_prior(self, walkers: npy.ndarray) -> npy.ndarray:
+        ...
+
+    def __mul__(self, other: "Prior") -> "Product":
+        return Product([self, other])
+
+
+class Uniform(Prior):
+    """Constant between lower and upper, inclusive, and zero elsewhere
+
+    Parameters
+    ----------
+    lower : float or array-like
+        The lower limit of each parameter
+    upper : float or array-like
+        The upper limit of each parameter
+    columns : int, slice, or List[int], optional
+        The parameters the prior applies to
+    """
+
+    def __init__(
+            self, lower: _values, upper: _values, columns: _columns = None
+    ):
+        super(Uniform, self).__init__(columns)
+        self.__lower = npy.asarray(lower, dtype=float)
+        self.__upper = npy.asarray(upper, dtype=float)
+        self.__log_width = npy.log(self.__upper - self.__lower)
+
+    def _log_prior(self, walkers: npy.ndarray) -> npy.ndarray:
+        inside = npy.all(
+            (walkers >= self.__lower) & (walkers <= self.__upper), axis=1
+        )
+        density = -npy.sum(
+            npy.broadcast_to(self.__log_width, walkers.shape[1:])
+        )
+        return npy.where(inside, density, -npy.inf)
+
+
+class Gaussian(Prior):
+    """Normal distribution around mean
+
+    Parameters
+    ----------
+    mean : float or array-like
+        The mean of each parameter
+    sigma : float or array-like
+        The standard deviation of each parameter
+    columns : int, slice, or List[int], optional
+        The parameters the prior applies to
+    """
+
+    def __init__(
+            self, mean: _values, sigma: _values, columns: _columns = None
+    ):
+        super(Gaussian, self).__init__(columns)
+        self.__mean = npy.asarray(mean, dtype=float)
+        self.__sigma = npy.asarray(sigma, dtype=float)
+        self.__normalization = npy.log(self.__sigma) + _HALF_LOG_TWO_PI
+
+    def _log_prior(self, walkers: npy.ndarray) -> npy.ndarray:
+        normalization = npy.sum(
+            npy.broadcast_to(self.__normalization, walkers.shape[1:])
+        )
+        pulls = (walkers - self.__mean) / self.__sigma
+        return -.5 * npy.einsum("ij,ij->i", pulls, pulls) - normalization
+
+
+class LogNormal(Prior):
+    """Parameters whose logarithm is normally distributed
+
+    Parameters
+    ----------
+    mu : float or array-like
+        The mean of the logarithm of each parameter
+    sigma : float or array-like
+        The standard deviation of the logarithm of each parameter
+    columns : int, slice, or List[int], optional
+        The parameters the prior applies to
+    """
+
+    def __init__(
+            self, mu: _values, sigma: _values, columns: _columns = None
+    ):
+        super(LogNormal, self).__init__(columns)
+        self.__mu = npy.asarray(mu, dtype=float)
+        self.__sigma = npy.asarray(sigma, dtype=float)
+        self.__normalization = npy.log(self.__sigma) + _HALF_LOG_TWO_PI
+
+    def _log_prior(self, walkers: npy.ndarray) -> npy.ndarray:
+        positive = npy.all(walkers > 0, axis=1)
+        logs = npy.log(npy.where(walkers > 0, walkers, 1))
+        pulls = (logs - self.__mu) / self.__sigma
+
+        normalization = npy.broadcast_to(self.__normalization, logs.shape)
+        log_prior = -npy.sum(logs + .5 * pulls ** 2 + normalization, axis=1)
+        return npy.where(positive, log_prior, -npy.inf)
+
+
+class HalfCauchy(Prior):
+    """Cauchy distribution folded onto the parameters that aren't negative
+
+    Parameters
+    ----------
+    scale : float or array-like
+        The scale of each parameter
+    columns : int, slice, or List[int], optional
+        The parameters the prior applies to
+    """
+
+    def __init__(self, scale: _values, columns: _columns = None):
+        super(HalfCauchy, self).__init__(columns)
+        self.__scale = npy.asarray(scale, dtype=float)
+        self.__normalization = npy.log(2 / (npy.pi * self.__scale))
+
+    def _log_prior(self, walkers: npy.ndarray) -> npy.ndarray:
+        normalization = npy.sum(
+            npy.broadcast_to(self.__normalization, walkers.shape[1:])
+        )
+        log_prior = normalization - npy.sum(
+            npy.log1p((walkers / self.__scale) ** 2), axis=1
+        )
+        return npy.where(npy.all(walkers >= 0, axis=1), log_prior, -npy.inf)
+
+
+class Product(Prior):
+    """Several priors applied together, usually to different parameters
+
+    Parameters
+    ----------
+    priors : List[Prior]
+        The priors to combine, each selecting its own parameters
+    """
+
+    def __init__(self, priors: List[Prior]):
+        super(Product, self).__init__()
+        self.__priors = []
+        for prior in priors:
+            if isinstance(prior, Product):
+                self.__priors.extend(prior.priors)
+            else:
+                self.__priors.append(prior)
+
+    @property
+    def priors(self) -> List[Prior]:
+        return list(self.__priors)
+
+    def _log_prior(self, walkers: npy.ndarray) -> npy.ndarray:
+        log_prior = npy.zeros(len(walkers))
+        for prior in self.__priors:
+            log_prior += prior(walkers)
+        return log_prior
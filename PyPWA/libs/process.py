@@ -32,7 +32,11 @@ File Layout
 - Templates and Abstract Classes
 - Predefined Types
 - Process creation functions
+- Shared memory
+- Memory mapped files
+- Updating data
 - Process and Interface Objects
+- Worker Pool
 
 
 Notes
@@ -41,12 +45,39 @@ Duplex processes will not shutdown automatically, you must shut them down
 from the returned interface object. This is done so that when new
 parameters are passed to the Duplex Processes there will not be an
 associated "startup" cost.
+
+A WorkerPool keeps its processes running between uses. Kernels and their
+data are loaded into the already running processes, and unloaded again
+when their interface is closed, so many short lived kernels can be run
+without paying for forking new processes each time.
+
+When use_shared_memory is enabled, the data is copied once into shared
+memory and each process only receives a small reference to its slice.
+The slices are rebuilt as views inside the process, so no further copies
+of the data are made no matter how many processes are used.
+
+Memory mapped arrays, numpy.memmap, are never copied into the processes.
+Each process receives the filename and the byte range of its slice, and
+maps only that range of the file itself. Memmaps that were opened for
+writing are mapped for writing in the processes too, so kernels can
+write their results straight into their slice of the file.
+
+Data on kernels that are already running can be replaced with update.
+The new data is split in the same way as the original data, and each
+process only receives its own slice, or a reference to it when shared
+memory is used. The kernel is told which data changed, while the rest of
+the kernel is left as it was.
 """
 
 import copy
+import gc
+import mmap
+import os
 from abc import ABC, abstractmethod
 from enum import Enum
-from multiprocessing import cpu_count, Pipe, Process
+from multiprocessing import (
+    cpu_count, Pipe, Process, resource_tracker, shared_memory
+)
 from queue import Queue
 from threading import Thread
 from multiprocessing.connection import Connection
@@ -105,6 +136,19 @@ class Kernel(ABC):
     def run(self, data: Any = False) -> Any:
         return self.process(data)
 
+    def updated(self, names: List[str]):
+        """
+        Called after update has replaced some of the kernel's data. Only
+        needs to be overridden when the kernel calculates something from
+        that data during setup.
+
+        Parameters
+        ----------
+        names : List[str]
+            The names of the data that were replaced
+        """
+        pass
+
     def close(self):
         pass
 
@@ -171,9 +215,15 @@ Process creation functions
 def make_processes(
         data: _data, template_kernel: Kernel,
         interface: Interface, number_of_processes: int = MAX_PROC,
-        use_duplex: bool = True, use_threads: bool = False
+        use_duplex: bool = True, use_threads: bool = False,
+        use_shared_memory: bool = False
 ) -> "ProcessInterface":
 
+    # Threads already share the parent's memory, so there's nothing to gain
+    shared = []
+    if use_shared_memory and not use_threads:
+        data, shared = _move_to_shared_memory(data)
+
     packets = _make_data_packets(data, number_of_processes)
     kernels = _create_kernels_containing_data(template_kernel, packets)
     processes, communication = _create_processes(
@@ -193,16 +243,18 @@ def make_processes(
     for process in processes:
         process.start()
 
-    return ProcessInterface(interface, communication, processes)
+    return ProcessInterface(interface, communication, processes, shared)
 
 
 def _make_data_packets(data: _data, number_of_processes: int) -> _data_packet:
     list_of_dicts = [dict() for i in range(number_of_processes)]
 
     for key in data.keys():
-        if isinstance(data[key], (npy.ndarray, pd.Series, pd.DataFrame)):
+        if _is_mapped(data[key]):
+            split = _split_mapped(data[key], number_of_processes)
+        elif isinstance(data[key], (npy.ndarray, pd.Series, pd.DataFrame)):
             split = npy.array_split(data[key], number_of_processes)
-        elif isinstance(data[key], vectors.ParticlePool):
+        elif isinstance(data[key], (vectors.ParticlePool, _SharedValue)):
             split = data[key].split(number_of_processes)
         else:
             raise ValueError(f"Unknown data {data[key]!r}")
@@ -312,6 +364,387 @@ def _get_queues_for_communication(
     return main, child  # type: ignore
 
 
+"""
+Shared memory
+"""
+
+
+# Blocks attached inside this process, kept open for as long as the views
+# built on top of them could still be in use.
+_ATTACHED_MEMORY: Dict[str, shared_memory.SharedMemory] = {}
+
+
+class _SharedKind(Enum):
+
+    ARRAY = 1
+    SERIES = 2
+    FRAME = 3
+    POOL = 4
+
+
+def _move_to_shared_memory(
+        data: _data
+) -> Tuple[_data, List["_SharedBlock"]]:
+    shared_data = dict()
+    blocks = []
+    for key, value in data.items():
+        if _is_mapped(value):
+            # Already backed by a file that every process can map
+            shared_data[key] = value
+            continue
+
+        try:
+            shared_data[key] = _SharedValue(value)
+        except TypeError:
+            # Mixed type DataFrames can't be viewed from a single block,
+            # so they're still split and copied into each process.
+            shared_data[key] = value
+        else:
+            blocks.extend(shared_data[key].blocks)
+    return shared_data, blocks
+
+
+def _split_bounds(length: int, count: int) -> List[Tuple[int, int]]:
+    # Matches the sizes produced by numpy.array_split
+    each, extra = divmod(length, count)
+    sizes = [each + 1] * extra + [each] * (count - extra)
+    bounds = npy.cumsum([0] + sizes)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class _SharedBlock:
+    """A single block of shared memory owned by the main process"""
+
+    def __init__(self, shape: Tuple[int, ...], dtype: npy.dtype):
+        size = int(npy.prod(shape)) * npy.dtype(dtype).itemsize
+        self.__memory = self.__allocate(size)
+        self.shape = shape
+        self.dtype = npy.dtype(dtype)
+        self.array = npy.ndarray(shape, dtype, buffer=self.__memory.buf)
+
+    @staticmethod
+    def __allocate(size: int) -> shared_memory.SharedMemory:
+        # Running out of space in /dev/shm results in a SIGBUS when the
+        # memory is touched, so it's better to fail before that happens.
+        if os.path.isdir("/dev/shm"):
+            stats = os.statvfs("/dev/shm")
+            if stats.f_bavail * stats.f_frsize < size:
+                raise MemoryError(
+                    f"/dev/shm does not have space for {size} bytes of "
+                    f"shared data!"
+                )
+        return shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+    @property
+    def name(self) -> str:
+        return self.__memory.name
+
+    def reference(self, axis: int, start: int, stop: int) -> "_Reference":
+        return _Reference(self.name, self.dtype, self.shape, axis, start, stop)
+
+    def release(self):
+        self.array = None
+        self.__memory.close()
+        self.__memory.unlink()
+
+
+class _Reference:
+    """Picklable reference to a slice of a block of shared memory"""
+
+    def __init__(
+            self, name: str, dtype: npy.dtype, shape: Tuple[int, ...],
+            axis: int, start: int, stop: int
+    ):
+        self.__name = name
+        self.__dtype = dtype
+        self.__shape = shape
+        self.__axis = axis
+        self.__start = start
+        self.__stop = stop
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    def attach(self) -> npy.ndarray:
+        if self.__name not in _ATTACHED_MEMORY:
+            _ATTACHED_MEMORY[self.__name] = shared_memory.SharedMemory(
+                self.__name
+            )
+
+        buffer = _ATTACHED_MEMORY[self.__name].buf
+        array = npy.ndarray(self.__shape, self.__dtype, buffer=buffer)
+
+        index = [slice(None)] * array.ndim
+        index[self.__axis] = slice(self.__start, self.__stop)
+        return array[tuple(index)]
+
+
+class _SharedValue:
+    """Copies a supported value into shared memory once
+
+    The value is split in the same way as it would be split without
+    shared memory, however each split is only a reference to its part
+    of the block that is rebuilt as a view inside of the process.
+    """
+
+    def __init__(self, value: _supported_types):
+        self.__meta = None
+        self.__index = None
+
+        if isinstance(value, vectors.ParticlePool):
+            self.__kind = _SharedKind.POOL
+            self.__length = value.event_count
+            self.__meta = [(p.id, p.charge) for p in value.iter_particles()]
+            self.blocks = []
+            for particle in value.iter_particles():
+                block = _SharedBlock((4, self.__length), npy.float64)
+                block.array[0] = particle._e
+                block.array[1] = particle._x
+                block.array[2] = particle._y
+                block.array[3] = particle._z
+                self.blocks.append(block)
+            self.__axis = 1
+
+        elif isinstance(value, pd.DataFrame):
+            if len(set(value.dtypes)) != 1:
+                raise TypeError("DataFrame must have a single dtype!")
+            self.__kind = _SharedKind.FRAME
+            self.__make_single_block(value.to_numpy())
+            self.__meta = value.columns
+            self.__index = value.index
+
+        elif isinstance(value, pd.Series):
+            self.__kind = _SharedKind.SERIES
+            self.__make_single_block(value.to_numpy())
+            self.__meta = value.name
+            self.__index = value.index
+
+        elif isinstance(value, npy.ndarray):
+            self.__kind = _SharedKind.ARRAY
+            self.__make_single_block(value)
+
+        else:
+            raise TypeError(f"Can not share {value!r}")
+
+    def __make_single_block(self, array: npy.ndarray):
+        block = _SharedBlock(array.shape, array.dtype)
+        block.array[...] = array
+        self.__length = len(array)
+        self.__axis = 0
+        self.blocks = [block]
+
+    def split(self, count: int) -> List["_SharedView"]:
+        views = []
+        for start, stop in _split_bounds(self.__length, count):
+            references = [
+                block.reference(self.__axis, start, stop)
+                for block in self.blocks
+            ]
+
+            index = None
+            if self.__index is not None:
+                index = self.__index[start:stop]
+
+            views.append(
+                _SharedView(self.__kind, references, self.__meta, index)
+            )
+        return views
+
+
+class _SharedView:
+    """A process's slice of a _SharedValue, rebuilt without copying"""
+
+    def __init__(
+            self, kind: _SharedKind, references: List[_Reference],
+            meta: Any = None, index: pd.Index = None
+    ):
+        self.__kind = kind
+        self.__references = references
+        self.__meta = meta
+        self.__index = index
+
+    @property
+    def names(self) -> List[str]:
+        return [reference.name for reference in self.__references]
+
+    def attach(self) -> _supported_types:
+        arrays = [reference.attach() for reference in self.__references]
+
+        if self.__kind == _SharedKind.POOL:
+            return vectors.ParticlePool([
+                vectors.Particle(pid, charge, *array)
+                for (pid, charge), array in zip(self.__meta, arrays)
+            ])
+        elif self.__kind == _SharedKind.FRAME:
+            return pd.DataFrame(
+                arrays[0], self.__index, self.__meta, copy=False
+            )
+        elif self.__kind == _SharedKind.SERIES:
+            return pd.Series(
+                arrays[0], self.__index, name=self.__meta, copy=False
+            )
+        return arrays[0]
+
+
+def _attach_shared_data(kernel: Kernel) -> List[str]:
+    # Replaces the references placed on the kernel with the actual views
+    names = []
+    for key, value in list(vars(kernel).items()):
+        if isinstance(value, _SharedView):
+            setattr(kernel, key, value.attach())
+            names.extend(value.names)
+        elif isinstance(value, _MappedRange):
+            setattr(kernel, key, value.attach())
+    return names
+
+
+def _detach_shared_data(names: List[str]):
+    for name in names:
+        memory = _ATTACHED_MEMORY.pop(name, None)
+        if memory is None:
+            continue
+
+        try:
+            memory.close()
+        except BufferError:
+            # Views stuck in reference cycles, anything still holding a
+            # view after that keeps the mapping alive until process exit.
+            gc.collect()
+            try:
+                memory.close()
+            except BufferError:
+                pass
+
+
+"""
+Memory mapped files
+"""
+
+
+def _is_mapped(value: Any) -> bool:
+    # Only memmaps that own their mapping have a known offset into the
+    # file, slices of a memmap are split like any other array.
+    return (
+        isinstance(value, npy.memmap) and value.filename is not None
+        and isinstance(value.base, mmap.mmap)
+        and value.flags.c_contiguous and value.ndim > 0
+    )
+
+
+def _split_mapped(value: npy.memmap, count: int) -> List["_MappedRange"]:
+    row_size = value.itemsize * int(npy.prod(value.shape[1:]))
+
+    # The file must not be truncated again when each process maps it
+    mode = "r+" if value.mode == "w+" else value.mode
+
+    ranges = []
+    for start, stop in _split_bounds(len(value), count):
+        ranges.append(_MappedRange(
+            value.filename, value.dtype,
+            (int(stop - start),) + value.shape[1:],
+            value.offset + int(start) * row_size, mode
+        ))
+    return ranges
+
+
+class _MappedRange:
+    """Picklable reference to a range of rows of a memory mapped file"""
+
+    def __init__(
+            self, filename: str, dtype: npy.dtype,
+            shape: Tuple[int, ...], offset: int, mode: str = "r"
+    ):
+        self.filename = filename
+        self.dtype = dtype
+        self.shape = shape
+        self.offset = offset
+        self.mode = mode
+
+    def attach(self) -> npy.ndarray:
+        # Numpy can't map an empty range, so an empty array stands in
+        if not self.shape[0]:
+            return npy.empty(self.shape, self.dtype)
+
+        return npy.memmap(
+            self.filename, self.dtype, self.mode, self.offset, self.shape
+        )
+
+
+"""
+Updating data
+"""
+
+
+class _DataUpdate:
+    """A process's slice of the data replacing its kernel's data"""
+
+    def __init__(self, packet: _data):
+        self.packet = packet
+
+
+def _make_update_packets(
+        data: _data, count: int, use_shared_memory: bool
+) -> Tuple[_data_packet, Dict[str, List[_SharedBlock]]]:
+    blocks = dict()
+    scalars = {k: v for k, v in data.items() if npy.ndim(v) == 0}
+    arrays = {k: v for k, v in data.items() if k not in scalars}
+
+    if use_shared_memory:
+        for key, value in list(arrays.items()):
+            shared, blocks[key] = _move_to_shared_memory({key: value})
+            arrays[key] = shared[key]
+
+    packets = _make_data_packets(arrays, count)
+    for packet in packets:
+        packet.update(scalars)
+    return packets, blocks
+
+
+def _replace_blocks(
+        owned: Dict[str, List[_SharedBlock]], names: List[str],
+        blocks: Dict[str, List[_SharedBlock]]
+):
+    # Only called once every process has let go of the replaced blocks
+    for name in names:
+        for block in owned.pop(name, []):
+            block.release()
+    owned.update(blocks)
+
+
+def _discard_blocks(blocks: Dict[str, List[_SharedBlock]]):
+    for name in list(blocks.keys()):
+        for block in blocks.pop(name):
+            block.release()
+
+
+def _apply_update(
+        kernel: Kernel, update: _DataUpdate, attached: Dict[str, List[str]]
+):
+    replaced = []
+    for key, value in update.packet.items():
+        replaced.extend(attached.pop(key, []))
+        if isinstance(value, _SharedView):
+            setattr(kernel, key, value.attach())
+            attached[key] = value.names
+        elif isinstance(value, _MappedRange):
+            setattr(kernel, key, value.attach())
+        else:
+            setattr(kernel, key, value)
+
+    kernel.updated(list(update.packet.keys()))
+    _detach_shared_data(replaced)
+
+
+def _wait_for_replies(connections: List[Any]) -> List[Exception]:
+    errors = []
+    for connection in connections:
+        reply = connection.recv()
+        if isinstance(reply, ProcessCodes):
+            errors.append(connection.recv())
+    return errors
+
+
 """
 Process and Interface Objects
 """
@@ -327,10 +760,13 @@ class ProcessInterface:
 
     def __init__(
             self, interface_kernel: Interface,
-            process_com: List[Connection], processes: List["_SmartProcess"]):
+            process_com: List[Connection], processes: List["_SmartProcess"],
+            shared: List[_SharedBlock] = None):
         self.__connections = process_com
         self.__interface = interface_kernel
         self.__processes = processes
+        self.__shared = shared if shared else []
+        self.__updates: Dict[str, List[_SharedBlock]] = dict()
 
     def run(self, *args):
         try:
@@ -339,6 +775,30 @@ class ProcessInterface:
             self.close()
             raise error
 
+    def update(self, data: _data, use_shared_memory: bool = False):
+        """Replaces data on the running kernels
+
+        Parameters
+        ----------
+        data : Dict[str, ndarray, Series, DataFrame, or ParticlePool]
+            The new data, split between the kernels in the same way as
+            the data they were created with.
+        use_shared_memory : bool, optional
+            Sends references to shared memory instead of the data itself
+        """
+        packets, blocks = _make_update_packets(
+            data, len(self.__connections), use_shared_memory
+        )
+        for connection, packet in zip(self.__connections, packets):
+            connection.send(_DataUpdate(packet))
+
+        errors = _wait_for_replies(self.__connections)
+        if errors:
+            _discard_blocks(blocks)
+            self.close()
+            raise errors[0]
+        _replace_blocks(self.__updates, list(data.keys()), blocks)
+
     def close(self):
         # Close the pipes and shutdown the processes
         for connection in self.__connections:
@@ -356,6 +816,12 @@ class ProcessInterface:
                 process.terminate()
             process.close()
 
+        # Only release the shared memory once nothing can be using it
+        for block in self.__shared:
+            block.release()
+        self.__shared = []
+        _discard_blocks(self.__updates)
+
     @property
     def is_alive(self) -> bool:
         return any([proc.is_alive() for proc in self.__processes])
@@ -367,16 +833,22 @@ class _SmartProcess(Process):
         super(_SmartProcess, self).__init__()
         self.__kernel = kernel
         self.__connection = connect
+        self.__attached: List[str] = []
+        self.__updated: Dict[str, List[str]] = dict()
         self.daemon = True
 
     def run(self):
-        if self.__connection.readable:
-            self.__run_duplex()
-        else:
-            self.__run_simplex()
+        try:
+            if self.__connection.readable:
+                self.__run_duplex()
+            else:
+                self.__run_simplex()
+        finally:
+            self.__detach()
 
     def __run_duplex(self):
         try:
+            self.__attached = _attach_shared_data(self.__kernel)
             self.__kernel.setup()
         except Exception as error:
             self.__handle_error(error)
@@ -390,7 +862,19 @@ class _SmartProcess(Process):
             if isinstance(r, ProcessCodes) and r == ProcessCodes.SHUTDOWN:
                 self.__connection.close()
                 break
-            self.__process(r)
+            elif isinstance(r, _DataUpdate):
+                self.__update(r)
+            else:
+                self.__process(r)
+
+    def __update(self, update: _DataUpdate):
+        try:
+            _apply_update(self.__kernel, update, self.__updated)
+        except Exception as error:
+            self.__handle_error(error)
+            raise
+        else:
+            self.__connection.send(True)
 
     def __process(self, received_data):
         try:
@@ -403,13 +887,360 @@ class _SmartProcess(Process):
 
     def __run_simplex(self):
         try:
+            self.__attached = _attach_shared_data(self.__kernel)
             self.__kernel.setup()
             self.__connection.send(self.__kernel.process())
         except Exception as error:
             self.__handle_error(error)
             raise
 
+    def __detach(self):
+        # The kernel holds the views, so it's dropped before the shared
+        # memory they point into is closed.
+        self.__kernel = None
+        _detach_shared_data(self.__attached)
+        for names in self.__updated.values():
+            _detach_shared_data(names)
+
     def __handle_error(self, error):
         self.__connection.send(ProcessCodes.ERROR)
         self.__connection.send(error)
         self.__connection.close()
+
+
+"""
+Worker Pool
+"""
+
+
+class _PoolCodes(Enum):
+
+    LOAD = 1
+    RUN = 2
+    UNLOAD = 3
+    UPDATE = 4
+
+
+class WorkerPool:
+    """A set of long lived processes that kernels can be loaded into.
+
+    Instead of forking new processes for every kernel like make_processes
+    does, the pool keeps its processes running, and kernels along with
+    their data are sent to them when attached. Closing the returned
+    interface only unloads the kernel, leaving the processes ready for
+    the next one.
+
+    Parameters
+    ----------
+    number_of_processes : int, optional
+        How many processes to keep running. Defaults to the number of
+        threads available on the machine.
+
+    Notes
+    -----
+    Data is pickled and sent through the pipes when attached, unless
+    use_shared_memory is set, in which case only references to the
+    shared memory are sent.
+
+    Several kernels can be attached at the same time, but the pool should
+    only be used from a single thread. Errors raised during setup are
+    raised from attach, however if a kernel raises an error while
+    processing, the whole pool is closed, since the remaining processes
+    could still have results waiting in their pipes.
+
+    Examples
+    --------
+    Reusing the same processes for several likelihoods
+
+    >>> with WorkerPool() as pool:
+    >>>     for bin_data in bins:
+    >>>         with LogLikelihood(amplitude, bin_data, pool=pool) as like:
+    >>>             minuit(settings, like).migrad()
+    """
+
+    def __init__(self, number_of_processes: int = MAX_PROC):
+        # The processes are forked before any shared memory exists, so
+        # the resource tracker is started first for them to inherit.
+        # Otherwise each process starts its own tracker, which tries to
+        # unlink the shared memory again at exit.
+        if os.name == "posix":
+            resource_tracker.ensure_running()
+
+        self.__connections, child = _get_pipes_for_communication(
+            number_of_processes, True
+        )
+
+        self.__processes = []
+        for connection in child:
+            worker = _PoolProcess(connection)
+            worker.start()
+            self.__processes.append(worker)
+
+        self.__attached = dict()
+        self.__updates = dict()
+        self.__next_key = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.__processes)
+
+    def attach(
+            self, data: _data, template_kernel: Kernel,
+            interface: Interface, use_duplex: bool = True,
+            use_shared_memory: bool = False
+    ) -> "_PoolInterface":
+        """Loads a kernel and its data into the running processes
+
+        Parameters
+        ----------
+        data : Dict[str, ndarray, DataFrame, or ParticlePool]
+            The data that will be split and placed onto each kernel
+        template_kernel : Kernel
+            The kernel that will be copied into each process
+        interface : Interface
+            The interface used to communicate with the kernels
+        use_duplex : bool, optional
+            If False, each kernel will process once as soon as it's
+            setup, and then be unloaded from the process.
+        use_shared_memory : bool, optional
+            Sends references to shared memory instead of the data itself
+
+        Returns
+        -------
+        _PoolInterface
+            Works the same as the ProcessInterface returned by
+            make_processes, except that closing it leaves the pool
+            running.
+
+        Notes
+        -----
+        The processes are already running, so the kernel and the data
+        are pickled to send them to the processes. Both need to be
+        picklable, which means the classes of the kernel and anything
+        it holds, such as an amplitude, can't be defined inside of a
+        function.
+        """
+        if not self.is_alive:
+            raise RuntimeError("WorkerPool has already been closed!")
+
+        shared = []
+        if use_shared_memory:
+            data, shared = _move_to_shared_memory(data)
+
+        packets = _make_data_packets(data, len(self.__processes))
+        kernels = _create_kernels_containing_data(template_kernel, packets)
+
+        key = self.__next_key
+        self.__next_key += 1
+        self.__attached[key] = shared
+        self.__updates[key] = dict()
+
+        connections = []
+        for index, (kernel, connection) in enumerate(
+                zip(kernels, self.__connections)):
+            kernel.PROCESS_ID = index
+            connection.send((_PoolCodes.LOAD, key, kernel, use_duplex))
+            connections.append(_PoolConnection(connection, key))
+
+        if use_duplex:
+            self.__wait_for_setup(key)
+        return _PoolInterface(self, key, interface, connections)
+
+    def __wait_for_setup(self, key: int):
+        # Every process replies once its kernel is setup, so that errors
+        # from setup are raised here instead of left waiting in the pipes.
+        errors = _wait_for_replies(self.__connections)
+        if errors:
+            self._detach(key)
+            raise errors[0]
+
+    def _update(self, key: int, data: _data, use_shared_memory: bool):
+        if key not in self.__attached:
+            raise RuntimeError("Kernel has already been detached!")
+
+        packets, blocks = _make_update_packets(
+            data, len(self.__processes), use_shared_memory
+        )
+        for connection, packet in zip(self.__connections, packets):
+            connection.send((_PoolCodes.UPDATE, key, _DataUpdate(packet)))
+
+        errors = _wait_for_replies(self.__connections)
+        if errors:
+            _discard_blocks(blocks)
+            raise errors[0]
+        _replace_blocks(self.__updates[key], list(data.keys()), blocks)
+
+    def _detach(self, key: int):
+        if key not in self.__attached:
+            return
+
+        for block in self.__attached.pop(key):
+            block.release()
+        _discard_blocks(self.__updates.pop(key, {}))
+
+        if self.is_alive:
+            for connection in self.__connections:
+                connection.send((_PoolCodes.UNLOAD, key))
+
+    def close(self):
+        """Shuts down the processes and releases all attached data"""
+        for connection in self.__connections:
+            if not connection.closed:
+                connection.send(ProcessCodes.SHUTDOWN)
+                connection.close()
+
+        for process in self.__processes:
+            process.join(2)
+
+        for process in self.__processes:
+            if process.is_alive():
+                process.terminate()
+
+        for key in list(self.__attached.keys()):
+            for block in self.__attached.pop(key):
+                block.release()
+            _discard_blocks(self.__updates.pop(key, {}))
+
+    @property
+    def is_alive(self) -> bool:
+        return any([proc.is_alive() for proc in self.__processes])
+
+
+class _PoolConnection:
+    """Tags everything sent through the pipe with the kernel's key"""
+
+    readable = True
+    writable = True
+
+    def __init__(self, connection: Connection, key: int):
+        self.__connection = connection
+        self.__key = key
+
+    def send(self, data: Any):
+        self.__connection.send((_PoolCodes.RUN, self.__key, data))
+
+    def recv(self) -> Any:
+        return self.__connection.recv()
+
+    def close(self):
+        pass
+
+
+class _PoolInterface:
+
+    def __init__(
+            self, pool: WorkerPool, key: int, interface_kernel: Interface,
+            connections: List[_PoolConnection]
+    ):
+        self.__pool = pool
+        self.__key = key
+        self.__interface = interface_kernel
+        self.__connections = connections
+
+    def run(self, *args):
+        try:
+            return self.__interface.run(self.__connections, *args)
+        except Exception as error:
+            self.__pool.close()
+            raise error
+
+    def update(self, data: _data, use_shared_memory: bool = False):
+        """Replaces data on the kernels loaded in the pool
+
+        Parameters
+        ----------
+        data : Dict[str, ndarray, Series, DataFrame, or ParticlePool]
+            The new data, split between the kernels in the same way as
+            the data they were loaded with.
+        use_shared_memory : bool, optional
+            Sends references to shared memory instead of the data itself
+        """
+        self.__pool._update(self.__key, data, use_shared_memory)
+
+    def close(self):
+        self.__pool._detach(self.__key)
+
+    @property
+    def is_alive(self) -> bool:
+        return self.__pool.is_alive
+
+
+class _PoolProcess(Process):
+
+    def __init__(self, connect: Connection):
+        super(_PoolProcess, self).__init__()
+        self.__connection = connect
+        self.__kernels: Dict[int, Kernel] = dict()
+        self.__attached: Dict[int, List[str]] = dict()
+        self.__updated: Dict[int, Dict[str, List[str]]] = dict()
+        self.daemon = True
+
+    def run(self):
+        while True:
+            message = self.__connection.recv()
+            if isinstance(message, ProcessCodes) and \
+                    message == ProcessCodes.SHUTDOWN:
+                self.__connection.close()
+                break
+
+            code, key = message[0], message[1]
+            if code == _PoolCodes.LOAD:
+                self.__load(key, *message[2:])
+            elif code == _PoolCodes.RUN:
+                self.__process(key, message[2])
+            elif code == _PoolCodes.UNLOAD:
+                self.__unload(key)
+            elif code == _PoolCodes.UPDATE:
+                self.__update(key, message[2])
+
+    def __load(self, key: int, kernel: Kernel, is_duplex: bool):
+        try:
+            self.__attached[key] = _attach_shared_data(kernel)
+            kernel.setup()
+            if is_duplex:
+                self.__kernels[key] = kernel
+                self.__connection.send(True)
+            else:
+                self.__connection.send(kernel.process())
+        except Exception as error:
+            self.__handle_error(error)
+
+        if not is_duplex:
+            del kernel
+            self.__unload(key)
+
+    def __process(self, key: int, received_data: Any):
+        try:
+            value = self.__kernels[key].process(received_data)
+        except Exception as error:
+            self.__handle_error(error)
+        else:
+            self.__connection.send(value)
+
+    def __update(self, key: int, update: _DataUpdate):
+        try:
+            _apply_update(
+                self.__kernels[key], update,
+                self.__updated.setdefault(key, dict())
+            )
+        except Exception as error:
+            self.__handle_error(error)
+        else:
+            self.__connection.send(True)
+
+    def __unload(self, key: int):
+        self.__kernels.pop(key, None)
+        _detach_shared_data(self.__attached.pop(key, []))
+        for names in self.__updated.pop(key, {}).values():
+            _detach_shared_data(names)
+
+    def __handle_error(self, error: Exception):
+        # The process stays alive, it's up to the pool to decide whether
+        # it should shutdown.
+        self.__connection.send(ProcessCodes.ERROR)
+        self.__connection.send(error)
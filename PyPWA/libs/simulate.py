@@ -18,17 +18,42 @@
 
 """
 Defines how the simulation works for PyPWA
+
+Phase space Monte Carlo is generated with generate_phase_space, which
+produces ParticlePools directly instead of reading them from files, and
+simulate_to_yield generates and simulates batches of phase space until
+a requested number of events have been accepted.
+
+The simulation runs in two passes inside the processes. The first
+calculates the intensities and returns only each process's max, and the
+second rejects each process's events against the global max with its
+own random stream, returning the rejection list packed into bits.
+Memory mapped data, files, and readers are streamed through the same
+two passes one chunk at a time, with the intensities and rejection list
+written to files, so the memory used never depends on the number of
+events.
+
+Instead of rejecting, process_user_function can return the intensities
+as weights, which resample draws as many unweighted samples from as
+needed.
 """
 
 import multiprocessing
-from typing import Any, Dict, List, Union, Tuple
+import shutil
+import tempfile
+import weakref
+from pathlib import Path
+from typing import (
+    Any, Dict, List, NamedTuple, Optional as Opt, Union, Tuple
+)
 
 import numpy as np
 import numpy as npy
 import pandas as pd
 
 from PyPWA import info as _info
-from PyPWA.libs import process
+from PyPWA.libs import file, process, vectors
+from PyPWA.libs.file.processor.templates import ReaderBase, WriterBase
 from PyPWA.libs.fit import likelihoods
 
 
@@ -37,39 +62,73 @@ __author__ = _info.AUTHOR
 __version__ = _info.VERSION
 
 
+_IN_MEMORY = (npy.ndarray, pd.DataFrame, vectors.ParticlePool)
+_in_memory = Union[npy.ndarray, pd.DataFrame, vectors.ParticlePool]
+_streamable = Union[npy.memmap, ReaderBase, str, Path]
+
+
 def monte_carlo_simulation(
         amplitude: likelihoods.NestedFunction,
-        data: Union[npy.ndarray, pd.DataFrame],
+        data: Union[_in_memory, _streamable],
         params: Dict[str, float] = None,
-        processes: int = multiprocessing.cpu_count()) -> npy.ndarray:
+        processes: int = multiprocessing.cpu_count(),
+        pool: process.WorkerPool = None,
+        chunk_size: int = 100_000,
+        output: Opt[Union[str, Path]] = None,
+        seed: Opt[int] = None) -> npy.ndarray:
     """Produces the rejection list
     This takes a user defined intensity object along with it's
     associated data, and generates a pass/fail array to be used to
     mask any dataset of the same length as data.
 
+    Memory mapped data, files, and readers are streamed instead of being
+    loaded. The amplitude is handed plain numpy arrays of at most
+    chunk_size events, and the rejection list is written to a file that
+    is memory mapped.
+
     Parameters
     ----------
     amplitude : Amplitude derived from AbstractAmplitude
         A user defined amplitude or pre-made PyPWA amplitude that you
         wish to carve your data with.
-    data : Structured Array, DataFrame, or BaseFolder from Project
+    data : Structured Array, DataFrame, ParticlePool, memmap, ReaderBase,
+        str, or Path
         This is the data you want to be passed to the `setup` function
-        of your amplitude. If you provide a Structured Array or DataFrame
-        the entire calculation will occur in memory with the selected
-        number of processes. If you provide a Project BaseFolder the
-        calculation will rely entirely on the Amplitude.
+        of your amplitude. If you provide a Structured Array, DataFrame,
+        or ParticlePool the entire calculation will occur in memory with
+        the selected number of processes. Memory mapped arrays, readers from
+        `file.get_reader`, and filenames are streamed one chunk at a
+        time instead, see `file.memory_map` for how files are mapped.
     params : Dict[str, float], optional
          An optional dictionary of parameters that will be passed to the
          AbstractAmplitude's `calculate` function.
     processes : int, optional
         Selects the number of processes to run with, defaults to the
         number of processes detected through multiprocessing
+    pool : process.WorkerPool, optional
+        A running WorkerPool to calculate with instead of spawning new
+        processes. When provided, processes is ignored.
+    chunk_size : int, optional
+        The most events the amplitude is handed at once when streaming.
+        Defaults to 100,000.
+    output : str or Path, optional
+        The '.npy' file the rejection list is written to when streaming.
+        Defaults to a temporary file that's removed once the returned
+        array is no longer used.
+    seed : int, optional
+        Seed for the random numbers. Each process draws from its own
+        stream spawned from the seed, so the same seed and number of
+        processes reproduce the same rejection list. Without a seed, the
+        streams are seeded from numpy's global random state, so
+        `npy.random.seed` also reproduces the rejection list, though not
+        the same list the single stream of earlier versions produced.
 
     Returns
     -------
     boolean npy.ndarray
         A masking array that can be used with any DataFrame or Structured
-        Array to cut the events to the generated shape
+        Array to cut the events to the generated shape. It's a read only
+        memmap when the data was streamed.
 
     Raises
     ------
@@ -83,63 +142,134 @@ def monte_carlo_simulation(
 
     >>> rejection = monte_carlo_simulation(Amplitude(), data)
     >>> carved = data[rejection]
+
+    Streaming a file too large for memory, and writing the rejection list
+    next to it
+
+    >>> rejection = monte_carlo_simulation(
+    >>>     Amplitude(), "large.csv", output="rejection.npy"
+    >>> )
     """
-    intensity, max_value = process_user_function(
-        amplitude, data, params, processes
-    )
-    return make_rejection_list(intensity, max_value)
+    if _is_streamed(data):
+        filename, temporary = _result_file(output, "rejection")
+        with tempfile.TemporaryDirectory(prefix="pypwa-") as directory:
+            data = _map(data, Path(directory))
+            intensities = _open_result(
+                Path(directory) / "intensities.npy", npy.float64, len(data)
+            )
+            _stream(
+                amplitude, data, params, processes, pool, chunk_size,
+                intensities, _open_result(filename, bool, len(data)), seed
+            )
+            del data, intensities
+        return _load_result(filename, temporary)
+
+    elif isinstance(data, _IN_MEMORY):
+        return _in_memory_rejection(
+            amplitude, data, params, processes, pool, seed
+        )
+    raise ValueError("Unknown data type!")
 
 
 def process_user_function(amplitude: likelihoods.NestedFunction,
-        data: Union[npy.ndarray, pd.DataFrame],
+        data: Union[_in_memory, _streamable],
         params: Dict[str, float] = None,
-        processes: int = multiprocessing.cpu_count()
+        processes: int = multiprocessing.cpu_count(),
+        pool: process.WorkerPool = None,
+        chunk_size: int = 100_000,
+        output: Opt[Union[str, Path]] = None,
+        weighted: bool = False
 ) -> Tuple[npy.ndarray, float]:
     """Produces an array of values for the calculated function.
 
+    Memory mapped data, files, and readers are streamed one chunk at a
+    time, with the values written to a file that is memory mapped.
+
+    When weighted, the values are returned as float32 weights scaled to
+    a mean of one instead, which can be resampled as many times as
+    needed with `resample` without calculating the function again.
+
     Parameters
     ----------
     amplitude : Amplitude derived from AbstractAmplitude
         A user defined amplitude or pre-made PyPWA amplitude that you
         wish to carve your data with.
-    data : Structured Array, DataFrame, or BaseFolder from Project
+    data : Structured Array, DataFrame, ParticlePool, memmap, ReaderBase,
+        str, or Path
         This is the data you want to be passed to the `setup` function
-        of your amplitude. If you provide a Structured Array or DataFrame
-        the entire calculation will occur in memory with the selected
-        number of processes. If you provide a Project BaseFolder the
-        calculation will rely entirely on the Amplitude.
+        of your amplitude. If you provide a Structured Array, DataFrame,
+        or ParticlePool the entire calculation will occur in memory with
+        the selected number of processes. Memory mapped arrays, readers from
+        `file.get_reader`, and filenames are streamed one chunk at a
+        time instead.
     params : Dict[str, float], optional
          An optional dictionary of parameters that will be passed to the
          AbstractAmplitude's `calculate` function.
     processes : int, optional
         Selects the number of processes to run with, defaults to the
         number of processes detected through multiprocessing
+    pool : process.WorkerPool, optional
+        A running WorkerPool to calculate with instead of spawning new
+        processes. When provided, processes is ignored.
+    chunk_size : int, optional
+        The most events the amplitude is handed at once when streaming.
+        Defaults to 100,000.
+    output : str or Path, optional
+        The '.npy' file the values are written to when streaming.
+        Defaults to a temporary file that's removed once the returned
+        array is no longer used.
+    weighted : bool, optional
+        Returns the values as float32 weights with a mean of one,
+        defaults to False.
 
     Returns
     -------
     (float npy.ndarray, float)
         The final values computed from the user's function and the max
-        value computed for that dataset.
+        value computed for that dataset, or the weights and the largest
+        weight when weighted. The values are a read only memmap when the
+        data was streamed.
 
     Raises
     ------
     ValueError
         If the data is not understood. If you received this, check your
-        data to ensure its a supported type
+        data to ensure its a supported type. Also raised when weighted
+        and the values don't have a positive sum.
     """
-    if isinstance(data, (npy.ndarray, pd.DataFrame)):
-        intensity = _in_memory_intensities(amplitude, data, params, processes)
+    if _is_streamed(data):
+        filename, temporary = _result_file(output, "intensities")
+        dtype = npy.float32 if weighted else npy.float64
+        with tempfile.TemporaryDirectory(prefix="pypwa-") as directory:
+            data = _map(data, Path(directory))
+            intensity = _open_result(filename, dtype, len(data))
+            max_value = _stream(
+                amplitude, data, params, processes, pool, chunk_size,
+                intensity
+            )
+            if weighted:
+                max_value /= _normalize(intensity, chunk_size)
+            del data, intensity
+        return _load_result(filename, temporary), max_value
+    elif isinstance(data, _IN_MEMORY):
+        intensity = _in_memory_intensities(
+            amplitude, data, params, processes, pool
+        )
     else:
         raise ValueError("Unknown data type!")
 
+    if weighted:
+        intensity = intensity.astype(npy.float32)
+        _normalize(intensity, chunk_size)
     return intensity, intensity.max()
 
 
 def _in_memory_intensities(
         amplitude: likelihoods.NestedFunction,
-        data: Union[npy.ndarray, pd.DataFrame],
+        data: _in_memory,
         params: Union[Dict[str, float], np.ndarray],
-        processes: int
+        processes: int,
+        pool: process.WorkerPool = None
 ) -> npy.ndarray:
 
     kernel = _Kernel(amplitude, params)
@@ -151,14 +281,165 @@ def _in_memory_intensities(
         return kernel.run()[1]
 
     interface = _Interface()
-    manager = process.make_processes(
-        {"data": data}, kernel, interface, processes,
-        False, amplitude.USE_THREADS
-    )
+    if pool is not None and not amplitude.USE_THREADS:
+        manager = pool.attach(
+            {"data": data}, kernel, interface,
+            False, amplitude.USE_SHARED_MEMORY
+        )
+    else:
+        manager = process.make_processes(
+            {"data": data}, kernel, interface, processes,
+            False, amplitude.USE_THREADS, amplitude.USE_SHARED_MEMORY
+        )
     result = manager.run()
     manager.close()
     return result
 
+
+def _is_streamed(data: Any) -> bool:
+    return isinstance(data, (npy.memmap, ReaderBase, str, Path))
+
+
+def _map(data: _streamable, directory: Path) -> npy.ndarray:
+    if isinstance(data, npy.memmap):
+        return data
+    return file.memory_map(data, directory / "data.npy")
+
+
+def _open_result(
+        filename: Path, dtype: npy.dtype, length: int
+) -> npy.memmap:
+    return npy.lib.format.open_memmap(str(filename), "w+", dtype, (length,))
+
+
+def _result_file(
+        output: Opt[Union[str, Path]], name: str
+) -> Tuple[Path, bool]:
+    if output is not None:
+        return Path(output), False
+    return Path(tempfile.mkdtemp(prefix="pypwa-")) / f"{name}.npy", True
+
+
+def _load_result(filename: Path, temporary: bool) -> npy.memmap:
+    result = npy.load(str(filename), mmap_mode="r")
+    if temporary:
+        # The file is removed once nothing is using the result anymore
+        weakref.finalize(result, shutil.rmtree, str(filename.parent), True)
+    return result
+
+
+def _stream(
+        amplitude: likelihoods.NestedFunction, data: npy.ndarray,
+        params: Union[Dict[str, float], np.ndarray],
+        processes: int, pool: Opt[process.WorkerPool], chunk_size: int,
+        intensities: npy.memmap, mask: Opt[npy.memmap] = None,
+        seed: Opt[int] = None
+) -> float:
+    kernel = _StreamingKernel(amplitude, params, chunk_size)
+    arrays = {"data": data, "intensities": intensities}
+    if mask is not None:
+        arrays["mask"] = mask
+
+    # Everything is already memory mapped, so nothing is shared
+    manager, count = _start_kernels(
+        kernel, arrays, _process_count(amplitude, processes), pool,
+        amplitude.USE_THREADS
+    )
+    try:
+        max_value = max(manager.run(_CALCULATE))
+        if mask is not None:
+            manager.run(_Rejection(max_value, _spawn_seeds(seed, count)))
+    finally:
+        manager.close()
+    return max_value
+
+
+def _normalize(weights: npy.ndarray, chunk_size: int) -> float:
+    # Scales the weights in place to a mean of one, returning the mean
+    starts = range(0, len(weights), chunk_size)
+    total = sum(
+        npy.sum(weights[start:start + chunk_size], dtype=npy.float64)
+        for start in starts
+    )
+    if not total > 0:
+        raise ValueError("Weights need a positive sum!")
+
+    mean = total / len(weights)
+    for start in starts:
+        weights[start:start + chunk_size] /= mean
+    _flush(weights)
+    return mean
+
+
+def _in_memory_rejection(
+        amplitude: likelihoods.NestedFunction,
+        data: _in_memory,
+        params: Union[Dict[str, float], np.ndarray],
+        processes: int, pool: Opt[process.WorkerPool], seed: Opt[int]
+) -> npy.ndarray:
+    kernel = _RejectionKernel(amplitude, params)
+    manager, count = _start_kernels(
+        kernel, {"data": data}, _process_count(amplitude, processes), pool,
+        amplitude.USE_THREADS, amplitude.USE_SHARED_MEMORY
+    )
+    try:
+        max_value = max(manager.run(_CALCULATE))
+        packed = manager.run(_Rejection(max_value, _spawn_seeds(seed, count)))
+    finally:
+        manager.close()
+
+    return npy.concatenate([
+        npy.unpackbits(bits, count=length).view(bool)
+        for bits, length in packed
+    ])
+
+
+def _spawn_seeds(
+        seed: Opt[int], count: int
+) -> List[npy.random.SeedSequence]:
+    # Without a seed the streams are seeded from numpy's global random
+    # state, so npy.random.seed still reproduces the rejection list
+    if seed is None:
+        seed = npy.random.randint(0, 2 ** 32, 4, dtype=npy.int64)
+    return npy.random.SeedSequence(seed).spawn(count)
+
+
+def _process_count(
+        amplitude: likelihoods.NestedFunction, processes: int
+) -> int:
+    # No processes are used when the amplitude can't be run in parallel
+    no_parallel = not amplitude.USE_MP and not amplitude.USE_THREADS
+    if no_parallel or amplitude.DEBUG:
+        return 0
+    return processes
+
+
+def _start_kernels(
+        kernel: process.Kernel, data: Dict[str, Any], processes: int,
+        pool: Opt[process.WorkerPool], use_threads: bool = False,
+        use_shared_memory: bool = False
+) -> Tuple[Any, int]:
+    # Returns the running kernels along with how many there are
+    if processes == 0:
+        for name, value in data.items():
+            setattr(kernel, name, value)
+        kernel.setup()
+        return _SingleKernel(kernel), 1
+
+    interface = _DuplexInterface()
+    if pool is not None and not use_threads:
+        manager = pool.attach(
+            data, kernel, interface, True, use_shared_memory
+        )
+        return manager, len(pool)
+
+    manager = process.make_processes(
+        data, kernel, interface, processes,
+        True, use_threads, use_shared_memory
+    )
+    return manager, processes
+
+
 def make_rejection_list(
         intensities: npy.ndarray,
         max_value: Union[List[float], npy.ndarray, float]
@@ -189,6 +470,352 @@ def make_rejection_list(
     return (intensities / max_value) > random_numbers
 
 
+def resample(
+        weights: npy.ndarray, events: int, datasets: int = 1,
+        seed: Opt[int] = None, chunk_size: int = 100_000
+) -> npy.ndarray:
+    """Draws unweighted samples of events from their weights.
+
+    Uses systematic resampling, which places events evenly spaced
+    points along the cumulative weights, all shifted by a single random
+    offset. Every event is drawn either the floor or the ceiling of its
+    expected number of times, so each sample follows the weights more
+    closely than drawing the events independently. The weights are read
+    one chunk at a time, so they can be a memory mapped array.
+
+    Parameters
+    ----------
+    weights : npy.ndarray
+        The weight of each event, such as the weights from
+        process_user_function. They don't need to be normalized, but
+        can't be negative.
+    events : int
+        The number of events in each sample
+    datasets : int, optional
+        How many independent samples to draw, defaults to 1.
+    seed : int, optional
+        Seed for the random offset of each sample
+    chunk_size : int, optional
+        How many weights are read at once, defaults to 100,000.
+
+    Returns
+    -------
+    int npy.ndarray
+        The index of every drawn event, with a row of indices
+        for each dataset. Each row is sorted, and events with a large
+        weight can be drawn more than once.
+
+    Raises
+    ------
+    ValueError
+        If the weights don't have a positive sum.
+
+    Examples
+    --------
+    Making a hundred pseudo-datasets from a single calculation
+
+    >>> weights, max_weight = process_user_function(
+    >>>     Amplitude(), data, weighted=True
+    >>> )
+    >>> for indices in resample(weights, 10_000, 100):
+    >>>     pseudo_data = data.iloc[indices]
+    """
+    starts = range(0, len(weights), chunk_size)
+
+    # The total is summed the same way the chunks are below, so the last
+    # point always falls inside the last chunk
+    total = 0.
+    for start in starts:
+        chunk = weights[start:start + chunk_size]
+        total = total + npy.cumsum(chunk, dtype=npy.float64)[-1]
+    if not total > 0:
+        raise ValueError("Weights need a positive sum!")
+
+    generator = npy.random.default_rng(seed)
+    offsets = generator.random((datasets, 1))
+    points = (npy.arange(events) + offsets) * (total / events)
+    points = npy.minimum(points, npy.nextafter(total, 0))
+
+    indices = npy.empty((datasets, events), npy.int64)
+    lower = 0.
+    for start in starts:
+        cumulative = lower + npy.cumsum(
+            weights[start:start + chunk_size], dtype=npy.float64
+        )
+        for row, comb in zip(indices, points):
+            first, last = npy.searchsorted(comb, [lower, cumulative[-1]])
+            row[first:last] = start + npy.searchsorted(
+                cumulative, comb[first:last], "right"
+            )
+        lower = cumulative[-1]
+    return indices
+
+
+class ParticleSpec(NamedTuple):
+    """A particle for generate_phase_space
+
+    Parameters
+    ----------
+    particle_id : int
+        The GEANT particle ID, the same IDs used by GAMP files
+    charge : int
+        The particle's charge
+    mass : float
+        The particle's mass in GeV
+    """
+    particle_id: int
+    charge: int
+    mass: float
+
+
+_PHOTON = ParticleSpec(1, 0, 0.)
+_PROTON = ParticleSpec(14, 1, .9382720813)
+
+
+def generate_phase_space(
+        events: int, beam_energy: float, final_state: List[ParticleSpec],
+        beam: ParticleSpec = _PHOTON, target: ParticleSpec = _PROTON,
+        seed: Opt[int] = None,
+        processes: int = multiprocessing.cpu_count(),
+        pool: process.WorkerPool = None,
+        chunk_size: int = 100_000
+) -> vectors.ParticlePool:
+    """Generates events evenly distributed in n-body phase space
+
+    The beam travels along z onto the target at rest. Each process
+    generates its share of the events with the Raubold-Lynch method, one
+    chunk of events at a time, and keeps each event with a probability of
+    its phase space weight over the largest possible weight, so the
+    returned events are unweighted.
+
+    Parameters
+    ----------
+    events : int
+        How many events to generate
+    beam_energy : float
+        The energy of the beam in the lab frame, in GeV
+    final_state : List[ParticleSpec]
+        The particles the beam and target produce, at least two. Tuples
+        of the particle ID, charge, and mass work as well.
+    beam : ParticleSpec, optional
+        The beam particle, defaults to a photon.
+    target : ParticleSpec, optional
+        The target particle, defaults to a proton.
+    seed : int, optional
+        Seed for the events. Each process draws from its own stream
+        spawned from the seed, so the same seed and number of processes
+        reproduce the same events.
+    processes : int, optional
+        Selects the number of processes to run with, defaults to the
+        number of processes detected through multiprocessing. When set
+        to zero, the events are generated in this process.
+    pool : process.WorkerPool, optional
+        A running WorkerPool to generate with instead of spawning new
+        processes. When provided, processes is ignored.
+    chunk_size : int, optional
+        The most events each process generates at once. Defaults to
+        100,000.
+
+    Returns
+    -------
+    ParticlePool
+        The beam followed by the final state particles, in the lab frame.
+        Like GAMP files, the target isn't included.
+
+    Raises
+    ------
+    ValueError
+        If there are fewer than two final state particles, or the beam
+        energy is below the threshold for the final state.
+
+    Examples
+    --------
+    Generating photoproduction of two pions off of a proton
+
+    >>> final_state = [
+    >>>     ParticleSpec(14, 1, .938272), ParticleSpec(8, 1, .139570),
+    >>>     ParticleSpec(9, -1, .139570)
+    >>> ]
+    >>> pions = generate_phase_space(100_000, 8.5, final_state)
+    >>> rejection = monte_carlo_simulation(amplitude, pions, params)
+    """
+    phase_space = _PhaseSpace(
+        beam_energy, final_state, beam, target, chunk_size
+    )
+    kernel = _PhaseSpaceKernel(phase_space)
+    manager, count = _start_kernels(kernel, {}, processes, pool)
+    try:
+        each, extra = divmod(events, count)
+        quotas = [each + 1] * extra + [each] * (count - extra)
+        seeds = npy.random.SeedSequence(seed).spawn(count)
+        momenta = npy.concatenate(
+            manager.run(_Generate(quotas, seeds)), axis=2
+        )
+    finally:
+        manager.close()
+
+    return phase_space.make_pool(momenta)
+
+
+class SimulationYield(NamedTuple):
+    """The summary of simulate_to_yield
+
+    Attributes
+    ----------
+    accepted : int
+        How many events were written
+    generated : int
+        How many phase space events were generated to accept them, for
+        use as the generated length of the extended log likelihood.
+    max_intensity : float
+        The final estimate of the max intensity
+    overweight : int
+        How many events were found above the max estimate, and so were
+        written more than once to correct for the estimate being low.
+    """
+    accepted: int
+    generated: int
+    max_intensity: float
+    overweight: int
+
+
+def simulate_to_yield(
+        amplitude: likelihoods.NestedFunction,
+        params: Dict[str, float], events: int, beam_energy: float,
+        final_state: List[ParticleSpec], output: Union[str, Path, WriterBase],
+        beam: ParticleSpec = _PHOTON, target: ParticleSpec = _PROTON,
+        safety: float = 1.1, batch_size: int = 100_000,
+        seed: Opt[int] = None,
+        processes: int = multiprocessing.cpu_count(),
+        pool: process.WorkerPool = None
+) -> SimulationYield:
+    """Simulates phase space until the requested events are accepted
+
+    Each process generates a batch of phase space events, calculates
+    their intensities, and rejects them against a running estimate of
+    the max intensity, sending back only the accepted events. The
+    accepted events are written as they arrive, and batches are
+    generated until there are enough.
+
+    The first batch only estimates the max intensity, which is its
+    largest intensity multiplied by safety. Whenever a batch finds a
+    larger intensity the estimate is raised to that intensity multiplied
+    by safety. Events above the estimate are written once for every
+    multiple of the estimate they reach, plus once more with probability
+    of what's left, which keeps the events unbiased even though the
+    estimate was too low when they were accepted.
+
+    Parameters
+    ----------
+    amplitude : Amplitude derived from AbstractAmplitude
+        The amplitude to simulate, which receives a ParticlePool of each
+        batch in setup.
+    params : Dict[str, float]
+        The parameters passed to the amplitude's calculate
+    events : int
+        How many accepted events to write
+    beam_energy : float
+        The energy of the beam in the lab frame, in GeV
+    final_state : List[ParticleSpec]
+        The particles the beam and target produce, at least two.
+    output : str, Path, or WriterBase
+        The file to write the events to, or a writer from
+        `file.get_writer`, which is left open.
+    beam : ParticleSpec, optional
+        The beam particle, defaults to a photon.
+    target : ParticleSpec, optional
+        The target particle, defaults to a proton.
+    safety : float, optional
+        How far above the largest intensity seen the max estimate is
+        placed, defaults to 1.1.
+    batch_size : int, optional
+        How many phase space events each process generates at a time,
+        defaults to 100,000.
+    seed : int, optional
+        Seed for the events. Each process draws from its own stream
+        spawned from the seed, so the same seed and number of processes
+        reproduce the same events.
+    processes : int, optional
+        Selects the number of processes to run with, defaults to the
+        number of processes detected through multiprocessing
+    pool : process.WorkerPool, optional
+        A running WorkerPool to simulate with instead of spawning new
+        processes. When provided, processes is ignored.
+
+    Returns
+    -------
+    SimulationYield
+        How many events were accepted and generated, the final max
+        estimate, and how many events were above the estimate.
+
+    Raises
+    ------
+    ValueError
+        If the final state can't be produced, or the intensity of the
+        first batch is never positive.
+
+    See Also
+    --------
+    generate_phase_space : For only generating the phase space
+
+    Examples
+    --------
+    >>> summary = simulate_to_yield(
+    >>>     amplitude, params, 100_000, 8.5, final_state, "accepted.gamp"
+    >>> )
+    >>> summary.generated
+    """
+    phase_space = _PhaseSpace(
+        beam_energy, final_state, beam, target, batch_size
+    )
+    kernel = _YieldKernel(amplitude, params, phase_space, batch_size)
+    manager, count = _start_kernels(
+        kernel, {}, _process_count(amplitude, processes), pool,
+        amplitude.USE_THREADS
+    )
+
+    writer = output
+    accepted, generated, overweight = 0, 0, 0
+    try:
+        if not isinstance(output, WriterBase):
+            writer = file.get_writer(output, file.DataType.TREE_VECTOR)
+
+        seeds = npy.random.SeedSequence(seed).spawn(count)
+        replies = manager.run(_Batch(None, seeds))
+        max_value = safety * max(reply[2] for reply in replies)
+        if not max_value > 0:
+            raise ValueError("The intensity must be positive for some events!")
+
+        while accepted < events:
+            replies = manager.run(_Batch(max_value, seeds))
+            for momenta, positions, _, found in replies:
+                needed = events - accepted
+                if len(positions) >= needed:
+                    momenta = momenta[:, :, :needed]
+                    generated += int(positions[needed - 1]) + 1
+                else:
+                    generated += batch_size
+
+                for event in phase_space.make_pool(momenta).iter_events():
+                    writer.write(event)
+                accepted += momenta.shape[2]
+                overweight += found
+
+                if accepted == events:
+                    break
+
+            # Raise the estimate above everything that has been seen
+            highest = max(reply[2] for reply in replies)
+            if highest > max_value:
+                max_value = safety * highest
+    finally:
+        manager.close()
+        if writer is not output:
+            writer.close()
+
+    return SimulationYield(accepted, generated, max_value, overweight)
+
+
 class _Kernel(process.Kernel):
 
     def __init__(
@@ -230,3 +857,404 @@ class _Interface(process.Interface):
 
             list_of_data[data[0]] = data[1]
         return list_of_data
+
+
+"""
+Rejection inside the processes
+"""
+
+
+class _Rejection:
+    """Asks the kernels to reject their events against the global max"""
+
+    def __init__(
+            self, max_value: float, seeds: List[npy.random.SeedSequence]
+    ):
+        self.max_value = max_value
+        self.seeds = seeds
+
+
+_CALCULATE = "calculate"
+
+
+def _reject(
+        intensities: npy.ndarray, max_value: float,
+        generator: npy.random.Generator
+) -> npy.ndarray:
+    random_numbers = generator.random(len(intensities))
+    return (intensities / max_value) > random_numbers
+
+
+def _local_max(intensities: npy.ndarray) -> float:
+    # Processes can be left without any events
+    return npy.max(intensities) if len(intensities) else -npy.inf
+
+
+class _RejectionKernel(process.Kernel):
+
+    def __init__(
+            self,
+            amplitude: likelihoods.NestedFunction,
+            parameters: Dict[str, float]):
+        self.__amplitude = amplitude
+        self.__parameters = parameters
+        self.__intensities: Opt[npy.ndarray] = None
+        self.data: npy.ndarray = None
+
+    def setup(self):
+        self.__amplitude.THREAD = self.PROCESS_ID
+        self.__amplitude.setup(self.data)
+
+    def process(self, data: Any = False) -> Any:
+        if isinstance(data, _Rejection):
+            generator = npy.random.default_rng(data.seeds[self.PROCESS_ID])
+            mask = _reject(self.__intensities, data.max_value, generator)
+            self.__intensities = None
+            return npy.packbits(mask), len(mask)
+
+        calculated = self.__amplitude.calculate(self.__parameters)
+        if self.__amplitude.USE_TORCH:
+            calculated = calculated.cpu().detach().numpy()
+
+        self.__intensities = npy.asarray(calculated)
+        return _local_max(self.__intensities)
+
+
+class _StreamingKernel(process.Kernel):
+
+    def __init__(
+            self,
+            amplitude: likelihoods.NestedFunction,
+            parameters: Dict[str, float],
+            chunk_size: int):
+        self.__amplitude = amplitude
+        self.__parameters = parameters
+        self.__chunk_size = chunk_size
+
+        # These are set by the process lib, and are memory mapped
+        self.data: npy.ndarray = None
+        self.intensities: npy.ndarray = None
+        self.mask: Opt[npy.ndarray] = None
+
+    def setup(self):
+        self.__amplitude.THREAD = self.PROCESS_ID
+
+    def process(self, data: Any = False) -> Any:
+        if isinstance(data, _Rejection):
+            return self.__reject(data)
+        return self.__calculate()
+
+    def __calculate(self) -> float:
+        max_value = -npy.inf
+        for bounds in self.__chunks():
+            self.__amplitude.setup(npy.array(self.data[bounds]))
+            calculated = self.__amplitude.calculate(self.__parameters)
+
+            if self.__amplitude.USE_TORCH:
+                calculated = calculated.cpu().detach().numpy()
+
+            self.intensities[bounds] = calculated
+            max_value = max(max_value, _local_max(calculated))
+
+        _flush(self.intensities)
+        return max_value
+
+    def __reject(self, rejection: _Rejection) -> bool:
+        generator = npy.random.default_rng(rejection.seeds[self.PROCESS_ID])
+        for bounds in self.__chunks():
+            self.mask[bounds] = _reject(
+                self.intensities[bounds], rejection.max_value, generator
+            )
+
+        _flush(self.mask)
+        return True
+
+    def __chunks(self) -> List[slice]:
+        return [
+            slice(start, min(start + self.__chunk_size, len(self.data)))
+            for start in range(0, len(self.data), self.__chunk_size)
+        ]
+
+
+def _flush(array: npy.ndarray):
+    # Empty ranges are plain arrays, since they can't be mapped
+    if isinstance(array, npy.memmap):
+        array.flush()
+
+
+class _DuplexInterface(process.Interface):
+    IS_DUPLEX = True
+
+    def run(self, communicator: List[Any], *args: Any) -> List[Any]:
+        for connection in communicator:
+            connection.send(args[0])
+
+        replies = []
+        for connection in communicator:
+            reply = connection.recv()
+            if isinstance(reply, process.ProcessCodes):
+                raise connection.recv()
+            replies.append(reply)
+        return replies
+
+
+class _SingleKernel:
+    """Runs the kernel in this process, in place of the processes"""
+
+    def __init__(self, kernel: process.Kernel):
+        self.__kernel = kernel
+
+    def run(self, message: Any) -> List[Any]:
+        return [self.__kernel.run(message)]
+
+    def close(self):
+        pass
+
+
+"""
+Phase space
+"""
+
+
+class _Generate:
+    """Asks each kernel for its share of the events"""
+
+    def __init__(
+            self, quotas: List[int], seeds: List[npy.random.SeedSequence]
+    ):
+        self.quotas = quotas
+        self.seeds = seeds
+
+
+class _PhaseSpace:
+    """Generates unweighted phase space events in the lab frame"""
+
+    def __init__(
+            self, beam_energy: float, final_state: List[ParticleSpec],
+            beam: ParticleSpec, target: ParticleSpec, chunk_size: int
+    ):
+        self.__final_state = [ParticleSpec(*p) for p in final_state]
+        self.__beam = ParticleSpec(*beam)
+        if len(self.__final_state) < 2:
+            raise ValueError("The final state needs at least two particles!")
+
+        self.__beam_energy = beam_energy
+        self.__beam_momentum = npy.sqrt(beam_energy**2 - self.__beam.mass**2)
+        total_energy = beam_energy + ParticleSpec(*target).mass
+        self.__beta = self.__beam_momentum / total_energy
+        self.__mass = npy.sqrt(total_energy**2 - self.__beam_momentum**2)
+
+        self.__masses = npy.array([p.mass for p in self.__final_state])
+        if self.__mass <= self.__masses.sum():
+            raise ValueError("Beam energy is below the final state threshold!")
+
+        self.__max_weight = _max_weight(self.__mass, self.__masses)
+        self.__chunk_size = chunk_size
+
+    def generate(
+            self, events: int, generator: npy.random.Generator
+    ) -> npy.ndarray:
+        # Returns the e, x, y, z of every final state particle, shaped as
+        # particles x 4 x events
+        kept, tried, accepted = 0, 0, []
+        remaining = events
+        while remaining > 0:
+            # Enough events to finish at the efficiency seen so far
+            efficiency = max(kept, 1) / max(tried, 1)
+            count = min(
+                int(1.1 * remaining / efficiency) + 16, self.__chunk_size
+            )
+
+            weights, momenta = _raubold_lynch(
+                self.__mass, self.__masses, count, generator
+            )
+            keep = weights / self.__max_weight > generator.random(count)
+            momenta = momenta[:, :, keep][:, :, :remaining]
+
+            tried, kept = tried + count, kept + keep.sum()
+            remaining -= momenta.shape[2]
+            accepted.append(momenta)
+
+        if not accepted:
+            return npy.empty((len(self.__masses), 4, 0))
+
+        momenta = npy.concatenate(accepted, axis=2)
+        _boost(momenta, self.__beta, 3)
+        return momenta
+
+    def make_pool(self, momenta: npy.ndarray) -> vectors.ParticlePool:
+        events = momenta.shape[2]
+        particles = [vectors.Particle(
+            self.__beam.particle_id, self.__beam.charge,
+            npy.full(events, self.__beam_energy), npy.zeros(events),
+            npy.zeros(events), npy.full(events, self.__beam_momentum)
+        )]
+        for particle, (e, x, y, z) in zip(self.__final_state, momenta):
+            particles.append(vectors.Particle(
+                particle.particle_id, particle.charge, e, x, y, z
+            ))
+        return vectors.ParticlePool(particles)
+
+
+class _PhaseSpaceKernel(process.Kernel):
+
+    def __init__(self, phase_space: _PhaseSpace):
+        self.__phase_space = phase_space
+
+    def setup(self):
+        pass
+
+    def process(self, data: _Generate) -> npy.ndarray:
+        generator = npy.random.default_rng(data.seeds[self.PROCESS_ID])
+        return self.__phase_space.generate(
+            data.quotas[self.PROCESS_ID], generator
+        )
+
+
+def _two_body_momentum(
+        mass: npy.ndarray, first: npy.ndarray, second: npy.ndarray
+) -> npy.ndarray:
+    # Momentum of either product in the rest frame of a two body decay
+    product = (
+        (mass ** 2 - (first + second) ** 2) *
+        (mass ** 2 - (first - second) ** 2)
+    )
+    return npy.sqrt(npy.clip(product, 0, None)) / (2 * mass)
+
+
+def _max_weight(mass: float, masses: npy.ndarray) -> float:
+    # Upper bound of the weight, from giving each step all of the energy
+    highest = mass - masses.sum() + masses[0]
+    lowest, weight = 0., 1.
+    for index in range(1, len(masses)):
+        lowest += masses[index - 1]
+        highest += masses[index]
+        weight *= _two_body_momentum(highest, lowest, masses[index])
+    return weight
+
+
+def _raubold_lynch(
+        mass: float, masses: npy.ndarray, count: int,
+        generator: npy.random.Generator
+) -> Tuple[npy.ndarray, npy.ndarray]:
+    # Returns the weights, and the e, x, y, z of every particle in the
+    # rest frame, shaped as particles x 4 x events.
+    particles = len(masses)
+    fractions = npy.zeros((count, particles))
+    fractions[:, 1:-1] = npy.sort(
+        generator.random((count, particles - 2)), axis=1
+    )
+    fractions[:, -1] = 1
+
+    # The invariant mass of the first i+1 particles, and the momentum of
+    # the i+1th particle in their rest frame
+    invariant = fractions * (mass - masses.sum()) + npy.cumsum(masses)
+    momenta = _two_body_momentum(
+        invariant[:, 1:], invariant[:, :-1], masses[1:]
+    ).T
+    weights = npy.prod(momenta, axis=0)
+
+    vectors = npy.zeros((particles, 4, count))
+    vectors[0, 0] = npy.sqrt(momenta[0] ** 2 + masses[0] ** 2)
+    vectors[0, 2] = momenta[0]
+    for index in range(1, particles):
+        vectors[index, 0] = npy.sqrt(
+            momenta[index - 1] ** 2 + masses[index] ** 2
+        )
+        vectors[index, 2] = -momenta[index - 1]
+
+        # Rotate everything so far by a random direction
+        cos_z = 2 * generator.random(count) - 1
+        sin_z = npy.sqrt(1 - cos_z ** 2)
+        angle_y = 2 * npy.pi * generator.random(count)
+        cos_y, sin_y = npy.cos(angle_y), npy.sin(angle_y)
+
+        current = vectors[:index + 1]
+        x, y, z = current[:, 1].copy(), current[:, 2].copy(), current[:, 3]
+        current[:, 2] = sin_z * x + cos_z * y
+        x = cos_z * x - sin_z * y
+        current[:, 1] = cos_y * x - sin_y * z
+        current[:, 3] = sin_y * x + cos_y * z
+
+        if index == particles - 1:
+            break
+
+        # Boost into the rest frame of the next invariant mass
+        _boost(current, momenta[index] / npy.sqrt(
+            momenta[index] ** 2 + invariant[:, index] ** 2
+        ), 2)
+
+    return weights, vectors
+
+
+def _boost(
+        vectors: npy.ndarray, beta: Union[float, npy.ndarray], axis: int
+):
+    # Boosts e, x, y, z along x, y, or z in place
+    gamma = 1 / npy.sqrt(1 - beta ** 2)
+    energy = vectors[:, 0].copy()
+    vectors[:, 0] = gamma * (energy + beta * vectors[:, axis])
+    vectors[:, axis] = gamma * (vectors[:, axis] + beta * energy)
+
+
+class _Batch:
+    """Asks each kernel to simulate a batch against the max estimate"""
+
+    def __init__(
+            self, max_value: Opt[float],
+            seeds: List[npy.random.SeedSequence]
+    ):
+        self.max_value = max_value
+        self.seeds = seeds
+
+
+class _YieldKernel(process.Kernel):
+
+    def __init__(
+            self, amplitude: likelihoods.NestedFunction,
+            parameters: Dict[str, float], phase_space: _PhaseSpace,
+            batch_size: int
+    ):
+        self.__amplitude = amplitude
+        self.__parameters = parameters
+        self.__phase_space = phase_space
+        self.__batch_size = batch_size
+        self.__generator: Opt[npy.random.Generator] = None
+
+    def setup(self):
+        self.__amplitude.THREAD = self.PROCESS_ID
+
+    def process(
+            self, data: _Batch
+    ) -> Tuple[npy.ndarray, npy.ndarray, float, int]:
+        # The stream continues from batch to batch
+        if self.__generator is None:
+            seed = data.seeds[self.PROCESS_ID]
+            self.__generator = npy.random.default_rng(seed)
+
+        momenta = self.__phase_space.generate(
+            self.__batch_size, self.__generator
+        )
+        self.__amplitude.setup(self.__phase_space.make_pool(momenta))
+        calculated = self.__amplitude.calculate(self.__parameters)
+
+        if self.__amplitude.USE_TORCH:
+            calculated = calculated.cpu().detach().numpy()
+
+        intensities = npy.asarray(calculated)
+        if data.max_value is None:
+            return (
+                momenta[:, :, :0], npy.empty(0, int),
+                _local_max(intensities), 0
+            )
+
+        # Overweight events are kept once for each multiple of the max
+        ratio = intensities / data.max_value
+        copies = npy.floor(ratio).astype(int) + (
+            ratio % 1 > self.__generator.random(len(ratio))
+        )
+        positions = npy.repeat(npy.arange(len(ratio)), copies)
+        return (
+            momenta[:, :, positions], positions, _local_max(intensities),
+            int(npy.count_nonzero(ratio > 1))
+        )
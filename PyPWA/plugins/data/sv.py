@@ -138,7 +138,9 @@ class _SvReader(templates.ReaderBase):
 
     def reset(self):
         self.__file_handle.seek(0)
+        self.__current_count = 0
         self.__reader = self.__get_reader()
+        next(self.__reader)  # Skip the header again
 
     def close(self):
         self.__file_handle.close()
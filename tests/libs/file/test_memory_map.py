@@ -0,0 +1,47 @@
+import numpy as npy
+import pandas as pd
+import pytest
+
+from PyPWA.libs import file
+
+
+"""
+Test Memory Mapping
+"""
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"x": npy.arange(10.), "y": npy.arange(10.) * 2})
+
+
+def test_csv_is_spooled_and_mapped(frame, tmp_path):
+    file.write(tmp_path / "data.csv", frame, cache=False)
+    mapped = file.memory_map(tmp_path / "data.csv", tmp_path / "spool.npy")
+
+    assert isinstance(mapped, npy.memmap)
+    npy.testing.assert_array_equal(mapped["x"], frame["x"])
+    npy.testing.assert_array_equal(mapped["y"], frame["y"])
+
+
+def test_readers_are_mapped_from_the_first_event(frame, tmp_path):
+    file.write(tmp_path / "data.csv", frame, cache=False)
+    with file.get_reader(tmp_path / "data.csv") as reader:
+        next(reader)
+        mapped = file.memory_map(reader, tmp_path / "spool.npy")
+
+    npy.testing.assert_array_equal(mapped["x"], frame["x"])
+
+
+def test_numpy_files_are_mapped_directly(frame, tmp_path):
+    npy.save(tmp_path / "data.npy", frame.to_records(index=False))
+    mapped = file.memory_map(tmp_path / "data.npy", tmp_path / "spool.npy")
+
+    assert isinstance(mapped, npy.memmap)
+    assert not (tmp_path / "spool.npy").exists()
+
+
+def test_empty_file_raises(tmp_path):
+    (tmp_path / "empty.csv").write_text("x,y\n")
+    with pytest.raises(ValueError):
+        file.memory_map(tmp_path / "empty.csv", tmp_path / "spool.npy")
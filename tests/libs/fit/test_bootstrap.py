@@ -0,0 +1,129 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as npy
+import pandas as pd
+import pytest
+
+from PyPWA.libs.fit import likelihoods
+from PyPWA.libs.fit.bootstrap import bootstrap
+
+
+"""
+Fixtures for Bootstrap Tests
+"""
+
+
+class ExponentialAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__x = data["x"].to_numpy()
+
+    def calculate(self, params):
+        return params["rate"] * npy.exp(-params["rate"] * self.__x)
+
+
+EVENTS = 1000
+
+
+@pytest.fixture(scope="module")
+def log_likelihood():
+    data = pd.DataFrame(
+        {"x": npy.random.default_rng(3).exponential(.5, EVENTS)}
+    )
+    with likelihoods.LogLikelihood(
+            ExponentialAmplitude(), data, num_of_processes=2
+    ) as likelihood:
+        yield likelihood
+
+
+SETTINGS = {"rate": 1}
+
+
+"""
+Test Resampling
+"""
+
+
+def test_poisson_weights_average_to_the_event_count(log_likelihood):
+    total = log_likelihood.resample(1, "poisson")
+    log_likelihood.reset_weights()
+    assert abs(total - EVENTS) < 5 * npy.sqrt(EVENTS)
+
+
+def test_multinomial_weights_keep_the_event_count(log_likelihood):
+    total = log_likelihood.resample(1, "multinomial")
+    log_likelihood.reset_weights()
+    assert total == EVENTS
+
+
+def test_resample_is_reproducible_with_a_seed(log_likelihood):
+    log_likelihood.resample(7)
+    first = log_likelihood({"rate": 2})
+    log_likelihood.resample(8)
+    other = log_likelihood({"rate": 2})
+    log_likelihood.resample(7)
+    again = log_likelihood({"rate": 2})
+    log_likelihood.reset_weights()
+
+    assert first == again
+    assert first != other
+
+
+def test_reset_weights_restores_the_likelihood(log_likelihood):
+    original = log_likelihood({"rate": 2})
+    log_likelihood.resample(2)
+    log_likelihood.reset_weights()
+    assert log_likelihood({"rate": 2}) == pytest.approx(original)
+
+
+def test_unknown_method_raises(log_likelihood):
+    with pytest.raises(ValueError):
+        log_likelihood.resample(1, "jackknife")
+
+
+def test_chi_squared_can_not_be_resampled():
+    data = pd.DataFrame({"x": npy.linspace(0, 1, 10)})
+    with likelihoods.ChiSquared(
+            ExponentialAmplitude(), data, npy.ones(10), num_of_processes=1
+    ) as likelihood:
+        with pytest.raises(ValueError):
+            likelihood.resample(1)
+
+
+"""
+Test Bootstrap
+"""
+
+
+def test_bootstrap_collects_a_row_per_replica(log_likelihood):
+    original = log_likelihood({"rate": 2})
+    results = bootstrap(SETTINGS, log_likelihood, 5, seed=4)
+
+    assert len(results) == 5
+    assert list(results.columns) == ["rate", "fval", "valid"]
+    assert results["valid"].all()
+    assert results["rate"].mean() == pytest.approx(2, rel=.2)
+    assert results["rate"].std() > 0
+    assert log_likelihood({"rate": 2}) == pytest.approx(original)
+
+
+def test_bootstrap_is_reproducible_with_a_seed(log_likelihood):
+    first = bootstrap(SETTINGS, log_likelihood, 2, "multinomial", seed=5)
+    second = bootstrap(SETTINGS, log_likelihood, 2, "multinomial", seed=5)
+    pd.testing.assert_frame_equal(first, second)
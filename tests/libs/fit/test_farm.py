@@ -0,0 +1,138 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as npy
+import pandas as pd
+import pytest
+
+from PyPWA.libs import binning
+from PyPWA.libs.fit import farm, likelihoods
+
+
+"""
+Fixtures for Fit Farm Tests
+"""
+
+
+class LineAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__x = data["x"].to_numpy()
+
+    def calculate(self, params):
+        return params["slope"] * self.__x + params["offset"]
+
+
+SLOPES = [1., 2., 3., 4., 5.]
+
+
+def make_bins():
+    x = npy.linspace(0, 1, 100)
+    return [
+        {
+            "data": pd.DataFrame({"x": x}),
+            "binned": slope * x + 1 + npy.random.rand(100) * .01
+        }
+        for slope in SLOPES
+    ]
+
+
+"""
+Test Fit Farm
+"""
+
+
+@pytest.mark.parametrize("num_of_processes", [2, 8])
+def test_fit_bins_matches_each_bin(num_of_processes):
+    results = farm.fit_bins(
+        make_bins(), LineAmplitude(), {"slope": 0, "offset": 0},
+        likelihoods.ChiSquared, num_of_processes
+    )
+
+    assert len(results) == len(SLOPES)
+    assert results["valid"].all()
+    assert "slope_error" in results.columns
+    npy.testing.assert_allclose(results["slope"], SLOPES, atol=.05)
+
+
+def test_fit_bins_accepts_binned_frames():
+    data = pd.DataFrame({"x": npy.random.rand(2000), "y": npy.arange(2000)})
+    bins = binning.bin_by_range(data, "y", 4)
+    results = farm.fit_bins(
+        bins, LineAmplitude(), {"slope": 1, "offset": 1},
+        likelihoods.EmptyLikelihood, 2
+    )
+    assert len(results) == 4
+
+
+@pytest.mark.parametrize("name", ["num_of_processes", "pool"])
+def test_fit_bins_rejects_slot_arguments_in_bins(name):
+    bins = make_bins()
+    bins[0][name] = 2
+    with pytest.raises(ValueError, match=name):
+        farm.fit_bins(
+            bins, LineAmplitude(), {"slope": 0, "offset": 0},
+            likelihoods.ChiSquared, 2
+        )
+
+
+def test_fit_bins_rejects_a_pool_for_the_likelihood():
+    with pytest.raises(ValueError, match="pool"):
+        farm.fit_bins(
+            make_bins(), LineAmplitude(), {"slope": 0, "offset": 0},
+            likelihoods.ChiSquared, 2, pool=2
+        )
+
+
+class FailingPool:
+
+    def __init__(self, closed, size):
+        if closed:
+            raise RuntimeError("Couldn't start the pool")
+        self.__closed = closed
+        closed.append(False)
+
+    def close(self):
+        self.__closed[0] = True
+
+
+def test_fit_bins_closes_started_pools_when_one_fails(monkeypatch):
+    closed = []
+    monkeypatch.setattr(
+        farm.process, "WorkerPool", lambda size: FailingPool(closed, size)
+    )
+    with pytest.raises(RuntimeError, match="start the pool"):
+        farm.fit_bins(
+            make_bins(), LineAmplitude(), {"slope": 0, "offset": 0},
+            likelihoods.ChiSquared, 2
+        )
+    assert closed == [True]
+
+
+def test_slots_use_every_process():
+    assert farm._slot_sizes(100, 8) == [1] * 8
+    assert farm._slot_sizes(3, 8) == [3, 3, 2]
+    assert farm._slot_sizes(1, 1) == [1]
+
+
+def test_warm_start_uses_nearest_converged_bin():
+    schedule = farm._Schedule(3, {"a": 0, "b": 0}, True)
+    assert schedule.take() == (0, {"a": 0, "b": 0})
+
+    schedule.finish(0, {"values": {"a": 1, "b": 2}, "valid": True})
+    assert schedule.take() == (1, {"a": 1, "b": 2})
@@ -0,0 +1,685 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as npy
+import pandas as pd
+import pytest
+
+from PyPWA.libs.fit import likelihoods
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+
+"""
+Fixtures for Likelihood Tests
+"""
+
+
+class GaussAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__x = data["x"]
+
+    def calculate(self, params):
+        return npy.exp(-((self.__x - params["mu"]) ** 2) / params["sigma"])
+
+
+class SingleGaussAmplitude(GaussAmplitude):
+    USE_MP = False
+
+
+DATA = pd.DataFrame({"x": npy.random.rand(1000)})
+MONTE_CARLO = pd.DataFrame({"x": npy.random.rand(2000)})
+PARAMETERS = [{"mu": mu, "sigma": 1.0} for mu in npy.linspace(0, 1, 10)]
+
+
+@pytest.fixture(params=[GaussAmplitude, SingleGaussAmplitude])
+def log_likelihood(request):
+    with likelihoods.LogLikelihood(
+            request.param(), DATA, MONTE_CARLO, num_of_processes=2
+    ) as likelihood:
+        yield likelihood
+
+
+@pytest.fixture(params=[GaussAmplitude, SingleGaussAmplitude])
+def chi_squared(request):
+    binned = npy.random.rand(len(DATA)) + .5
+    with likelihoods.ChiSquared(
+            request.param(), DATA, binned, num_of_processes=2
+    ) as likelihood:
+        yield likelihood
+
+
+"""
+Test Batched Evaluation
+"""
+
+
+def test_log_likelihood_batch_matches_single(log_likelihood):
+    expected = [log_likelihood(params) for params in PARAMETERS]
+    npy.testing.assert_allclose(
+        log_likelihood.evaluate_many(PARAMETERS), expected
+    )
+
+
+def test_chi_squared_batch_matches_single(chi_squared):
+    expected = [chi_squared(params) for params in PARAMETERS]
+    npy.testing.assert_allclose(
+        chi_squared.evaluate_many(pd.DataFrame(PARAMETERS)), expected
+    )
+
+
+def test_empty_batch_returns_empty(log_likelihood):
+    assert len(log_likelihood.evaluate_many([])) == 0
+
+
+"""
+Test Analytic Gradients
+"""
+
+
+class GradientGaussAmplitude(GaussAmplitude):
+
+    def setup(self, data):
+        super(GradientGaussAmplitude, self).setup(data)
+        self.__x = data["x"].to_numpy()
+
+    def gradient(self, params):
+        value = self.calculate(params)
+        shifted = self.__x - params["mu"]
+        return npy.array([
+            value * 2 * shifted / params["sigma"],
+            value * shifted ** 2 / params["sigma"] ** 2
+        ])
+
+
+def numerical_gradient(likelihood, params, step=1e-6):
+    gradient = []
+    for name in params:
+        up, down = dict(params), dict(params)
+        up[name] += step
+        down[name] -= step
+        gradient.append((likelihood(up) - likelihood(down)) / (2 * step))
+    return npy.array(gradient)
+
+
+@pytest.fixture(params=["log", "extended", "chi", "sweighted", "empty"])
+def gradient_likelihood(request):
+    amplitude = GradientGaussAmplitude()
+    weights = npy.random.rand(len(DATA))
+    if request.param == "log":
+        likelihood = likelihoods.LogLikelihood(
+            amplitude, DATA, quality_factor=weights, num_of_processes=2
+        )
+    elif request.param == "extended":
+        likelihood = likelihoods.LogLikelihood(
+            amplitude, DATA, MONTE_CARLO, num_of_processes=2
+        )
+    elif request.param == "chi":
+        likelihood = likelihoods.ChiSquared(
+            amplitude, DATA, weights + .5, num_of_processes=2
+        )
+    elif request.param == "sweighted":
+        likelihood = likelihoods.sweightedLogLikelihood(
+            amplitude, DATA, MONTE_CARLO, weights,
+            npy.random.rand(len(MONTE_CARLO)), num_of_processes=2
+        )
+    else:
+        likelihood = likelihoods.EmptyLikelihood(
+            amplitude, DATA, num_of_processes=2
+        )
+
+    yield likelihood
+    likelihood.close()
+
+
+def test_gradient_matches_numerical(gradient_likelihood):
+    params = {"mu": .3, "sigma": .8}
+    value, gradient = gradient_likelihood.value_and_gradient(params)
+
+    npy.testing.assert_allclose(value, gradient_likelihood(params))
+    npy.testing.assert_allclose(
+        gradient, numerical_gradient(gradient_likelihood, params), 1e-5
+    )
+
+
+def test_gradient_is_only_provided_when_defined():
+    assert GaussAmplitude.gradient is None
+    assert callable(GradientGaussAmplitude().gradient)
+
+    with likelihoods.EmptyLikelihood(
+            GaussAmplitude(), DATA, num_of_processes=2
+    ) as likelihood:
+        assert not likelihood.has_gradient
+
+    with likelihoods.EmptyLikelihood(
+            GradientGaussAmplitude(), DATA, num_of_processes=2
+    ) as likelihood:
+        assert likelihood.has_gradient
+
+
+def test_gradient_many_matches_each_gradient(gradient_likelihood):
+    params = [{"mu": .3, "sigma": .8}, {"mu": -.2, "sigma": 1.1}]
+    npy.testing.assert_allclose(
+        gradient_likelihood.gradient_many(params),
+        [gradient_likelihood.gradient(p) for p in params]
+    )
+
+
+"""
+Test Autograd Gradients
+"""
+
+
+class TorchGaussAmplitude(likelihoods.NestedFunction):
+    USE_TORCH = True
+
+    def setup(self, data):
+        self.__x = torch.from_numpy(data["x"].to_numpy())
+
+    def calculate(self, params):
+        return torch.exp(-((self.__x - params["mu"]) ** 2) / params["sigma"])
+
+
+@pytest.fixture(params=[
+    "log", "extended", "chi binned", "chi errors", "sweighted", "empty"
+])
+def torch_likelihood(request):
+    pytest.importorskip("torch")
+    amplitude = TorchGaussAmplitude()
+    weights = npy.random.rand(len(DATA))
+    if request.param == "log":
+        likelihood = likelihoods.LogLikelihood(
+            amplitude, DATA, binned=weights + .5, quality_factor=weights,
+            num_of_processes=2
+        )
+    elif request.param == "extended":
+        likelihood = likelihoods.LogLikelihood(
+            amplitude, DATA, MONTE_CARLO, quality_factor=weights,
+            num_of_processes=2
+        )
+    elif request.param == "chi binned":
+        likelihood = likelihoods.ChiSquared(
+            amplitude, DATA, weights + .5, num_of_processes=2
+        )
+    elif request.param == "chi errors":
+        likelihood = likelihoods.ChiSquared(
+            amplitude, DATA, event_errors=weights + .5,
+            expected_values=npy.random.rand(len(DATA)), num_of_processes=2
+        )
+    elif request.param == "sweighted":
+        likelihood = likelihoods.sweightedLogLikelihood(
+            amplitude, DATA, MONTE_CARLO, weights,
+            npy.random.rand(len(MONTE_CARLO)), num_of_processes=2
+        )
+    else:
+        likelihood = likelihoods.EmptyLikelihood(
+            TorchGaussAmplitude(), DATA, num_of_processes=2
+        )
+
+    yield likelihood
+    likelihood.close()
+
+
+def test_autograd_matches_numerical(torch_likelihood):
+    params = {"mu": .3, "sigma": .8}
+    value, gradient = torch_likelihood.value_and_gradient(params)
+
+    assert torch_likelihood.has_gradient
+    npy.testing.assert_allclose(value, torch_likelihood(params))
+    npy.testing.assert_allclose(
+        gradient, numerical_gradient(torch_likelihood, params), 1e-5
+    )
+
+
+def test_autograd_uses_updated_weights():
+    pytest.importorskip("torch")
+    params = {"mu": .3, "sigma": .8}
+    with likelihoods.LogLikelihood(
+            TorchGaussAmplitude(), DATA, num_of_processes=2
+    ) as likelihood:
+        value, gradient = likelihood.value_and_gradient(params)
+        likelihood.update(quality_factor=npy.full(len(DATA), 2.))
+        npy.testing.assert_allclose(
+            likelihood.value_and_gradient(params)[1], 2 * gradient
+        )
+        npy.testing.assert_allclose(likelihood(params), 2 * value)
+
+
+"""
+Test Precomputed Integrals
+"""
+
+
+def make_waves(data):
+    x = data["x"].to_numpy()
+    return npy.column_stack([npy.ones_like(x), x, npy.exp(1j * x)])
+
+
+def make_couplings(params):
+    return npy.array([
+        params["a"], params["b"] + 1j * params["c"], 1j * params["d"]
+    ])
+
+
+class WaveAmplitude(likelihoods.WaveSetFunction):
+
+    def waves(self, data):
+        return make_waves(data)
+
+    def couplings(self, params):
+        return make_couplings(params)
+
+
+class DirectWaveAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__waves = make_waves(data)
+
+    def calculate(self, params):
+        return npy.abs(self.__waves @ make_couplings(params)) ** 2
+
+
+WAVE_PARAMETERS = [
+    {"a": 1.0, "b": .5, "c": -.3, "d": .7},
+    {"a": .2, "b": -1.5, "c": .8, "d": .1}
+]
+
+
+@pytest.mark.parametrize("kind", ["extended", "sweighted"])
+def test_wave_set_matches_direct(kind):
+    weights = npy.random.rand(len(DATA))
+    mc_weights = npy.random.rand(len(MONTE_CARLO))
+    results = []
+    for amplitude in [WaveAmplitude(), DirectWaveAmplitude()]:
+        if kind == "extended":
+            likelihood = likelihoods.LogLikelihood(
+                amplitude, DATA, MONTE_CARLO, num_of_processes=2
+            )
+        else:
+            likelihood = likelihoods.sweightedLogLikelihood(
+                amplitude, DATA, MONTE_CARLO, weights, mc_weights,
+                num_of_processes=2
+            )
+        with likelihood:
+            results.append(likelihood.evaluate_many(WAVE_PARAMETERS))
+
+    npy.testing.assert_allclose(results[0], results[1])
+
+
+"""
+Test Composite Amplitudes
+"""
+
+
+class CountingAmplitude(likelihoods.NestedFunction):
+    USE_MP = False
+
+    def __init__(self, name):
+        super(CountingAmplitude, self).__init__()
+        self.name = name
+        self.calls = 0
+
+    def setup(self, data):
+        self.__x = data["x"].to_numpy()
+
+    def calculate(self, params):
+        self.calls += 1
+        return npy.exp(-self.__x * params[self.name])
+
+
+@pytest.fixture
+def composite():
+    first, second = CountingAmplitude("a"), CountingAmplitude("b")
+    amplitude = likelihoods.CompositeAmplitude(
+        [(first, ["a"]), (second, ["b"])]
+    )
+    amplitude.setup(DATA)
+    return amplitude, first, second
+
+
+def test_composite_matches_product(composite):
+    amplitude, first, second = composite
+    params = {"a": .5, "b": 2.0}
+    npy.testing.assert_allclose(
+        amplitude.calculate(params),
+        first.calculate(params) * second.calculate(params)
+    )
+
+
+def test_composite_only_recalculates_changed(composite):
+    amplitude, first, second = composite
+    amplitude.calculate({"a": .5, "b": 2.0})
+    amplitude.calculate({"a": .5, "b": 2.0})
+    amplitude.calculate({"a": .6, "b": 2.0})
+    assert (first.calls, second.calls) == (2, 1)
+
+
+def test_composite_in_likelihood():
+    composite = likelihoods.CompositeAmplitude(
+        [(CountingAmplitude("a"), ["a"]), (CountingAmplitude("b"), ["b"])],
+        lambda results: results[0] + results[1]
+    )
+    params = [{"a": a, "b": 1.0} for a in [.1, .2, .3]]
+    with likelihoods.EmptyLikelihood(composite, DATA) as likelihood:
+        expected = [
+            npy.sum(npy.exp(-DATA["x"] * p["a"]) + npy.exp(-DATA["x"]))
+            for p in params
+        ]
+        npy.testing.assert_allclose(likelihood.evaluate_many(params), expected)
+
+
+"""
+Test Likelihood Cache
+"""
+
+
+@pytest.fixture
+def cached_likelihood():
+    with likelihoods.LogLikelihood(
+            GaussAmplitude(), DATA, num_of_processes=2, cache_size=2
+    ) as likelihood:
+        yield likelihood
+
+
+def test_cache_answers_repeated_points(cached_likelihood):
+    first = cached_likelihood(PARAMETERS[0])
+    assert cached_likelihood(dict(PARAMETERS[0])) == first
+
+    info = cached_likelihood.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_cache_evicts_least_recently_used(cached_likelihood):
+    for params in [PARAMETERS[0], PARAMETERS[1], PARAMETERS[0]]:
+        cached_likelihood(params)
+    cached_likelihood(PARAMETERS[2])
+    cached_likelihood(PARAMETERS[0])
+    cached_likelihood(PARAMETERS[1])
+
+    info = cached_likelihood.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 4, 2)
+
+
+def test_cache_used_by_batches(cached_likelihood):
+    cached_likelihood(PARAMETERS[1])
+    batch = cached_likelihood.evaluate_many(PARAMETERS[:2])
+
+    npy.testing.assert_allclose(
+        batch, [cached_likelihood(params) for params in PARAMETERS[:2]]
+    )
+    assert cached_likelihood.cache_info().hits == 3
+
+
+def test_cache_clear(cached_likelihood):
+    cached_likelihood(PARAMETERS[0])
+    cached_likelihood.cache_clear()
+    assert cached_likelihood.cache_info() == (0, 0, 2, 0)
+
+
+"""
+Test Streaming Likelihood
+"""
+
+
+class ArrayGaussAmplitude(GradientGaussAmplitude):
+
+    def setup(self, data):
+        super(ArrayGaussAmplitude, self).setup(pd.DataFrame(data))
+
+
+STRUCTURED_DATA = DATA.to_records(index=False)
+STRUCTURED_MONTE_CARLO = MONTE_CARLO.to_records(index=False)
+
+
+@pytest.fixture
+def mapped_files(tmp_path):
+    npy.save(tmp_path / "data.npy", STRUCTURED_DATA)
+    npy.save(tmp_path / "mc.npy", STRUCTURED_MONTE_CARLO)
+    # The delimiter can't be sniffed from a single column
+    MONTE_CARLO.assign(y=0.).to_csv(tmp_path / "mc.csv", index=False)
+    return tmp_path
+
+
+@pytest.mark.parametrize("monte_carlo", ["mc.npy", "mc.csv"])
+def test_streaming_matches_log_likelihood(mapped_files, monte_carlo):
+    params = {"mu": .3, "sigma": .8}
+    with likelihoods.LogLikelihood(
+            ArrayGaussAmplitude(), STRUCTURED_DATA, STRUCTURED_MONTE_CARLO,
+            num_of_processes=2
+    ) as likelihood:
+        expected = likelihood(params)
+        expected_gradient = likelihood.gradient(params)
+
+    with likelihoods.StreamingLogLikelihood(
+            ArrayGaussAmplitude(), mapped_files / "data.npy",
+            mapped_files / monte_carlo, chunk_size=128, num_of_processes=2
+    ) as streaming:
+        npy.testing.assert_allclose(streaming(params), expected)
+        npy.testing.assert_allclose(
+            streaming.gradient(params), expected_gradient
+        )
+
+
+def test_streaming_standard_with_weights(mapped_files):
+    data = npy.load(mapped_files / "data.npy", mmap_mode="r")
+    weights = npy.random.rand(len(data))
+    binned = npy.random.rand(len(data))
+    params = {"mu": .3, "sigma": .8}
+    with likelihoods.LogLikelihood(
+            ArrayGaussAmplitude(), STRUCTURED_DATA, binned=binned,
+            quality_factor=weights, num_of_processes=2
+    ) as likelihood:
+        expected = likelihood(params)
+
+    with likelihoods.StreamingLogLikelihood(
+            ArrayGaussAmplitude(), data, binned=binned,
+            quality_factor=weights, chunk_size=300, num_of_processes=2
+    ) as streaming:
+        npy.testing.assert_allclose(streaming(params), expected)
+
+
+"""
+Test Chunked Evaluation
+"""
+
+
+def make_chunked(kind, chunk_size):
+    amplitude = GradientGaussAmplitude()
+    weights = npy.linspace(.5, 1.5, len(DATA))
+    if kind == "log":
+        return likelihoods.LogLikelihood(
+            amplitude, DATA, quality_factor=weights, binned=weights,
+            num_of_processes=2, chunk_size=chunk_size
+        )
+    elif kind == "extended":
+        return likelihoods.LogLikelihood(
+            amplitude, DATA, MONTE_CARLO, quality_factor=weights,
+            num_of_processes=2, chunk_size=chunk_size
+        )
+    elif kind == "chi":
+        return likelihoods.ChiSquared(
+            amplitude, DATA, weights, num_of_processes=2,
+            chunk_size=chunk_size
+        )
+    elif kind == "expected":
+        return likelihoods.ChiSquared(
+            amplitude, DATA, event_errors=weights,
+            expected_values=pd.Series(weights), num_of_processes=2,
+            chunk_size=chunk_size
+        )
+    return likelihoods.EmptyLikelihood(
+        amplitude, DATA, num_of_processes=2, chunk_size=chunk_size
+    )
+
+
+@pytest.mark.parametrize(
+    "kind", ["log", "extended", "chi", "expected", "empty"]
+)
+def test_chunked_matches_whole(kind):
+    params = {"mu": .3, "sigma": .8}
+    results = []
+    for chunk_size in [None, 64]:
+        with make_chunked(kind, chunk_size) as likelihood:
+            results.append(likelihood.value_and_gradient(params))
+            npy.testing.assert_allclose(likelihood(params), results[-1][0])
+
+    npy.testing.assert_allclose(results[0][0], results[1][0])
+    npy.testing.assert_allclose(results[0][1], results[1][1])
+
+
+def test_chunked_wave_set_integrals():
+    results = []
+    for chunk_size in [None, 100]:
+        with likelihoods.LogLikelihood(
+                WaveAmplitude(), DATA, MONTE_CARLO, num_of_processes=2,
+                chunk_size=chunk_size
+        ) as likelihood:
+            results.append(likelihood.evaluate_many(WAVE_PARAMETERS))
+
+    npy.testing.assert_allclose(results[0], results[1])
+
+
+"""
+Test Reduced Precision
+"""
+
+
+class SingleGaussAmplitudeCheck(GaussAmplitude):
+    """Records the type of the data it receives"""
+    PRECISION = npy.float32
+    USE_MP = False
+
+    def setup(self, data):
+        super(SingleGaussAmplitudeCheck, self).setup(data)
+        self.dtype = data["x"].dtype
+
+
+def test_precision_flag_converts_data():
+    amplitude = SingleGaussAmplitudeCheck()
+    with likelihoods.EmptyLikelihood(amplitude, DATA) as likelihood:
+        likelihood(PARAMETERS[0])
+    assert amplitude.dtype == npy.float32
+
+
+@pytest.mark.parametrize("kind", ["log", "extended", "chi", "empty"])
+def test_single_precision_matches_double(kind):
+    results = []
+    for precision in [npy.float64, npy.float32]:
+        likelihood = {
+            "log": likelihoods.LogLikelihood(
+                GaussAmplitude(), DATA, quality_factor=npy.ones(len(DATA)),
+                num_of_processes=2, precision=precision
+            ),
+            "extended": likelihoods.LogLikelihood(
+                GaussAmplitude(), DATA, MONTE_CARLO, num_of_processes=2,
+                precision=precision
+            ),
+            "chi": likelihoods.ChiSquared(
+                GaussAmplitude(), DATA, npy.ones(len(DATA)),
+                num_of_processes=2, precision=precision
+            ),
+            "empty": likelihoods.EmptyLikelihood(
+                GaussAmplitude(), DATA, num_of_processes=2,
+                precision=precision
+            )
+        }[kind]
+        with likelihood:
+            results.append(likelihood.evaluate_many(PARAMETERS))
+
+    npy.testing.assert_allclose(results[0], results[1], 1e-5)
+
+
+def test_compare_precision():
+    comparison = likelihoods.compare_precision(
+        likelihoods.LogLikelihood, GaussAmplitude(), PARAMETERS,
+        sample_size=500, seed=1, data=DATA, monte_carlo=MONTE_CARLO,
+        generated_length=4000, num_of_processes=2
+    )
+
+    assert len(comparison.reference) == len(PARAMETERS)
+    assert comparison.max_absolute_error < 1e-2
+    assert comparison.max_relative_error < 1e-5
+
+
+def test_invalid_precision():
+    with pytest.raises(ValueError):
+        likelihoods.EmptyLikelihood(GaussAmplitude(), DATA, precision=int)
+
+
+"""
+Test Updating Weights
+"""
+
+
+class SharedWaveAmplitude(WaveAmplitude):
+    USE_SHARED_MEMORY = True
+
+
+def make_weighted(kind, weights, mc_weights):
+    if kind == "log":
+        return likelihoods.LogLikelihood(
+            GaussAmplitude(), DATA, quality_factor=weights,
+            num_of_processes=2, cache_size=4
+        )
+    elif kind == "single":
+        return likelihoods.LogLikelihood(
+            SingleGaussAmplitude(), DATA, quality_factor=weights
+        )
+    elif kind == "chi":
+        return likelihoods.ChiSquared(
+            GaussAmplitude(), DATA, weights, num_of_processes=2
+        )
+    return likelihoods.sweightedLogLikelihood(
+        SharedWaveAmplitude(), DATA, MONTE_CARLO, weights, mc_weights,
+        num_of_processes=2
+    )
+
+
+UPDATED_NAMES = {
+    "log": ["quality_factor"], "single": ["quality_factor"],
+    "chi": ["binned"], "sweighted": ["sweight", "mcweight"]
+}
+
+
+@pytest.mark.parametrize("kind", ["log", "single", "chi", "sweighted"])
+def test_update_matches_a_new_likelihood(kind):
+    parameters = WAVE_PARAMETERS if kind == "sweighted" else PARAMETERS
+    old = [npy.random.rand(len(DATA)), npy.random.rand(len(MONTE_CARLO))]
+    new = [npy.random.rand(len(DATA)), npy.random.rand(len(MONTE_CARLO))]
+
+    with make_weighted(kind, *new) as likelihood:
+        expected = [likelihood(params) for params in parameters]
+
+    with make_weighted(kind, *old) as likelihood:
+        likelihood(parameters[0])
+        likelihood.update(**dict(zip(UPDATED_NAMES[kind], new)))
+        results = [likelihood(params) for params in parameters]
+
+    npy.testing.assert_allclose(results, expected)
+
+
+def test_update_rejects_unknown_and_mismatched_values():
+    with make_weighted("log", npy.ones(len(DATA)), None) as likelihood:
+        with pytest.raises(ValueError):
+            likelihood.update(sweight=npy.ones(len(DATA)))
+        with pytest.raises(ValueError):
+            likelihood.update(quality_factor=npy.ones(len(DATA) - 1))
@@ -0,0 +1,233 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import functools
+
+import numpy as npy
+import pandas as pd
+import pytest
+
+from PyPWA.libs.fit import likelihoods, priors
+
+mcmc = pytest.importorskip("PyPWA.libs.fit.mcmc")
+
+
+"""
+Fixtures for MCMC Tests
+"""
+
+
+class GaussAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__x = data["x"].to_numpy()
+
+    def calculate(self, params):
+        return npy.exp(-(self.__x - params["mu"]) ** 2 / params["sigma"])
+
+
+class BatchCounter:
+    """Counts the calls made to the likelihood"""
+
+    def __init__(self, likelihood):
+        self.__likelihood = likelihood
+        self.calls = 0
+
+    def __call__(self, params):
+        self.calls += 1
+        return self.__likelihood(params)
+
+    def evaluate_many(self, params):
+        self.calls += 1
+        return self.__likelihood.evaluate_many(params)
+
+
+PARAMETERS = ["mu", "sigma"]
+LIMITS = [(-1, 1), (.1, 2)]
+
+
+@pytest.fixture(scope="module")
+def log_likelihood():
+    data = pd.DataFrame({"x": npy.random.default_rng(1).normal(0, .5, 500)})
+    with likelihoods.LogLikelihood(
+            GaussAmplitude(), data, is_minimizer=False, num_of_processes=2
+    ) as likelihood:
+        yield likelihood
+
+
+"""
+Test MCMC
+"""
+
+
+def test_vectorized_prior_matches_single():
+    walkers = npy.array([[0, 1], [2, 1], [0, 0], [-.5, .5]])
+    vectorized = mcmc.log_uniform_prior(walkers, LIMITS)
+    single = [mcmc.log_uniform_prior(walker, LIMITS) for walker in walkers]
+    npy.testing.assert_array_equal(vectorized, single)
+
+
+def test_vectorized_translator_matches_single(log_likelihood):
+    walkers = npy.array([[0, 1], [2, 1], [.3, .4], [-.5, .5]])
+    prior = functools.partial(mcmc.log_uniform_prior, parlimits=LIMITS)
+    single = mcmc._Translator(PARAMETERS, log_likelihood, prior)
+    vectorized = mcmc._VectorizedTranslator(
+        PARAMETERS, log_likelihood, prior
+    )
+    npy.testing.assert_allclose(
+        vectorized(walkers), [single(walker) for walker in walkers]
+    )
+
+
+def test_vectorized_mcmc_uses_one_call_per_step(log_likelihood):
+    counter = BatchCounter(log_likelihood)
+    start = npy.column_stack([
+        npy.random.uniform(-.1, .1, 8), npy.random.uniform(.4, .6, 8)
+    ])
+
+    sampler = mcmc.mcmc(
+        PARAMETERS, counter, nwalker=8, nsteps=10, startpars=start,
+        parlimits=LIMITS, vectorize=True
+    )
+
+    assert sampler.get_chain().shape == (10, 8, 2)
+    assert counter.calls <= 10 + 1
+
+
+"""
+Test Memory Mapped Backend
+"""
+
+
+def run_chain(likelihood, backend, nsteps):
+    start = npy.column_stack([
+        npy.linspace(-.1, .1, 6), npy.linspace(.4, .6, 6)
+    ])
+    return mcmc.mcmc(
+        PARAMETERS, likelihood, nwalker=6, nsteps=nsteps, startpars=start,
+        parlimits=LIMITS, vectorize=True, backend=backend
+    )
+
+
+def test_memmap_backend_matches_memory(log_likelihood, tmp_path):
+    npy.random.seed(3)
+    memory = run_chain(log_likelihood, None, 12)
+
+    npy.random.seed(3)
+    backend = mcmc.MemmapBackend(tmp_path, chunk_size=5)
+    mapped = run_chain(log_likelihood, backend, 12)
+
+    assert isinstance(backend.chain, npy.memmap)
+    npy.testing.assert_array_equal(mapped.get_chain(), memory.get_chain())
+    npy.testing.assert_array_equal(
+        mapped.get_log_prob(), memory.get_log_prob()
+    )
+
+
+def test_memmap_backend_resumes_from_checkpoint(log_likelihood, tmp_path):
+    npy.random.seed(4)
+    straight = run_chain(log_likelihood, None, 15)
+
+    npy.random.seed(4)
+    backend = mcmc.MemmapBackend(tmp_path / "a", 4, checkpoint_every=5)
+    run_chain(log_likelihood, backend, 10)
+
+    # Steps past the last checkpoint are lost when the job is killed
+    backend.save_step(backend.get_last_sample(), npy.zeros(6))
+    backend.save_step(backend.get_last_sample(), npy.zeros(6))
+
+    resumed = mcmc.MemmapBackend(tmp_path / "a", 4, checkpoint_every=5)
+    assert resumed.iteration == 10
+
+    sampler = run_chain(log_likelihood, tmp_path / "a", 15)
+    assert sampler.iteration == 15
+    npy.testing.assert_array_equal(sampler.get_chain(), straight.get_chain())
+
+
+"""
+Test Convergence Monitor
+"""
+
+
+def standard_normal(params):
+    return -.5 * (params["mu"] ** 2 + (params["sigma"] - 1) ** 2)
+
+
+def test_monitor_stops_converged_chains():
+    npy.random.seed(5)
+    monitor = mcmc.ConvergenceMonitor(50, multiple=20, tolerance=.1)
+    start = npy.random.normal(0, .1, (16, 2)) + [0, 1]
+
+    sampler = mcmc.mcmc(
+        PARAMETERS, standard_normal, nwalker=16, nsteps=20000,
+        startpars=start, parlimits=[(-10, 10), (-10, 10)],
+        emceemoves=mcmc._emcee.moves.StretchMove(), vectorize=True,
+        monitor=monitor
+    )
+
+    assert monitor.converged
+    assert sampler.iteration < 20000
+    assert sampler.iteration % 50 == 0
+    assert monitor.steps_saved == 20000 - sampler.iteration
+    assert monitor.evaluations_saved == 16 * monitor.steps_saved
+    assert sampler.iteration > 20 * monitor.history[-1][1].max()
+
+
+class RecordingSampler(mcmc._emcee.EnsembleSampler):
+    """Records how many steps of the chain every check reads"""
+
+    def __init__(self, *args, **kwargs):
+        super(RecordingSampler, self).__init__(*args, **kwargs)
+        self.lengths = []
+
+    def get_chain(self, **kwargs):
+        chain = super(RecordingSampler, self).get_chain(**kwargs)
+        self.lengths.append(len(chain))
+        return chain
+
+
+def test_monitor_checks_a_bounded_chain():
+    npy.random.seed(3)
+    sampler = RecordingSampler(
+        8, 1, lambda x: -.5 * npy.sum(x ** 2)
+    )
+    # A tolerance of zero never converges, so every check is made
+    monitor = mcmc.ConvergenceMonitor(100, tolerance=0, max_samples=150)
+    monitor.run(sampler, npy.random.normal(0, .1, (8, 1)), 2000)
+
+    assert not monitor.converged
+    assert len(monitor.history) == 20
+    assert max(sampler.lengths) <= 150
+    assert all(npy.isfinite(tau).all() for _, tau in monitor.history)
+
+
+def test_mcmc_accepts_priors():
+    prior = priors.Gaussian(0, 1, columns=0) * \
+        priors.LogNormal(0, .5, columns=1)
+    start = npy.column_stack([
+        npy.random.normal(0, .1, 8), npy.random.uniform(.9, 1.1, 8)
+    ])
+
+    sampler = mcmc.mcmc(
+        PARAMETERS, lambda params: 0., nwalker=8, nsteps=20,
+        startpars=start, prior=prior, vectorize=True
+    )
+
+    npy.testing.assert_allclose(
+        sampler.get_log_prob()[-1], prior(sampler.get_chain()[-1])
+    )
@@ -0,0 +1,102 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as npy
+import pandas as pd
+import pytest
+
+from PyPWA.libs.fit import likelihoods
+from PyPWA.libs.fit.minuit import minuit
+
+
+"""
+Fixtures for Minuit Tests
+"""
+
+
+class LineAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__x = data["x"]
+
+    def calculate(self, params):
+        return params["slope"] * self.__x + params["offset"]
+
+
+class GradientLineAmplitude(LineAmplitude):
+
+    def setup(self, data):
+        super(GradientLineAmplitude, self).setup(data)
+        self.__x = data["x"].to_numpy()
+
+    def gradient(self, params):
+        return npy.array([self.__x, npy.ones_like(self.__x)])
+
+
+@pytest.fixture(scope="module")
+def chi_squared():
+    data = pd.DataFrame({"x": npy.linspace(0, 10, 500)})
+    binned = 2 * data["x"].to_numpy() + 1 + npy.random.rand(500) * .1
+
+    with likelihoods.ChiSquared(
+            LineAmplitude(), data, binned, num_of_processes=2
+    ) as likelihood:
+        yield likelihood
+
+
+"""
+Test Gradients
+"""
+
+
+def test_parallel_gradient_matches_numerical(chi_squared):
+    settings = {"slope": 1, "offset": 0}
+
+    numerical = minuit(settings, chi_squared)
+    numerical.migrad()
+
+    parallel = minuit(settings, chi_squared, gradient="parallel")
+    parallel.limits["offset"] = (-5, 5)
+    parallel.migrad()
+
+    assert parallel.valid
+    npy.testing.assert_allclose(parallel.values, numerical.values, 1e-4)
+
+
+def test_unknown_gradient_raises(chi_squared):
+    with pytest.raises(ValueError):
+        minuit({"slope": 1, "offset": 0}, chi_squared, gradient="?")
+
+
+def test_analytic_gradient_finds_minimum():
+    settings = {"slope": 1, "offset": 0}
+    data = pd.DataFrame({"x": npy.linspace(0, 10, 500)})
+    binned = 2 * data["x"].to_numpy() + 1 + npy.random.rand(500) * .1
+    with likelihoods.ChiSquared(
+            GradientLineAmplitude(), data, binned, num_of_processes=2
+    ) as likelihood:
+        analytic = minuit(settings, likelihood, gradient="analytic")
+        analytic.migrad()
+
+    assert analytic.valid
+    npy.testing.assert_allclose(analytic.values, [2.0, 1.05], atol=.05)
+
+
+def test_analytic_gradient_requires_amplitude_gradient(chi_squared):
+    with pytest.raises(ValueError):
+        minuit({"slope": 1, "offset": 0}, chi_squared, gradient="analytic")
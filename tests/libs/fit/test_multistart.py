@@ -0,0 +1,180 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+
+import numpy as npy
+import pandas as pd
+import pytest
+
+from PyPWA.libs.fit import likelihoods
+from PyPWA.libs.fit.multistart import _Multiplexer, _Request, multistart
+
+
+"""
+Fixtures for Multistart Tests
+"""
+
+
+class SquaredSlopeAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__x = data["x"].to_numpy()
+
+    def calculate(self, params):
+        return params["a"] ** 2 * self.__x + params["b"]
+
+
+class BatchCounter:
+    """Records the size of every batch sent to the likelihood"""
+
+    def __init__(self, likelihood):
+        self.__likelihood = likelihood
+        self.TYPE = likelihood.TYPE
+        self.batches = []
+
+    def __call__(self, params):
+        return self.evaluate_many([params])[0]
+
+    def evaluate_many(self, params):
+        self.batches.append(len(params))
+        return self.__likelihood.evaluate_many(params)
+
+
+class GradientSlopeAmplitude(SquaredSlopeAmplitude):
+
+    def setup(self, data):
+        super(GradientSlopeAmplitude, self).setup(data)
+        self.__x = data["x"].to_numpy()
+
+    def gradient(self, params):
+        return npy.array([2 * params["a"] * self.__x, npy.ones_like(self.__x)])
+
+
+class GradientCounter(BatchCounter):
+    """Also records the size of every batch of gradients"""
+
+    def __init__(self, likelihood):
+        super(GradientCounter, self).__init__(likelihood)
+        self.__likelihood = likelihood
+        self.has_gradient = True
+        self.gradient_batches = []
+
+    def gradient(self, params):
+        return self.gradient_many([params])[0]
+
+    def gradient_many(self, params):
+        self.gradient_batches.append(len(params))
+        return self.__likelihood.gradient_many(params)
+
+
+@pytest.fixture(scope="module")
+def chi_squared():
+    x = npy.linspace(0, 1, 200)
+    with likelihoods.ChiSquared(
+            SquaredSlopeAmplitude(), pd.DataFrame({"x": x}), 4 * x + 1,
+            num_of_processes=2
+    ) as likelihood:
+        yield likelihood
+
+
+@pytest.fixture(scope="module")
+def gradient_chi_squared():
+    x = npy.linspace(0, 1, 200)
+    with likelihoods.ChiSquared(
+            GradientSlopeAmplitude(), pd.DataFrame({"x": x}), 4 * x + 1,
+            num_of_processes=2
+    ) as likelihood:
+        yield likelihood
+
+
+"""
+Test Multistart
+"""
+
+
+def test_multistart_finds_both_minima(chi_squared):
+    results = multistart(
+        {"a": 1, "b": 0}, chi_squared, 12, {"a": (-3, 3)}, seed=1
+    )
+
+    assert len(results) == 2
+    assert results["starts"].sum() == 12
+    assert results["valid"].all()
+    npy.testing.assert_allclose(sorted(results["a"]), [-2, 2], atol=1e-3)
+    npy.testing.assert_allclose(results["b"], 1, atol=1e-3)
+
+
+def test_multistart_batches_running_starts(chi_squared):
+    counter = BatchCounter(chi_squared)
+    results = multistart(
+        {"a": 1, "b": 0}, counter, [{"a": a} for a in [-1, -.5, .5, 1]],
+        concurrent=4, deduplicate=False
+    )
+
+    assert len(results) == 4
+    assert max(counter.batches) == 4
+    assert list(results["fval"]) == sorted(results["fval"])
+
+
+def test_multistart_parallel_gradient(chi_squared):
+    results = multistart(
+        {"a": 1, "b": 0}, chi_squared, 4, {"a": (.5, 3)}, seed=2,
+        gradient="parallel"
+    )
+    assert len(results) == 1
+    npy.testing.assert_allclose(results["a"], 2, atol=1e-3)
+
+
+def test_multistart_analytic_gradient(gradient_chi_squared):
+    results = multistart(
+        {"a": 1, "b": 0}, gradient_chi_squared,
+        [{"a": a} for a in [.5, 1, 3]], concurrent=3, gradient="analytic"
+    )
+
+    assert len(results) == 1
+    npy.testing.assert_allclose(results["a"], 2, atol=1e-3)
+
+
+def test_waiting_gradients_are_batched(gradient_chi_squared):
+    counter = GradientCounter(gradient_chi_squared)
+    multiplexer = _Multiplexer(counter, 3)
+    parameters = [{"a": a, "b": 1.} for a in [1., 2., 3.]]
+
+    gradients = [None] * 3
+
+    def request(index):
+        gradients[index] = multiplexer.evaluate(
+            _Request([parameters[index]], is_gradient=True)
+        )[0]
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.gradient_batches == [3]
+    npy.testing.assert_allclose(
+        gradients, [gradient_chi_squared.gradient(p) for p in parameters]
+    )
+
+
+def test_multistart_needs_ranges_for_random_starts(chi_squared):
+    with pytest.raises(ValueError):
+        multistart({"a": 1, "b": 0}, chi_squared, 4)
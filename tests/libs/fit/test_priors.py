@@ -0,0 +1,95 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+
+import numpy as npy
+import pytest
+
+from PyPWA.libs.fit import priors
+
+
+"""
+Fixtures for Prior Tests
+"""
+
+
+def gaussian(x, mean, sigma):
+    return -.5 * ((x - mean) / sigma) ** 2 - math.log(
+        sigma * math.sqrt(2 * math.pi)
+    )
+
+
+def log_normal(x, mu, sigma):
+    if x <= 0:
+        return -math.inf
+    return gaussian(math.log(x), mu, sigma) - math.log(x)
+
+
+def half_cauchy(x, scale):
+    if x < 0:
+        return -math.inf
+    return math.log(2 / (math.pi * scale * (1 + (x / scale) ** 2)))
+
+
+def uniform(x, lower, upper):
+    if lower <= x <= upper:
+        return -math.log(upper - lower)
+    return -math.inf
+
+
+CASES = [
+    (priors.Uniform(-1, 2), lambda x: uniform(x, -1, 2)),
+    (priors.Gaussian(.5, 2), lambda x: gaussian(x, .5, 2)),
+    (priors.LogNormal(.1, .7), lambda x: log_normal(x, .1, .7)),
+    (priors.HalfCauchy(1.5), lambda x: half_cauchy(x, 1.5))
+]
+
+WALKERS = npy.random.default_rng(2).uniform(-2, 3, (50, 3))
+
+
+"""
+Test Priors
+"""
+
+
+@pytest.mark.parametrize("prior, expected", CASES)
+def test_prior_matches_density(prior, expected):
+    calculated = prior(WALKERS)
+    densities = [sum(expected(x) for x in walker) for walker in WALKERS]
+
+    assert calculated.shape == (len(WALKERS),)
+    npy.testing.assert_allclose(calculated, densities)
+
+
+@pytest.mark.parametrize("prior, expected", CASES)
+def test_prior_of_a_single_walker_is_a_float(prior, expected):
+    assert prior(WALKERS[0]) == pytest.approx(prior(WALKERS)[0])
+    assert isinstance(prior(WALKERS[0]), float)
+
+
+def test_product_applies_priors_to_their_columns():
+    prior = priors.Gaussian([0, 1], [1, 2], columns=[0, 2]) * \
+        priors.HalfCauchy(3, columns=1)
+
+    expected = [
+        gaussian(a, 0, 1) + half_cauchy(b, 3) + gaussian(c, 1, 2)
+        for a, b, c in WALKERS
+    ]
+    npy.testing.assert_allclose(prior(WALKERS), expected)
+    assert len(prior.priors) == 2
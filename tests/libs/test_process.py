@@ -16,10 +16,19 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+from multiprocessing import Pipe, shared_memory
+from pathlib import Path
+
 import numpy as npy
+import pandas as pd
 import pytest
 
-from PyPWA.libs import process
+from PyPWA.libs import process, vectors
 
 TEST_DATA = {"data": npy.random.rand(100)}
 
@@ -163,3 +172,281 @@ def test_process_error_handling(get_duplex_state):
     values = interface.run()
     assert process.ProcessCodes.ERROR in values
     interface.close()
+
+
+"""
+Test Shared Memory
+"""
+
+
+class SharedKernel(process.Kernel):
+
+    def __init__(self):
+        self.data = None
+
+    def setup(self):
+        pass
+
+    def process(self, data=False):
+        if data == ("views",):
+            return float(is_shared_view(self.__first_column()))
+        if isinstance(self.data, vectors.ParticlePool):
+            return sum(npy.sum(p.e) for p in self.data.iter_particles())
+        elif isinstance(self.data, pd.DataFrame):
+            return npy.sum(self.data["x"])
+        return npy.sum(self.data)
+
+    def __first_column(self):
+        if isinstance(self.data, vectors.ParticlePool):
+            return next(self.data.iter_particles())._e
+        elif isinstance(self.data, pd.DataFrame):
+            return self.data["x"].to_numpy()
+        return self.data
+
+
+def is_shared_view(array):
+    return not array.flags.owndata and any(
+        npy.shares_memory(array, npy.frombuffer(memory.buf, npy.uint8))
+        for memory in process._ATTACHED_MEMORY.values()
+    )
+
+
+@pytest.fixture(params=["array", "frame", "pool"])
+def shared_data(request, random_particle_pool):
+    if request.param == "array":
+        return TEST_DATA["data"], npy.sum(TEST_DATA["data"])
+    elif request.param == "frame":
+        frame = pd.DataFrame({"x": npy.random.rand(100), "y": 1.0})
+        return frame, npy.sum(frame["x"])
+    expected = sum(npy.sum(p.e) for p in random_particle_pool.iter_particles())
+    return random_particle_pool, expected
+
+
+def test_shared_memory_sum_matches_expected(shared_data):
+    data, expected = shared_data
+    interface = process.make_processes(
+        {"data": data}, SharedKernel(), DuplexInterface(), 4,
+        use_shared_memory=True
+    )
+    final_value = interface.run("go")
+    views = interface.run("views")
+    interface.close()
+    npy.testing.assert_approx_equal(final_value, expected)
+    assert views == 4
+
+
+def test_shared_memory_is_released_on_close():
+    interface = process.make_processes(
+        TEST_DATA, SharedKernel(), DuplexInterface(), 2,
+        use_shared_memory=True
+    )
+    name = interface._ProcessInterface__shared[0].name
+    interface.close()
+
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name)
+
+
+"""
+Test Worker Pool
+"""
+
+
+class SetupErrorKernel(DuplexKernel):
+
+    def setup(self):
+        raise RuntimeError("Testing errors are caught in setup")
+
+
+@pytest.fixture
+def worker_pool():
+    pool = process.WorkerPool(3)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.parametrize("use_shared_memory", [True, False])
+def test_pool_reuses_processes_between_kernels(worker_pool, use_shared_memory):
+    for multiplier in [1, 2, 3]:
+        data = {"data": TEST_DATA["data"] * multiplier}
+        interface = worker_pool.attach(
+            data, DuplexKernel(), DuplexInterface(),
+            use_shared_memory=use_shared_memory
+        )
+        npy.testing.assert_approx_equal(
+            interface.run("go"), npy.sum(data["data"])
+        )
+        interface.close()
+    assert worker_pool.is_alive
+
+
+def test_pool_runs_simplex_kernels(worker_pool):
+    interface = worker_pool.attach(
+        TEST_DATA, SimplexKernel(), SimplexInterface(), False
+    )
+    npy.testing.assert_approx_equal(
+        interface.run(), npy.sum(TEST_DATA["data"])
+    )
+    interface.close()
+
+
+POOLED_SHARED_MEMORY = textwrap.dedent("""
+    import numpy as npy
+    from multiprocessing import shared_memory
+    from PyPWA.libs import process
+
+    class Kernel(process.Kernel):
+        def __init__(self):
+            self.data = None
+
+        def setup(self):
+            pass
+
+        def process(self, data=False):
+            return npy.sum(self.data)
+
+    class Interface(process.Interface):
+        def run(self, connections, *args):
+            for connection in connections:
+                connection.send(args)
+            return sum(connection.recv() for connection in connections)
+
+    if __name__ == "__main__":
+        if {tracker_running}:
+            memory = shared_memory.SharedMemory(create=True, size=8)
+            memory.close()
+            memory.unlink()
+
+        with process.WorkerPool(2) as pool:
+            interface = pool.attach(
+                {{"data": npy.ones(100)}}, Kernel(), Interface(),
+                use_shared_memory=True
+            )
+            assert interface.run("go") == 100
+            interface.close()
+""")
+
+
+@pytest.mark.parametrize("tracker_running", [True, False])
+def test_pool_with_shared_memory_exits_cleanly(tracker_running):
+    # The resource tracker only complains once the interpreter exits
+    root = Path(process.__file__).parents[2]
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(root), environment.get("PYTHONPATH")])
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", POOLED_SHARED_MEMORY.format(
+            tracker_running=tracker_running
+        )], capture_output=True, text=True, env=environment, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stderr == ""
+
+
+def test_pool_raises_setup_errors_and_stays_alive(worker_pool):
+    with pytest.raises(RuntimeError):
+        worker_pool.attach(TEST_DATA, SetupErrorKernel(), DuplexInterface())
+
+    interface = worker_pool.attach(TEST_DATA, DuplexKernel(), DuplexInterface())
+    npy.testing.assert_approx_equal(
+        interface.run("go"), npy.sum(TEST_DATA["data"])
+    )
+    interface.close()
+
+
+"""
+Test Memory Mapped Data
+"""
+
+
+def test_memory_mapped_data_is_split_by_range(tmp_path):
+    npy.save(tmp_path / "data.npy", npy.arange(10.))
+    mapped = npy.load(tmp_path / "data.npy", mmap_mode="r")
+
+    packets = process._make_data_packets({"data": mapped}, 3)
+    parts = [packet["data"].attach() for packet in packets]
+
+    assert all(isinstance(part, npy.memmap) for part in parts)
+    npy.testing.assert_array_equal(npy.concatenate(parts), npy.arange(10.))
+
+
+def test_writable_memory_maps_are_written_by_range(tmp_path):
+    mapped = npy.lib.format.open_memmap(
+        str(tmp_path / "data.npy"), "w+", npy.float64, (10,)
+    )
+
+    packets = process._make_data_packets({"data": mapped}, 3)
+    for index, packet in enumerate(packets):
+        part = packet["data"].attach()
+        part[:] = index
+        part.flush()
+
+    npy.testing.assert_array_equal(
+        npy.load(tmp_path / "data.npy"), [0, 0, 0, 0, 1, 1, 1, 2, 2, 2]
+    )
+
+
+"""
+Test Updating Data
+"""
+
+
+@pytest.mark.parametrize("use_shared_memory", [True, False])
+def test_update_replaces_data_on_running_processes(use_shared_memory):
+    interface = process.make_processes(
+        TEST_DATA, SharedKernel(), DuplexInterface(), 3,
+        use_shared_memory=use_shared_memory
+    )
+    for multiplier in [2, 3]:
+        data = {"data": TEST_DATA["data"] * multiplier}
+        interface.update(data, use_shared_memory)
+        npy.testing.assert_approx_equal(
+            interface.run("go"), npy.sum(data["data"])
+        )
+
+    updates = interface._ProcessInterface__updates
+    names = [block.name for block in updates.get("data", [])]
+    interface.close()
+
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name)
+
+
+def test_processes_detach_shared_memory_on_exit():
+    initial = process._SharedValue(TEST_DATA["data"])
+    replacement = process._SharedValue(TEST_DATA["data"] * 2)
+    kernel = SharedKernel()
+    kernel.data = initial.split(1)[0]
+
+    # The process is run in a thread, so its attached memory is visible
+    parent, child = Pipe()
+    worker = threading.Thread(target=process._SmartProcess(kernel, child).run)
+    worker.start()
+    parent.send(process._DataUpdate({"data": replacement.split(1)[0]}))
+    assert parent.recv()
+    parent.send(process.ProcessCodes.SHUTDOWN)
+    worker.join()
+
+    blocks = initial.blocks + replacement.blocks
+    attached = set(process._ATTACHED_MEMORY)
+    for block in blocks:
+        block.release()
+    assert not attached & {block.name for block in blocks}
+
+
+def test_pool_update_only_changes_its_kernel(worker_pool):
+    first = worker_pool.attach(
+        TEST_DATA, DuplexKernel(), DuplexInterface(), use_shared_memory=True
+    )
+    second = worker_pool.attach(TEST_DATA, DuplexKernel(), DuplexInterface())
+
+    first.update({"data": npy.ones(100)}, use_shared_memory=True)
+    npy.testing.assert_approx_equal(first.run("go"), 100)
+    npy.testing.assert_approx_equal(
+        second.run("go"), npy.sum(TEST_DATA["data"])
+    )
+    first.close()
+    second.close()
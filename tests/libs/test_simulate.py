@@ -0,0 +1,461 @@
+#  coding=utf-8
+#
+#  PyPWA, a scientific analysis toolkit.
+#  Copyright (C) 2016 JLab
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as npy
+import pandas as pd
+import pytest
+
+from PyPWA.libs import file, process, simulate
+from PyPWA.libs.fit import likelihoods
+
+
+"""
+Fixtures for Simulation Tests
+"""
+
+
+class LineAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__x = data["x"]
+
+    def calculate(self, params):
+        return params["slope"] * self.__x + 1
+
+
+class SerialLineAmplitude(LineAmplitude):
+    USE_MP = False
+
+
+PARAMS = {"slope": 2}
+EVENTS = 1000
+
+
+@pytest.fixture(scope="module")
+def data():
+    generator = npy.random.default_rng(11)
+    return pd.DataFrame({"x": generator.random(EVENTS)})
+
+
+@pytest.fixture
+def mapped(data, tmp_path):
+    filename = tmp_path / "data.npy"
+    npy.save(filename, data.to_records(index=False))
+    return npy.load(filename, mmap_mode="r")
+
+
+"""
+Test In Memory Simulation
+"""
+
+
+def test_in_memory_intensities_match_the_amplitude(data):
+    intensities, max_value = simulate.process_user_function(
+        LineAmplitude(), data, PARAMS, 2
+    )
+    npy.testing.assert_allclose(intensities, 2 * data["x"] + 1)
+    assert max_value == intensities.max()
+
+
+def test_in_memory_simulation_rejects_events(data):
+    rejection = simulate.monte_carlo_simulation(
+        LineAmplitude(), data, PARAMS, 2
+    )
+    assert len(rejection) == EVENTS
+    assert rejection.dtype == bool
+    assert 0 < rejection.sum() < EVENTS
+
+
+@pytest.mark.parametrize("amplitude", [LineAmplitude, SerialLineAmplitude])
+def test_in_memory_rejection_accepts_by_intensity(amplitude, data):
+    intensities = 2 * data["x"] + 1
+    rejection = simulate.monte_carlo_simulation(
+        amplitude(), data, PARAMS, 3, seed=5
+    )
+
+    expected = EVENTS * intensities.mean() / intensities.max()
+    assert abs(rejection.sum() - expected) < 5 * npy.sqrt(expected)
+
+
+def test_in_memory_rejection_is_reproducible_with_a_seed(data):
+    first, second, other = [
+        simulate.monte_carlo_simulation(
+            LineAmplitude(), data, PARAMS, 3, seed=seed
+        ) for seed in [1, 1, 2]
+    ]
+    npy.testing.assert_array_equal(first, second)
+    assert not npy.array_equal(first, other)
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_rejection_without_a_seed_follows_numpys_global_seed(
+        streamed, data, mapped
+):
+    source = mapped if streamed else data
+    masks = []
+    for global_seed in [6, 6, 8]:
+        npy.random.seed(global_seed)
+        masks.append(
+            simulate.monte_carlo_simulation(LineAmplitude(), source, PARAMS, 2)
+        )
+
+    npy.testing.assert_array_equal(masks[0], masks[1])
+    assert not npy.array_equal(masks[0], masks[2])
+
+
+def test_in_memory_rejection_matches_streamed(data, mapped):
+    in_memory = simulate.monte_carlo_simulation(
+        LineAmplitude(), data, PARAMS, 2, seed=9
+    )
+    streamed = simulate.monte_carlo_simulation(
+        LineAmplitude(), mapped, PARAMS, 2, seed=9
+    )
+    npy.testing.assert_array_equal(in_memory, streamed)
+
+
+def test_rejection_kernel_packs_its_mask(data):
+    kernel = simulate._RejectionKernel(LineAmplitude(), PARAMS)
+    kernel.data = data
+    kernel.setup()
+
+    max_value = kernel.process(simulate._CALCULATE)
+    seeds = npy.random.SeedSequence(0).spawn(1)
+    bits, length = kernel.process(simulate._Rejection(max_value, seeds))
+
+    assert length == EVENTS
+    assert bits.nbytes == EVENTS // 8
+
+
+"""
+Test Streaming Simulation
+"""
+
+
+@pytest.mark.parametrize("amplitude", [LineAmplitude, SerialLineAmplitude])
+def test_streamed_intensities_match_in_memory(amplitude, data, mapped):
+    intensities, max_value = simulate.process_user_function(
+        amplitude(), mapped, PARAMS, 3, chunk_size=64
+    )
+
+    assert isinstance(intensities, npy.memmap)
+    npy.testing.assert_allclose(intensities, 2 * data["x"] + 1)
+    assert max_value == pytest.approx(2 * data["x"].max() + 1)
+
+
+def test_streamed_intensities_from_a_reader(data, tmp_path):
+    # The delimiter can't be found for a single column
+    file.write(tmp_path / "data.csv", data.assign(y=1.), cache=False)
+
+    with file.get_reader(tmp_path / "data.csv") as reader:
+        intensities, max_value = simulate.process_user_function(
+            LineAmplitude(), reader, PARAMS, 2, chunk_size=100
+        )
+    npy.testing.assert_allclose(intensities, 2 * data["x"] + 1)
+
+
+def test_streamed_rejection_is_written_to_output(mapped, tmp_path):
+    rejection = simulate.monte_carlo_simulation(
+        LineAmplitude(), mapped, PARAMS, 2, chunk_size=100,
+        output=tmp_path / "rejection.npy", seed=3
+    )
+
+    assert rejection.dtype == bool
+    npy.testing.assert_array_equal(
+        npy.load(tmp_path / "rejection.npy"), rejection
+    )
+
+
+def test_streamed_rejection_accepts_by_intensity(mapped):
+    intensities = 2 * mapped["x"] + 1
+    rejection = simulate.monte_carlo_simulation(
+        LineAmplitude(), mapped, PARAMS, 2, chunk_size=100, seed=5
+    )
+
+    expected = EVENTS * intensities.mean() / intensities.max()
+    assert abs(rejection.sum() - expected) < 5 * npy.sqrt(expected)
+
+
+def test_streamed_rejection_is_reproducible_with_a_seed(mapped):
+    first, second, other = [
+        simulate.monte_carlo_simulation(
+            LineAmplitude(), mapped, PARAMS, 2, chunk_size=100, seed=seed
+        ) for seed in [1, 1, 2]
+    ]
+    npy.testing.assert_array_equal(first, second)
+    assert not npy.array_equal(first, other)
+
+
+def test_streamed_rejection_with_a_pool(mapped):
+    with process.WorkerPool(2) as pool:
+        pooled = simulate.monte_carlo_simulation(
+            LineAmplitude(), mapped, PARAMS, pool=pool, seed=7
+        )
+    spawned = simulate.monte_carlo_simulation(
+        LineAmplitude(), mapped, PARAMS, 2, seed=7
+    )
+    npy.testing.assert_array_equal(pooled, spawned)
+
+
+"""
+Test Weighted Simulation
+"""
+
+
+def test_in_memory_weights_have_a_mean_of_one(data):
+    weights, max_weight = simulate.process_user_function(
+        LineAmplitude(), data, PARAMS, 2, weighted=True
+    )
+    intensities = 2 * data["x"] + 1
+
+    assert weights.dtype == npy.float32
+    npy.testing.assert_allclose(
+        weights, intensities / intensities.mean(), rtol=1e-6
+    )
+    assert max_weight == weights.max()
+
+
+def test_streamed_weights_match_in_memory(data, mapped):
+    in_memory, in_memory_max = simulate.process_user_function(
+        LineAmplitude(), data, PARAMS, 2, weighted=True
+    )
+    streamed, streamed_max = simulate.process_user_function(
+        LineAmplitude(), mapped, PARAMS, 2, chunk_size=100, weighted=True
+    )
+
+    assert isinstance(streamed, npy.memmap)
+    assert streamed.dtype == npy.float32
+    npy.testing.assert_allclose(streamed, in_memory, rtol=1e-6)
+    assert streamed_max == pytest.approx(in_memory_max)
+
+
+def test_resampling_draws_each_event_its_expected_times():
+    weights = npy.random.default_rng(5).random(1000) ** 4
+    samples = simulate.resample(weights, 700, 20, seed=2, chunk_size=64)
+    expected = 700 * weights / weights.sum()
+
+    assert samples.shape == (20, 700)
+    for sample in samples:
+        assert npy.all(npy.diff(sample) >= 0)
+        counts = npy.bincount(sample, minlength=1000)
+        assert npy.all(counts >= npy.floor(expected) - 1e-9)
+        assert npy.all(counts <= npy.ceil(expected) + 1e-9)
+
+
+def test_resampling_never_draws_zero_weights():
+    weights = npy.zeros(500)
+    weights[[10, 250, 499]] = [1., 3., 2.]
+    samples = simulate.resample(weights, 600, 5, seed=1, chunk_size=100)
+    for sample in samples:
+        npy.testing.assert_array_equal(
+            npy.bincount(sample, minlength=500)[[10, 250, 499]],
+            [100, 300, 200]
+        )
+
+
+def test_resampling_is_reproducible_with_a_seed(mapped):
+    weights, _ = simulate.process_user_function(
+        LineAmplitude(), mapped, PARAMS, 2, weighted=True
+    )
+    first, second, other = [
+        simulate.resample(weights, 100, 3, seed, 128) for seed in [4, 4, 5]
+    ]
+    npy.testing.assert_array_equal(first, second)
+    assert not npy.array_equal(first, other)
+
+
+def test_resampling_without_any_weight_raises():
+    with pytest.raises(ValueError):
+        simulate.resample(npy.zeros(10), 5)
+
+
+"""
+Test Phase Space
+"""
+
+
+FINAL_STATE = [
+    simulate.ParticleSpec(14, 1, .938272),
+    simulate.ParticleSpec(8, 1, .139570),
+    simulate.ParticleSpec(9, -1, .139570)
+]
+
+
+@pytest.fixture(scope="module")
+def phase_space():
+    return simulate.generate_phase_space(
+        5000, 8.5, FINAL_STATE, seed=1, processes=2, chunk_size=1000
+    )
+
+
+def test_phase_space_has_every_event_and_particle(phase_space):
+    assert phase_space.event_count == 5000
+    assert [particle.id for particle in phase_space.iter_particles()] == [
+        1, 14, 8, 9
+    ]
+
+
+def test_phase_space_conserves_momentum(phase_space):
+    beam, *final_state = phase_space.iter_particles()
+    total = final_state[0] + final_state[1] + final_state[2]
+
+    npy.testing.assert_allclose(total.e, beam.e + .9382720813)
+    npy.testing.assert_allclose(total.z, beam.z)
+    npy.testing.assert_allclose(total.x, 0, atol=1e-12)
+    npy.testing.assert_allclose(total.y, 0, atol=1e-12)
+
+
+def test_phase_space_particles_are_on_shell(phase_space):
+    particles = list(phase_space.iter_particles())[1:]
+    for particle, spec in zip(particles, FINAL_STATE):
+        npy.testing.assert_allclose(particle.get_mass(), spec.mass)
+
+
+def test_massless_phase_space_is_flat():
+    # A flat Dalitz plot of massless particles has <m12^2> = M^2 / 3
+    photons = [simulate.ParticleSpec(1, 0, 0.)] * 3
+    pool = simulate.generate_phase_space(20000, 2., photons, seed=2)
+    first, second, third = pool.stored[1:]
+
+    fraction = (first + second).get_mass() ** 2
+    fraction /= (first + second + third).get_mass() ** 2
+    assert fraction.mean() == pytest.approx(1 / 3, abs=.01)
+
+
+def test_phase_space_is_reproducible_with_a_seed():
+    first, second = [
+        simulate.generate_phase_space(100, 8.5, FINAL_STATE, seed=3)
+        for _ in range(2)
+    ]
+    assert first == second
+
+
+def test_phase_space_with_a_pool_matches_processes():
+    with process.WorkerPool(2) as pool:
+        pooled = simulate.generate_phase_space(
+            100, 8.5, FINAL_STATE, seed=4, pool=pool
+        )
+    spawned = simulate.generate_phase_space(
+        100, 8.5, FINAL_STATE, seed=4, processes=2
+    )
+    assert pooled == spawned
+
+
+@pytest.mark.parametrize("energy, final_state", [
+    (8.5, FINAL_STATE[:1]), (.1, FINAL_STATE)
+])
+def test_impossible_phase_space_raises(energy, final_state):
+    with pytest.raises(ValueError):
+        simulate.generate_phase_space(10, energy, final_state, processes=0)
+
+
+class PionAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__energy = data.get_particles_by_id(8)[0].e
+
+    def calculate(self, params):
+        return self.__energy
+
+
+def test_phase_space_can_be_simulated(phase_space):
+    rejection = simulate.monte_carlo_simulation(
+        PionAmplitude(), phase_space, {}, 2, seed=5
+    )
+    assert len(rejection) == phase_space.event_count
+    assert 0 < rejection.sum() < phase_space.event_count
+
+
+"""
+Test Simulating to a Yield
+"""
+
+
+class PeakedAmplitude(likelihoods.NestedFunction):
+
+    def setup(self, data):
+        self.__energy = data.get_particles_by_id(8)[0].e
+
+    def calculate(self, params):
+        return self.__energy ** params["power"]
+
+
+def test_yield_writes_the_requested_events(tmp_path):
+    summary = simulate.simulate_to_yield(
+        PeakedAmplitude(), {"power": 2}, 500, 8.5, FINAL_STATE,
+        tmp_path / "accepted.gamp", batch_size=300, seed=1, processes=2
+    )
+
+    assert summary.accepted == 500
+    assert summary.generated > 500
+    written = file.read(tmp_path / "accepted.gamp", cache=False)
+    assert written.event_count == 500
+
+
+def test_yield_leaves_writers_open(tmp_path):
+    filename = tmp_path / "accepted.gamp"
+    writer = file.get_writer(filename, file.DataType.TREE_VECTOR)
+    simulate.simulate_to_yield(
+        PeakedAmplitude(), {"power": 1}, 20, 8.5, FINAL_STATE, writer,
+        batch_size=100, seed=2, processes=0
+    )
+    writer.write(
+        simulate.generate_phase_space(1, 8.5, FINAL_STATE, processes=0)
+    )
+    writer.close()
+
+    assert file.read(filename, cache=False).event_count == 21
+
+
+def test_yield_is_reproducible_with_a_seed(tmp_path):
+    for name in ["first", "second"]:
+        simulate.simulate_to_yield(
+            PeakedAmplitude(), {"power": 1}, 50, 8.5, FINAL_STATE,
+            tmp_path / f"{name}.gamp", batch_size=100, seed=3, processes=2
+        )
+    assert (tmp_path / "first.gamp").read_text() == \
+        (tmp_path / "second.gamp").read_text()
+
+
+def test_yield_corrects_a_low_max_estimate(tmp_path):
+    # A safety below one keeps the max underestimated, the overweight
+    # events have to be repeated for the mean to match the weighted mean.
+    summary = simulate.simulate_to_yield(
+        PeakedAmplitude(), {"power": 4}, 4000, 8.5, FINAL_STATE,
+        tmp_path / "accepted.gamp", safety=.3, batch_size=1000, seed=4,
+        processes=2
+    )
+    accepted = file.read(tmp_path / "accepted.gamp", cache=False)
+    energy = accepted.get_particles_by_id(8)[0].e
+
+    reference = simulate.generate_phase_space(
+        400_000, 8.5, FINAL_STATE, seed=5, processes=2
+    ).get_particles_by_id(8)[0].e
+    weights = reference ** 4
+    expected = npy.average(reference, weights=weights)
+    spread = npy.sqrt(npy.average((reference - expected)**2, weights=weights))
+
+    assert summary.overweight > 0
+    assert abs(energy.mean() - expected) < 4 * spread / npy.sqrt(4000)
+
+
+def test_yield_without_any_intensity_raises(tmp_path):
+    with pytest.raises(ValueError):
+        simulate.simulate_to_yield(
+            PeakedAmplitude(), {"power": 1}, 10, 8.5, FINAL_STATE,
+            tmp_path / "accepted.gamp", safety=0, batch_size=10, processes=0
+        )